@@ -0,0 +1,29 @@
+# asgi.py
+"""
+ASGI entry point: uvicorn asgi:app
+
+Flask requests run in a pool of ASGI_THREADS threads. With ASYNC_DATABASE_URI
+set, the hottest public reads (tasks list, user profile) are served on the
+event loop through an async driver instead. Catalog reads answered by the
+catalog cache never take a thread either, when the catalog version can be read
+on the event loop (ASYNC_DATABASE_URI or CATALOG_CACHE_URL is set).
+"""
+from common.asgi import AsyncReads, PooledWsgiToAsgi
+from items import get_items_cached
+from main import app as flask_app
+from tasks import get_all_tasks_async
+from users import get_user_by_uid_async
+
+
+def create_asgi_app(flask_app):
+    asgi_app = AsyncReads(flask_app, PooledWsgiToAsgi(flask_app, flask_app.config.get("ASGI_THREADS", 32)))
+    # Without CATALOG_CACHE_URL, the catalog version is read from the database
+    catalog_database = not flask_app.config.get("CATALOG_CACHE_URL")
+    asgi_app.route("/items/all", get_items_cached, database=catalog_database)
+    asgi_app.route("/items/<item_id>", get_items_cached, database=catalog_database)
+    asgi_app.route("/tasks/all", get_all_tasks_async, database=True)
+    asgi_app.route("/users/<uid>", get_user_by_uid_async, database=True)
+    return asgi_app
+
+
+app = create_asgi_app(flask_app)
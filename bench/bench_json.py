@@ -0,0 +1,89 @@
+"""
+Serialization cost of large list responses.
+
+    python bench/bench_json.py [--rows 10000] [--repeat 20]
+
+Builds the /tasks/all and /items/all bodies for --rows in-memory rows, once
+the old way (dicts built field by field, stringified by hand, written by
+Flask's default provider) and once with common.serializers and the app's
+JSON provider, and prints the time per response.
+"""
+import argparse
+import datetime
+import decimal
+import timeit
+from types import SimpleNamespace
+
+from flask.json.provider import DefaultJSONProvider
+
+from harness import create_bench_app
+from common.images import thumbnail_url
+from common.serializers import item_to_dict, task_to_dict
+
+
+def rows(n: int):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tasks = [SimpleNamespace(
+        id=f"task{i:06d}", name=f"Task {i}", created_by="user000000", reward=decimal.Decimal("3.50"),
+        start_time=now, deadline=now + datetime.timedelta(days=7), is_recurring=False,
+        recurrence_interval=None, description=f"Task number {i}",
+    ) for i in range(n)]
+    items = [SimpleNamespace(
+        id=f"item{i:06d}", name=f"Item {i}", stock=i % 100, price=i % 20, description=f"Item number {i}",
+        image=f"/images/{i:064x}.png",
+    ) for i in range(n)]
+    return tasks, items
+
+
+def old_tasks(tasks):
+    return {"tasks": [{
+        "id": t.id,
+        "name": t.name,
+        "created_by": t.created_by,
+        "reward": str(t.reward),
+        "start_time": t.start_time.isoformat() if t.start_time else None,
+        "deadline": t.deadline.isoformat() if t.deadline else None,
+        "is_recurring": t.is_recurring,
+        "recurrence_interval": t.recurrence_interval,
+        "description": t.description,
+    } for t in tasks]}
+
+
+def old_items(items):
+    return {"items": [{
+        "id": i.id,
+        "name": i.name,
+        "stock": i.stock,
+        "price": i.price,
+        "description": i.description,
+        "image": i.image,
+        "thumbnail": thumbnail_url(i.image),
+    } for i in items]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per response")
+    parser.add_argument("--repeat", type=int, default=20, help="responses per measurement")
+    args = parser.parse_args()
+
+    app = create_bench_app("sqlite://")
+    default_provider = DefaultJSONProvider(app)
+    tasks, items = rows(args.rows)
+    cases = {
+        "tasks": (lambda: default_provider.response(old_tasks(tasks)),
+                  lambda: app.json.response({"tasks": [task_to_dict(t) for t in tasks]})),
+        "items": (lambda: default_provider.response(old_items(items)),
+                  lambda: app.json.response({"items": [item_to_dict(i) for i in items]})),
+    }
+
+    print(f"{'response':<10} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    with app.app_context():
+        for name, (before, after) in cases.items():
+            before_ms = min(timeit.repeat(before, number=1, repeat=args.repeat)) * 1000
+            after_ms = min(timeit.repeat(after, number=1, repeat=args.repeat)) * 1000
+            print(f"{name:<10} {before_ms:>10.1f} {after_ms:>10.1f} {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+ORM entities against Core rows for list responses.
+
+    python bench/bench_listing.py [--rows 100000] [--repeat 5]
+
+Fills a scratch database (see harness) with --rows items and transactions,
+then builds the full JSON list of each table both ways and prints the best
+time per response:
+
+- orm:  Model.query.all(), each entity serialized (the old list path)
+- core: serializer.select() rows, serialized with from_row (the list views)
+"""
+import argparse
+import timeit
+
+from sqlalchemy import insert
+
+from harness import create_bench_app
+from common.serializers import item_to_dict, transaction_to_dict
+from models import db, Item, Transaction, User
+
+BATCH_SIZE = 5000
+
+
+def fill(rows: int):
+    db.session.add(User(uid="bench", name="Bench", cat="USER", email="bench@example.com",
+                        password="", credit=0, is_active=True))
+    for start in range(0, rows, BATCH_SIZE):
+        batch = range(start, min(start + BATCH_SIZE, rows))
+        db.session.execute(insert(Item), [
+            {"id": f"item{n:07d}", "name": f"Item {n}", "stock": n % 100, "price": n % 20,
+             "description": f"Item number {n}", "image": f"/images/{n:064x}.png"}
+            for n in batch
+        ])
+        db.session.execute(insert(Transaction), [
+            {"id": f"tx{n:07d}", "uid": "bench", "item": f"item{n:07d}", "quantity": 1, "status": "CONFIRMED"}
+            for n in batch
+        ])
+    db.session.commit()
+
+
+def measure(build, repeat: int) -> float:
+    def run():
+        build()
+        # A fresh session per response, as in a request
+        db.session.remove()
+    return min(timeit.repeat(run, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per table")
+    parser.add_argument("--repeat", type=int, default=5, help="responses per measurement")
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    cases = {
+        "items": (Item, item_to_dict),
+        "transactions": (Transaction, transaction_to_dict),
+    }
+    print(f"{'table':<14} {'orm ms':>9} {'core ms':>9} {'speedup':>8}")
+    with app.app_context():
+        fill(args.rows)
+        for name, (model, serializer) in cases.items():
+            orm_ms = measure(lambda: app.json.response(
+                {name: [serializer(entity) for entity in model.query.all()]}), args.repeat)
+            core_ms = measure(lambda: app.json.response(
+                {name: [serializer.from_row(row) for row in db.session.execute(serializer.select())]}), args.repeat)
+            print(f"{name:<14} {orm_ms:>9.1f} {core_ms:>9.1f} {orm_ms / core_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Login throughput at different password hashing costs.
+
+    python bench/bench_login.py [--clients 16] [--requests 200] [--workers 4]
+
+Logs USERS users in concurrently through the test client, once per
+PASSWORD_HASH_METHOD in METHODS, against a scratch database (see harness), and
+prints logins per second and latency percentiles. Passwords are hashed
+before the run, so rehash-on-login does not skew the numbers.
+"""
+import argparse
+
+from werkzeug.security import generate_password_hash
+
+from harness import create_bench_app, drive, summarize
+from config import BaseConfig
+from models import db, User
+
+USERS = 50
+METHODS = (
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:600000",
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "scrypt:65536:8:1",
+)
+
+
+def create_login_app(method: str, workers: int, queue: int):
+    app = create_bench_app(
+        PASSWORD_HASH_METHOD=method,
+        PASSWORD_HASH_WORKERS=workers,
+        PASSWORD_HASH_QUEUE=queue,
+        PASSWORD_HASH_TIMEOUT=60.0,
+    )
+    with app.app_context():
+        password_hash = generate_password_hash("benchpass", method)
+        db.session.add_all([
+            User(uid=f"u{i}", name=f"User {i}", cat="USER", email=f"user{i}@example.com",
+                 password=password_hash, credit=0, is_active=True)
+            for i in range(USERS)
+        ])
+        db.session.commit()
+    return app
+
+
+def login(client, n):
+    return client.post("/login", json={"email": f"user{n % USERS}@example.com", "password": "benchpass"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="logins per method")
+    parser.add_argument("--workers", type=int, default=BaseConfig.PASSWORD_HASH_WORKERS, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--queue", type=int, default=BaseConfig.PASSWORD_HASH_QUEUE, help="PASSWORD_HASH_QUEUE")
+    parser.add_argument("--method", action="append", help="method to run (repeatable, default: all of METHODS)")
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'503s':>6}")
+    for method in args.method or METHODS:
+        app = create_login_app(method, args.workers, args.queue)
+        summary = summarize(*drive(app, login, args.clients, requests=args.requests))
+        print(f"{method:<24} {summary['throughput']:>9.1f} {summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} "
+              f"{summary['p99_ms']:>8.1f} {summary['statuses'].get('503', 0):>6}")
+
+
+if __name__ == "__main__":
+    main()
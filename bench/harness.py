@@ -0,0 +1,112 @@
+"""Shared helpers of the benchmarks: an app on a scratch database, a threaded load driver, and latency summaries."""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+# main.py builds a module level app on import, so it needs a database URI first
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+# The scratch database gets its tables from the models
+os.environ.setdefault("SCHEMA_VERSION_CHECK", "false")
+
+from config import BaseConfig  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db  # noqa: E402
+
+
+def create_bench_app(database_uri: str = None, **overrides):
+    """
+    Build an app against ``database_uri`` (default: BENCH_DATABASE_URI, or a
+    fresh SQLite file) with empty tables.
+    """
+    database_uri = database_uri or os.environ.get("BENCH_DATABASE_URI")
+    if not database_uri:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_uri = f"sqlite:///{path}"
+
+    engine_options = {}
+    if database_uri.startswith("sqlite"):
+        # Concurrent writers wait for the lock instead of failing immediately
+        engine_options = {"connect_args": {"timeout": 30, "check_same_thread": False}}
+
+    config = type("BenchConfig", (BaseConfig,), {
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options,
+        "AUDIT_SPOOL_DIR": tempfile.mkdtemp(),
+        "LOG_ARCHIVE_DIR": tempfile.mkdtemp(),
+        "IMAGE_STORE_DIR": tempfile.mkdtemp(),
+        **overrides,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def drive(app, operation, clients: int, duration: float = None, requests: int = None):
+    """
+    Call ``operation(client, n)`` from ``clients`` threads, each with its own
+    test client, for ``duration`` seconds or until ``requests`` calls were made.
+    ``operation`` returns the response. Returns ``(elapsed, latencies, statuses)``.
+    """
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+    counter = iter(range(requests if requests is not None else sys.maxsize))
+    deadline = time.perf_counter() + duration if duration else None
+
+    def client_loop():
+        client = app.test_client()
+        while deadline is None or time.perf_counter() < deadline:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            response = operation(client, n)
+            response.get_data()  # drain streamed bodies
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, statuses
+
+
+def summarize(elapsed: float, latencies: list, statuses: Counter) -> dict:
+    """Throughput and latency percentiles (in milliseconds) of one run."""
+    if len(latencies) < 2:
+        percentiles = [latencies[0] if latencies else 0.0] * 99
+    else:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
@@ -0,0 +1,159 @@
+"""
+In-process load benchmarks.
+
+    python bench/run.py [--scale small] [--scenario catalog --scenario buy ...]
+                        [--clients 8] [--duration 10] [--save] [--compare bench/results/<rev>.json]
+
+Boots main.create_app against a scratch database (BENCH_DATABASE_URI, e.g. a
+local PostgreSQL database, or a temporary SQLite file), seeds it with
+synthetic users, items, tasks and years of logs (see seed.SCALES), then
+drives each scenario from --clients threads for --duration seconds and
+prints throughput and p50/p95/p99 latency.
+
+--save writes the results to bench/results/<git revision>.json (or the given
+path), and --compare prints the change against a previously saved run.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+
+from flask_jwt_extended import create_access_token
+
+from harness import REPO_DIR, create_bench_app, drive, git_revision, summarize
+from seed import HOT_ITEMS, SCALES, ADMINS, item_id, seed, user_id
+from models import db, User
+
+RESULTS_DIR = os.path.join(REPO_DIR, "bench", "results")
+
+
+class Scenarios:
+    """Request mixes. Each scenario is a method ``(client, n) -> response``."""
+
+    def __init__(self, app, counts: dict, tokens: dict):
+        self.app = app
+        self.counts = counts
+        self.tokens = tokens
+        self.rng = random.Random(7)
+        self.etag = None
+
+    def _user(self) -> str:
+        return user_id(self.rng.randrange(ADMINS, self.counts["users"]))
+
+    def _auth(self, uid: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[uid]}"}
+
+    def catalog(self, client, n):
+        """Catalog reads: the item list (half of them revalidated with an ETag) and single items."""
+        if n % 4 == 0:
+            return client.get("/items/all")
+        if n % 4 == 1:
+            response = client.get("/items/all", headers={"If-None-Match": self.etag} if self.etag else {})
+            self.etag = response.headers.get("ETag", self.etag)
+            return response
+        return client.get(f"/items/{item_id(self.rng.randrange(self.counts['items']))}")
+
+    def buy(self, client, n):
+        """Every client buys the same few hot items: contention on their stock rows."""
+        uid = self._user()
+        return client.post("/items/buy", headers=self._auth(uid),
+                           json={"id": item_id(n % HOT_ITEMS), "quantity": 1, "uid": uid})
+
+    def profile(self, client, n):
+        """Profile views: user details, open tasks and recent transactions."""
+        return client.get(f"/users/{self._user()}")
+
+    def logs(self, client, n):
+        """Log browsing: the first page, and the next one through its cursor."""
+        first = client.get("/logs/all?limit=50").get_json()
+        return client.get(f"/logs/all?limit=50&cursor={first['next_cursor']}")
+
+    def export(self, client, n):
+        """Streamed export of one day of logs, at a random point of the logged years."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        since = now - datetime.timedelta(days=self.rng.randrange(365 * self.counts["log_years"]))
+        until = since + datetime.timedelta(days=1)
+        return client.get("/logs/export", query_string={"since": since.isoformat(), "until": until.isoformat()})
+
+    def mixed(self, client, n):
+        """A day at the minimart: mostly browsing, some buying, the odd report."""
+        roll = self.rng.random()
+        if roll < 0.6:
+            return self.catalog(client, n)
+        if roll < 0.8:
+            return self.profile(client, n)
+        if roll < 0.95:
+            return self.buy(client, n)
+        if roll < 0.99:
+            return self.logs(client, n)
+        return self.export(client, n)
+
+
+SCENARIOS = ("catalog", "buy", "profile", "logs", "export", "mixed")
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nChange against {baseline['revision']} ({baseline_path}):")
+    print(f"{'scenario':<10} {'throughput':>11} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+
+        def change(key):
+            return f"{(current[key] / previous[key] - 1) * 100:+.1f}%" if previous[key] else "n/a"
+
+        print(f"{name:<10} {change('throughput'):>11} {change('p50_ms'):>8} "
+              f"{change('p95_ms'):>8} {change('p99_ms'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--save", nargs="?", const="", default=None,
+                        help="save the results (default path: bench/results/<git revision>.json)")
+    parser.add_argument("--compare", help="results of a previous run to compare against")
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        print(f"Seeding the {args.scale} dataset into {db.engine.url.render_as_string(hide_password=True)}...")
+        counts = seed(args.scale)
+        tokens = {user.uid: create_access_token(identity=user) for user in User.query.all()}
+    scenarios = Scenarios(app, counts, tokens)
+
+    results = {
+        "revision": git_revision(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "scale": args.scale,
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "clients": args.clients,
+        "duration": args.duration,
+        "scenarios": {},
+    }
+    print(f"{'scenario':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'5xx':>5}  statuses")
+    for name in args.scenario or SCENARIOS:
+        summary = summarize(*drive(app, getattr(scenarios, name), args.clients, duration=args.duration))
+        results["scenarios"][name] = summary
+        print(f"{name:<10} {summary['throughput']:>8.1f} {summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} "
+              f"{summary['p99_ms']:>8.1f} {summary['errors']:>5}  {summary['statuses']}")
+
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{results['revision']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Synthetic data for the benchmarks, in bulk inserts."""
+import datetime
+import random
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from common.rollups import backfill_rollups
+from models import db, User, Item, Task, UserTask, Transaction, Log
+
+BATCH_SIZE = 5000
+
+# Row counts per scale; logs are spread evenly over log_years
+SCALES = {
+    "small": {"users": 200, "items": 300, "tasks": 100, "transactions_per_user": 10,
+              "usertasks_per_user": 5, "logs": 50_000, "log_years": 1},
+    "medium": {"users": 2_000, "items": 2_000, "tasks": 500, "transactions_per_user": 25,
+               "usertasks_per_user": 10, "logs": 1_000_000, "log_years": 3},
+    "large": {"users": 10_000, "items": 10_000, "tasks": 2_000, "transactions_per_user": 50,
+              "usertasks_per_user": 20, "logs": 10_000_000, "log_years": 5},
+}
+
+ADMINS = 5
+HOT_ITEMS = 5  # bought by every client of the buy scenario
+LOG_ACTIONS = (
+    ("ITEM", "update"), ("USER", "update"), ("TRANSACTION", "buy"),
+    ("TRANSACTION", "preorder"), ("USERTASK", "apply"), ("ITEMREQUEST", "create"),
+)
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+    db.session.commit()
+
+
+def user_id(n: int) -> str:
+    return f"user{n:06d}"
+
+
+def item_id(n: int) -> str:
+    return f"item{n:06d}"
+
+
+def seed(scale: str = "small", rng: random.Random = None) -> dict:
+    """Fill the (empty) database of the current app context. Returns the row counts used."""
+    counts = SCALES[scale]
+    rng = rng or random.Random(42)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Users never log in during the benchmarks; a cheap hash keeps seeding fast
+    password = generate_password_hash("benchpass", "pbkdf2:sha256:1000")
+
+    _insert(User, [
+        {"uid": user_id(n), "name": f"User {n}", "cat": "ADMIN" if n < ADMINS else "USER",
+         "email": f"user{n}@example.com", "password": password, "credit": 1_000_000, "is_active": True}
+        for n in range(counts["users"])
+    ])
+    _insert(Item, [
+        {"id": item_id(n), "name": f"Item {n}", "price": rng.randint(1, 20), "description": f"Item number {n}",
+         "stock": 10_000_000 if n < HOT_ITEMS else rng.randint(0, 100)}
+        for n in range(counts["items"])
+    ])
+    _insert(Task, [
+        {"id": f"task{n:06d}", "name": f"Task {n}", "created_by": user_id(n % ADMINS), "reward": rng.randint(1, 10),
+         "start_time": now + datetime.timedelta(days=rng.randint(-30, 30)),
+         "deadline": now + datetime.timedelta(days=rng.randint(31, 60)),
+         "is_recurring": n % 4 == 0, "recurrence_interval": 7 if n % 4 == 0 else None,
+         "description": f"Task number {n}"}
+        for n in range(counts["tasks"])
+    ])
+    _insert(UserTask, [
+        {"id": f"ut{n:06d}-{k}", "uid": user_id(n), "task": f"task{rng.randrange(counts['tasks']):06d}",
+         # k keeps (uid, task, start_time) unique, as uq_usertasks_occurrence requires
+         "start_time": now - datetime.timedelta(days=rng.randint(0, 365), minutes=k),
+         "status": rng.choice(("APPLIED", "APPROVED", "COMPLETED", "REJECTED"))}
+        for n in range(ADMINS, counts["users"]) for k in range(counts["usertasks_per_user"])
+    ])
+    _insert(Transaction, [
+        {"id": f"tx{n:06d}-{k}", "uid": user_id(n), "item": item_id(rng.randrange(counts["items"])),
+         "quantity": rng.randint(1, 3), "status": rng.choice(("AWAITING_CONF", "CONFIRMED", "PREORDER")),
+         "created_at": now - datetime.timedelta(days=rng.randint(0, 365))}
+        for n in range(ADMINS, counts["users"]) for k in range(counts["transactions_per_user"])
+    ])
+
+    span = datetime.timedelta(days=365 * counts["log_years"]).total_seconds()
+    for start in range(0, counts["logs"], BATCH_SIZE):
+        rows = []
+        for n in range(start, min(start + BATCH_SIZE, counts["logs"])):
+            cat, action = rng.choice(LOG_ACTIONS)
+            uid = user_id(rng.randrange(counts["users"]))
+            rows.append({
+                "id": f"log{n:09d}", "cat": cat, "uid": uid, "action": action,
+                "timestamp": now - datetime.timedelta(seconds=span * n / counts["logs"]),
+                "description": f"User {uid} did {action} on a {cat.lower()}",
+                "entity_type": cat, "entity_id": f"entity{rng.randrange(counts['items']):06d}",
+            })
+        db.session.execute(insert(Log), rows)
+        db.session.commit()
+    backfill_rollups()
+    return counts
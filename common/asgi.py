@@ -0,0 +1,169 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask_cors.core import get_cors_headers, get_cors_options, parse_resources, try_match
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_etags
+
+READ_METHODS = ("GET", "HEAD")
+
+# The WSGI runner of asgiref's adapter, without its thread sensitive
+# sync_to_async wrapper. An asgiref internal: requirements.txt pins asgiref,
+# and a release changing it fails here at import rather than per request.
+_run_wsgi_app = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """
+    asgiref's WSGI adapter, running the WSGI app in a pool of ``max_workers``
+    threads. The stock adapter runs every request on the single thread shared
+    by thread sensitive ``sync_to_async`` calls, so one slow request (or
+    client) holds up all the others.
+    """
+
+    def __init__(self, wsgi_application, max_workers: int):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiToAsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class _PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        # The base method is wrapped in a thread sensitive sync_to_async;
+        # run the function it wraps in our pool instead
+        await sync_to_async(_run_wsgi_app, thread_sensitive=False, executor=self.executor)(self, body)
+
+
+class AsyncRequest:
+    """What an async read handler gets to see of a request."""
+
+    def __init__(self, app, scope, session=None):
+        self.app = app
+        self.session = session
+        self.method = scope["method"]
+        self.path = scope["path"]
+        query_string = scope["query_string"].decode("latin1")
+        self.args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        # Same as werkzeug's Request.full_path, so cache keys match the Flask views'
+        self.full_path = f"{self.path}?{query_string}"
+        self.headers = Headers([(k.decode("latin1"), v.decode("latin1")) for k, v in scope["headers"]])
+
+    @property
+    def if_none_match(self):
+        return parse_etags(self.headers.get("If-None-Match"))
+
+
+class AsyncReads:
+    """
+    ASGI app serving a few hot read endpoints on the event loop, so a slow
+    client waiting on them does not hold a thread; everything else goes to
+    ``fallback`` (the Flask app behind a PooledWsgiToAsgi).
+
+    Handlers are registered per path with ``route`` and mirror a Flask view:
+    ``async def handler(request, **path_params)`` returns a ``(data, status)``
+    tuple (serialized with the Flask app's JSON provider), a Response, or None
+    to leave the request to the Flask view. Handlers registered with
+    ``database=True`` get an AsyncSession as ``request.session`` and are only
+    enabled when ASYNC_DATABASE_URI is set (e.g. postgresql+asyncpg://...).
+
+    Requests served here skip Flask's hooks: keep them to public reads. The
+    app's CORS policy (configure_extensions' CORS(app)) is applied here too.
+    """
+
+    def __init__(self, flask_app, fallback):
+        self.flask_app = flask_app
+        self.fallback = fallback
+        self.routes = []
+        self.engine = None
+        self.sessionmaker = None
+        # The per path options flask_cors' after_request hook would use
+        options = get_cors_options(flask_app)
+        self.cors_resources = [(pattern, get_cors_options(flask_app, options, resource_options))
+                               for pattern, resource_options in parse_resources(options.get("resources"))]
+
+        database_uri = flask_app.config.get("ASYNC_DATABASE_URI")
+        if database_uri:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self.engine = create_async_engine(database_uri, **flask_app.config.get("ASYNC_DATABASE_ENGINE_OPTIONS", {}))
+            self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    def route(self, rule: str, handler, database: bool = False):
+        """Serve GET and HEAD requests to ``rule`` (e.g. "/users/<uid>") with ``handler``."""
+        if database and self.engine is None:
+            return
+        pattern = re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", rule)
+        self.routes.append((re.compile(pattern), handler, database))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["method"] in READ_METHODS:
+            for pattern, handler, database in self.routes:
+                match = pattern.fullmatch(scope["path"])
+                if match and await self._serve(scope, send, handler, database, match.groupdict()):
+                    return
+        await self.fallback(scope, receive, send)
+
+    def _add_cors_headers(self, request, response):
+        if response.headers.get("Access-Control-Allow-Origin"):
+            return
+        for pattern, options in self.cors_resources:
+            if try_match(request.path, pattern):
+                for key, value in get_cors_headers(options, request.headers, request.method).items():
+                    response.headers.add(key, value)
+                return
+
+    async def _serve(self, scope, send, handler, database, params) -> bool:
+        if database:
+            async with self.sessionmaker() as session:
+                request = AsyncRequest(self.flask_app, scope, session)
+                result = await handler(request, **params)
+        else:
+            request = AsyncRequest(self.flask_app, scope)
+            result = await handler(request, **params)
+        if result is None:
+            return False
+
+        if isinstance(result, tuple):
+            data, status = result
+            response = self.flask_app.json.response(data)
+            response.status_code = status
+        else:
+            response = result
+        self._add_cors_headers(request, response)
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in response.headers.items()],
+        })
+        body = b"" if scope["method"] == "HEAD" else response.get_data()
+        await send({"type": "http.response.body", "body": body})
+        return True
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.engine is not None:
+                    await self.engine.dispose()
+                if hasattr(self.fallback, "close"):
+                    self.fallback.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,297 @@
+import atexit
+import datetime
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from common.rollups import update_rollups
+from common.utils import dialect_insert
+from models import db, Log
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = ("id", "cat", "uid", "timestamp", "description", "entity_type", "entity_id", "action", "diff")
+# Diffs may hold any changed field of an entity: the public log routes leave them out
+PUBLIC_LOG_COLUMNS = tuple(column for column in LOG_COLUMNS if column != "diff")
+# audit-<pid>-<boot id>.ndjson[.<seq>]; files from before boot ids have none
+SPOOL_FILE = re.compile(r"^audit-(\d+)(?:-(\w+))?\.ndjson")
+
+
+def log_to_dict(log, columns=LOG_COLUMNS) -> dict:
+    """JSON representation of a Log (or a row with the same columns)."""
+    data = {column: getattr(log, column) for column in columns}
+    if data["timestamp"] is not None:
+        data["timestamp"] = data["timestamp"].isoformat()
+    return data
+
+
+def _json_safe(value):
+    # Diffs are stored as JSON and spooled as NDJSON: make dates, decimals, ... strings
+    return json.loads(json.dumps(value, default=str))
+
+
+def _insert_ignoring_duplicates(rows: list[dict]):
+    """
+    Bulk insert log rows, skipping ids that already exist, and count the
+    inserted ones in the rollups. Records carry their id from the moment they
+    are queued, so replaying a spool file is idempotent.
+    """
+    log_rows = [{column: row[column] for column in LOG_COLUMNS} for row in rows]
+    stmt = dialect_insert(Log)
+    if stmt is None:
+        db.session.execute(insert(Log), log_rows)
+        update_rollups(rows)
+        return
+
+    inserted = set(db.session.scalars(
+        stmt.on_conflict_do_nothing(index_elements=["id", "timestamp"]).returning(Log.id),
+        log_rows,
+    ))
+    update_rollups([row for row in rows if row["id"] in inserted])
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditLog:
+    """
+    Audit log writer. Records are held on the session until it commits (and
+    dropped if it rolls back), then queued in memory and bulk inserted by a
+    background thread once AUDIT_BATCH_SIZE records are queued or every
+    AUDIT_FLUSH_INTERVAL seconds, so request handlers never wait on the logs
+    table.
+
+    Every queued record is first appended to a per-process spool file, which
+    is only removed once its records are in the database. Spool files are
+    named after the pid and a boot id drawn when the writer starts, so a new
+    process reusing the pid of a crashed one neither overwrites its files nor
+    mistakes them for its own: they are replayed on startup.
+
+    Records that must commit or roll back together with the caller's changes
+    (e.g. purchases) use ``sync=True`` and are added to the current session.
+    AUDIT_LOG_MODE = "sync" makes every record synchronous.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.mode = "sync"
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.spool_dir = None
+        self.fsync = False
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffer = []
+        self._pending = []  # (spool path, rows) rotated out but not yet inserted
+        self._spool = None
+        self._spool_seq = 0
+        self._pid = None
+        self._boot_id = None
+        self._thread = None
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get("AUDIT_LOG_MODE", "async")
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", 500)
+        self.flush_interval = app.config.get("AUDIT_FLUSH_INTERVAL", 1.0)
+        self.spool_dir = app.config.get("AUDIT_SPOOL_DIR")
+        self.fsync = app.config.get("AUDIT_SPOOL_FSYNC", False)
+
+    def record(self, cat: str, uid: str, description: str, action: str = "other",
+               entity_type: str = None, entity_id: str = None, diff: dict = None, sync: bool = False):
+        """
+        Record that ``uid`` performed ``action`` on the entity identified by
+        ``entity_type`` and ``entity_id``. ``diff`` holds the changed fields as
+        returned by ``generate_update_diff``. Returns the id of the log.
+        """
+        row = {
+            "id": uuid.uuid4().hex,
+            "cat": cat,
+            "uid": uid,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc),
+            "description": description,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "diff": _json_safe(diff) if diff is not None else None,
+        }
+        if sync or self.mode == "sync":
+            db.session.add(Log(**{column: row[column] for column in LOG_COLUMNS}))
+            db.session.info.setdefault("audit_log_rollups", []).append(row)
+        else:
+            db.session.info.setdefault("audit_log", []).append(row)
+        return row["id"]
+
+    def enqueue(self, rows: list[dict]):
+        """Queue records for the background writer."""
+        self._ensure_started()
+        with self._lock:
+            for row in rows:
+                self._spool_write(row)
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Insert everything queued so far. Called by the background thread, and at exit."""
+        with self._lock:
+            if self._buffer:
+                self._pending.append((self._rotate_spool(), self._buffer))
+                self._buffer = []
+            pending, self._pending = self._pending, []
+
+        failed = []
+        for path, rows in pending:
+            try:
+                with self.app.app_context():
+                    _insert_ignoring_duplicates(_decoded(rows))
+                    db.session.commit()
+                if path:
+                    os.remove(path)
+            except Exception:
+                logger.exception("Failed to flush %d audit log records, will retry", len(rows))
+                failed.append((path, rows))
+            finally:
+                with self.app.app_context():
+                    db.session.remove()
+
+        if failed:
+            with self._lock:
+                self._pending = failed + self._pending
+
+    def replay_spool(self):
+        """Insert records from spool files left behind by processes that are no longer running."""
+        if not self.spool_dir:
+            return 0
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "audit-*.ndjson*"))):
+            match = SPOOL_FILE.match(os.path.basename(path))
+            if not match:
+                continue
+            pid, boot_id = int(match.group(1)), match.group(2)
+            if boot_id is not None and boot_id == self._boot_id:
+                continue
+            # Another boot with our pid is a dead predecessor whose pid we reuse
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            try:
+                with open(path) as f:
+                    rows = [json.loads(line) for line in f if line.endswith("\n")]
+            except FileNotFoundError:
+                # Replayed by another worker starting at the same time
+                continue
+            if rows:
+                with self.app.app_context():
+                    _insert_ignoring_duplicates(_decoded(rows))
+                    db.session.commit()
+                    db.session.remove()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            replayed += len(rows)
+        return replayed
+
+    def _ensure_started(self):
+        # Started lazily, so that each forked gunicorn worker gets its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._boot_id = uuid.uuid4().hex[:12]
+            self._buffer, self._pending, self._spool, self._spool_seq = [], [], None, 0
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+            # Forked workers inherit the registration
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _run(self):
+        try:
+            self.replay_spool()
+        except Exception:
+            logger.exception("Failed to replay the audit log spool")
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _spool_path(self, seq=None) -> str:
+        suffix = "" if seq is None else f".{seq}"
+        return os.path.join(self.spool_dir, f"audit-{self._pid}-{self._boot_id}.ndjson{suffix}")
+
+    def _spool_write(self, row: dict):
+        if not self.spool_dir:
+            return
+        if self._spool is None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool = open(self._spool_path(), "a")
+        self._spool.write(json.dumps(row, default=str) + "\n")
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+
+    def _rotate_spool(self):
+        """Hand the current spool file over to the batch being flushed."""
+        if self._spool is None:
+            return None
+        # Rename the file actually open, even if init_app changed spool_dir since
+        self._spool.close()
+        current, self._spool = self._spool.name, None
+        self._spool_seq += 1
+        path = f"{current}.{self._spool_seq}"
+        os.replace(current, path)
+        return path
+
+
+def _decoded(rows: list[dict]) -> list[dict]:
+    # Rows read back from a spool file carry their timestamp as a string
+    return [
+        {**row, "timestamp": datetime.datetime.fromisoformat(row["timestamp"])}
+        if isinstance(row["timestamp"], str) else row
+        for row in rows
+    ]
+
+
+audit_log = AuditLog()
+
+
+@event.listens_for(Session, "before_commit")
+def _count_synchronous_records(session):
+    # Synchronous records are counted in the rollups within the same transaction
+    rows = session.info.pop("audit_log_rollups", None)
+    if rows:
+        update_rollups(rows, session)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_records(session):
+    rows = session.info.pop("audit_log", None)
+    if rows:
+        audit_log.enqueue(rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_records(session, previous_transaction):
+    session.info.pop("audit_log", None)
+    session.info.pop("audit_log_rollups", None)
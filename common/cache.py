@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCacheBackend:
+    """Bounded, thread safe LRU cache with per entry expiry, local to one worker process."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            value, expires_at = self._entries.get(key, (0, None))
+            self._entries[key] = (value + 1, expires_at)
+            self._entries.move_to_end(key)
+            return value + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Cache shared by every worker, backed by Redis. Values must be JSON serializable."""
+
+    def __init__(self, url: str, prefix: str = "h4g:"):
+        try:
+            import redis
+        except ImportError as err:
+            raise RuntimeError("A shared cache URL is configured but the 'redis' package is not installed.") from err
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl: float = None):
+        self._client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key) -> int:
+        return self._client.incr(self.prefix + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_cache_backend(url: str = None, max_size: int = 1024):
+    if url:
+        return RedisCacheBackend(url)
+    return LocalCacheBackend(max_size)
+
+
+def local_cache_is_safe(app) -> bool:
+    """
+    Whether a cache local to this worker sees every change (e.g. invalidations
+    made while handling a request): only when the app runs a single worker.
+    """
+    return app.config.get("WORKERS", 1) <= 1
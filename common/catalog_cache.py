@@ -0,0 +1,139 @@
+import logging
+from functools import wraps
+
+from flask import Response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from common.cache import LocalCacheBackend, create_cache_backend
+from models import db, CatalogVersion
+
+VERSION_KEY = "catalog:version"
+VERSION_QUERY = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """
+    Caches serialized item catalog responses per catalog version.
+
+    Every write to items bumps the version, which every worker reads: from the
+    catalog_version row, or from CATALOG_CACHE_URL when it is set. Responses
+    carry the version as their ETag, so a poll with a matching If-None-Match
+    gets a 304, and any other poll of an unchanged catalog is served from
+    memory. Neither runs more than the version lookup. Bodies also expire
+    after CATALOG_CACHE_TTL seconds.
+
+    Without CATALOG_CACHE_URL that lookup is a query, so every poll, even of
+    an unchanged catalog, still reads the catalog_version row. Set
+    CATALOG_CACHE_URL for polls that never touch the database.
+    """
+
+    def __init__(self):
+        self.versions = None
+        self.bodies = LocalCacheBackend()
+        self.ttl = 60
+
+    def init_app(self, app):
+        url = app.config.get("CATALOG_CACHE_URL")
+        # Without a shared cache the version lives in the database
+        self.versions = create_cache_backend(url) if url else None
+        self.bodies = LocalCacheBackend(app.config.get("CATALOG_CACHE_MAX_SIZE", 256))
+        self.ttl = app.config.get("CATALOG_CACHE_TTL", 60)
+
+    @property
+    def version_in_database(self) -> bool:
+        return self.versions is None
+
+    def version(self) -> str:
+        if self.version_in_database:
+            return str(db.session.scalar(VERSION_QUERY) or 0)
+        return str(self.versions.get(VERSION_KEY) or 0)
+
+    async def version_async(self, session) -> str:
+        """``version()`` through an AsyncSession, for the async read tier."""
+        if self.version_in_database:
+            return str(await session.scalar(VERSION_QUERY) or 0)
+        return self.version()
+
+    def bump(self):
+        """
+        Call with any change to items, before committing it. In the database
+        the version is bumped by that same commit, so the change and the bump
+        succeed or fail together. With CATALOG_CACHE_URL it is bumped once the
+        commit has succeeded; a failure then is only logged, and the stale
+        bodies expire after CATALOG_CACHE_TTL.
+        """
+        db.session.info.setdefault("catalog_bumps", set()).add(self)
+
+    def _bump_in_transaction(self, session):
+        result = session.execute(update(CatalogVersion).values(version=CatalogVersion.version + 1))
+        if result.rowcount == 0:
+            # A database built with create_all (e.g. SQLite) has no row yet
+            session.add(CatalogVersion(id=1, version=1))
+
+    def _bump_committed(self):
+        try:
+            self.versions.incr(VERSION_KEY)
+        except Exception:
+            logger.exception("Failed to bump the catalog version")
+
+    def cached_response(self, version: str, full_path: str, if_none_match):
+        """
+        The response to a catalog request from the cache alone: a 304 when
+        ``if_none_match`` (an ETags) holds the ETag of ``version``, the cached
+        body, or None on a miss.
+        """
+        etag = f"catalog-{version}"
+        if if_none_match.contains(etag):
+            return Response(status=304, headers={"ETag": f'"{etag}"'})
+        cached = self.bodies.get(f"{version}:{full_path}")
+        return None if cached is None else self._response(version, *cached)
+
+    @staticmethod
+    def _response(version: str, body: bytes, mimetype: str) -> Response:
+        return Response(body, status=200, mimetype=mimetype, headers={
+            "ETag": f'"catalog-{version}"',
+            "Cache-Control": "no-cache",
+        })
+
+    def cached(self, f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            version = self.version()
+            cached = self.cached_response(version, request.full_path, request.if_none_match)
+            if cached is not None:
+                return cached
+
+            response, status = f(*args, **kwargs)
+            if status != 200:
+                return response, status
+            cached = (response.get_data(), response.mimetype)
+            self.bodies.set(f"{version}:{request.full_path}", cached, self.ttl)
+            return self._response(version, *cached)
+
+        return decorated
+
+
+catalog_cache = CatalogCache()
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions_in_database(session):
+    # Last thing in the transaction, so the catalog_version row stays locked briefly
+    for cache in session.info.get("catalog_bumps", ()):
+        if cache.version_in_database:
+            cache._bump_in_transaction(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions_in_cache(session):
+    for cache in session.info.pop("catalog_bumps", ()):
+        if not cache.version_in_database:
+            cache._bump_committed()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_bumps(session, previous_transaction):
+    session.info.pop("catalog_bumps", None)
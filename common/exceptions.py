@@ -12,3 +12,34 @@ class AuthorizationException(Exception):
             args = ["You are not authorised to perform this action."]
         super().__init__(*args, **kwargs)
         self.http_response_code = 403  # forbidden
+
+
+class PurchaseException(Exception):
+
+    def __init__(self, *args, http_response_code=400, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_response_code = http_response_code  # bad request, or not found
+
+
+class PasswordHashingBusyException(Exception):
+
+    def __init__(self, *args, **kwargs):
+        if len(args) == 0:
+            args = ["Too many logins in progress, please try again shortly."]
+        super().__init__(*args, **kwargs)
+        self.http_response_code = 503  # service unavailable
+
+
+class NPlusOneQueryException(Exception):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_response_code = 500  # internal server error
+
+
+class SchemaVersionException(Exception):
+    """The database schema does not match the migrations of this code (see common/schema.py)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_response_code = 503  # service unavailable
@@ -0,0 +1,147 @@
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import uuid
+
+from flask import current_app
+
+IMAGE_URL_PREFIX = "/images/"
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DATA_URI_PATTERN = re.compile(r"^data:image/[\w.+-]+;base64,", re.IGNORECASE)
+
+MIME_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF", "image/webp"),
+)
+
+
+def sniff_mimetype(head: bytes):
+    for signature, mimetype in MIME_SIGNATURES:
+        if head.startswith(signature):
+            if mimetype == "image/webp" and head[8:12] != b"WEBP":
+                continue
+            return mimetype
+    return None
+
+
+def _store_dir() -> str:
+    return current_app.config["IMAGE_STORE_DIR"]
+
+
+def image_path(image_hash: str, thumbnail: bool = False) -> str:
+    if not HASH_PATTERN.match(image_hash):
+        raise ValueError("Invalid image id")
+    name = f"{image_hash}.thumb" if thumbnail else image_hash
+    return os.path.join(_store_dir(), image_hash[:2], name)
+
+
+def image_url(image_hash: str) -> str:
+    return f"{IMAGE_URL_PREFIX}{image_hash}"
+
+
+def thumbnail_url(url: str):
+    """Thumbnail URL of an image served by the store, or None for external URLs."""
+    if url and url.startswith(IMAGE_URL_PREFIX):
+        return f"{url}/thumbnail"
+    return None
+
+
+def _write_atomically(path: str, data: bytes):
+    # Unique per call: threads and processes may store the same image at once
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _make_thumbnail(data: bytes):
+    try:
+        from PIL import Image
+    except ImportError:
+        # Pillow is optional; without it the thumbnail endpoint serves the original
+        return None
+
+    size = current_app.config.get("IMAGE_THUMBNAIL_SIZE", 256)
+    max_pixels = current_app.config.get("IMAGE_MAX_PIXELS", 40_000_000)
+    # Pillow raises DecompressionBombError past twice this; refuse anything past it
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > max_pixels:
+                raise ValueError("Image is too large")
+            image_format = image.format if image.format in ("JPEG", "PNG", "WEBP") else "PNG"
+            image.thumbnail((size, size))
+            out = io.BytesIO()
+            image.save(out, format=image_format)
+            return out.getvalue()
+    except Image.DecompressionBombError:
+        raise ValueError("Image is too large")
+    except (OSError, SyntaxError, EOFError):
+        # Truncated or corrupt files behind a valid signature (Pillow raises
+        # SyntaxError for some broken PNGs)
+        raise ValueError("Unsupported image type")
+
+
+def store_image(data: bytes) -> str:
+    """
+    Store an image under the sha256 of its content and return that hash.
+    Storing the same content twice is a no-op. Raises ValueError for images
+    that are too large or that Pillow (when installed) cannot read.
+    """
+    if len(data) > current_app.config.get("IMAGE_MAX_BYTES", 5 * 1024 * 1024):
+        raise ValueError("Image is too large")
+    if sniff_mimetype(data[:16]) is None:
+        raise ValueError("Unsupported image type")
+
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = image_path(image_hash)
+    if not os.path.exists(path):
+        thumbnail = _make_thumbnail(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if thumbnail is not None:
+            _write_atomically(image_path(image_hash, thumbnail=True), thumbnail)
+        _write_atomically(path, data)
+    return image_hash
+
+
+def decode_inline_image(value: str) -> bytes:
+    """Decode a data URI or a bare base64 image."""
+    payload = DATA_URI_PATTERN.sub("", value.strip(), count=1)
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Image is not valid base64")
+
+
+def is_inline_image(value) -> bool:
+    """
+    Whether ``value`` is an image itself rather than a reference to one: a
+    data URI, or bare base64 whose first bytes are those of a supported image.
+    """
+    if not value:
+        return False
+    if DATA_URI_PATTERN.match(value):
+        return True
+    try:
+        # 24 base64 characters are the 18 bytes sniff_mimetype needs
+        head = base64.b64decode(value.strip()[:24], validate=True)
+    except (binascii.Error, ValueError):
+        return False
+    return sniff_mimetype(head) is not None
+
+
+def extract_inline_image(value):
+    """
+    Move an inline (data URI or base64) image into the store and return its URL.
+    Anything else (URLs, including ones already served by the store, relative
+    paths) is returned unchanged.
+    """
+    if not is_inline_image(value):
+        return value
+    return image_url(store_image(decode_inline_image(value)))
@@ -0,0 +1,176 @@
+import datetime
+import gzip
+import json
+import os
+import re
+import shutil
+
+from flask import current_app
+from sqlalchemy import text
+
+from common.audit import LOG_COLUMNS, log_to_dict
+from common.recurrence import as_utc
+from models import db
+
+DEFAULT_PARTITION = "logs_default"
+PARTITION_PATTERN = re.compile(r"^logs_p(\d{4})(\d{2})$")
+ARCHIVE_PATTERN = re.compile(r"^logs-(\d{4})-(\d{2})\.ndjson\.gz$")
+
+
+def _month_start(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def _add_months(value: datetime.date, months: int) -> datetime.date:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned() -> bool:
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'logs'::regclass")
+    ).first() is not None
+
+
+def list_log_partitions() -> list[tuple[str, datetime.date]]:
+    """Monthly partitions of the logs table, oldest first, as (name, first day of month)."""
+    rows = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'logs'::regclass"
+    ))
+    partitions = []
+    for (name,) in rows:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions.append((name, datetime.date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def _create_partition(name: str, start: datetime.date, end: datetime.date):
+    """
+    Create the partition of logs for [start, end). PostgreSQL refuses to while
+    the default partition holds rows in that range (e.g. logs written before
+    the partition existed), so those rows are moved over with the default
+    partition detached.
+    """
+    bounds = {"start": start, "end": end}
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF logs "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    in_range = f"FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+    if db.session.execute(text(f"SELECT 1 {in_range} LIMIT 1"), bounds).first() is None:
+        db.session.execute(create)
+        return
+
+    columns = ", ".join(LOG_COLUMNS)
+    db.session.execute(text(f"ALTER TABLE logs DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.session.execute(create)
+    db.session.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} {in_range}"), bounds)
+    db.session.execute(text(f"DELETE {in_range}"), bounds)
+    db.session.execute(text(f"ALTER TABLE logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+def ensure_log_partitions(months_ahead: int = None) -> list[str]:
+    """Create the partitions for this month and the next ``months_ahead`` months."""
+    if not _is_partitioned():
+        return []
+    if months_ahead is None:
+        months_ahead = current_app.config.get("LOG_PARTITION_MONTHS_AHEAD", 3)
+
+    existing = {name for name, _ in list_log_partitions()}
+    this_month = _month_start(datetime.date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _add_months(this_month, offset)
+        name = f"logs_p{start:%Y%m}"
+        if name in existing:
+            continue
+        _create_partition(name, start, _add_months(start, 1))
+        created.append(name)
+    db.session.commit()
+    return created
+
+
+def _archive_path(month: datetime.date) -> str:
+    return os.path.join(current_app.config["LOG_ARCHIVE_DIR"], f"logs-{month:%Y-%m}.ndjson.gz")
+
+
+def archive_log_partitions(retention_months: int = None) -> list[str]:
+    """
+    Move partitions older than ``retention_months`` into gzip NDJSON files under
+    LOG_ARCHIVE_DIR. Each partition is written out completely before it is
+    detached and dropped, so a failure never loses rows.
+    """
+    if not _is_partitioned():
+        return []
+    if retention_months is None:
+        retention_months = current_app.config.get("LOG_RETENTION_MONTHS", 12)
+
+    cutoff = _add_months(_month_start(datetime.date.today()), -retention_months)
+    os.makedirs(current_app.config["LOG_ARCHIVE_DIR"], exist_ok=True)
+
+    archived = []
+    for name, month in list_log_partitions():
+        if month >= cutoff:
+            break
+        path = _archive_path(month)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as out:
+            if os.path.exists(path):
+                # The month was archived before and rows arrived later: append
+                # a new gzip member after the existing ones
+                with open(path, "rb") as previous:
+                    shutil.copyfileobj(previous, out)
+            with gzip.open(out, "at") as f:
+                result = db.session.execute(
+                    text(f"SELECT {', '.join(LOG_COLUMNS)} FROM {name}")
+                    .execution_options(stream_results=True, max_row_buffer=1000)
+                )
+                for row in result:
+                    f.write(json.dumps(log_to_dict(row)) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+
+        db.session.execute(text(f"ALTER TABLE logs DETACH PARTITION {name}"))
+        db.session.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+        archived.append(name)
+    return archived
+
+
+def search_archived_logs(since: datetime.datetime = None, until: datetime.datetime = None,
+                         cat: str = None, uid: str = None):
+    """Yield archived logs in [since, until) matching cat and uid, reading only the months in range."""
+    archive_dir = current_app.config["LOG_ARCHIVE_DIR"]
+    if not os.path.isdir(archive_dir):
+        return
+
+    for filename in sorted(os.listdir(archive_dir)):
+        match = ARCHIVE_PATTERN.match(filename)
+        if not match:
+            continue
+        month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+        # Months are compared by date only, so allow a day of slack for time zones
+        if since and _add_months(month, 1) < since.date():
+            continue
+        if until and month > until.date():
+            continue
+
+        with gzip.open(os.path.join(archive_dir, filename), "rt") as f:
+            for line in f:
+                log = json.loads(line)
+                if cat and log["cat"] != cat:
+                    continue
+                if uid and log["uid"] != uid:
+                    continue
+                if since or until:
+                    timestamp = as_utc(datetime.datetime.fromisoformat(log["timestamp"]))
+                    if since and timestamp < as_utc(since):
+                        continue
+                    if until and timestamp >= as_utc(until):
+                        continue
+                yield log
@@ -0,0 +1,120 @@
+import logging
+import os
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Metrics:
+    """
+    Prometheus metrics per endpoint (the route rule, e.g. /items/<item_id>):
+    request latency, responses by status, and the number and total time of
+    SQL statements run by each request.
+
+    Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) so
+    every worker writes its samples there and /metrics aggregates them.
+    prometheus_client is optional: without it, nothing is recorded and
+    /metrics answers 503.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._instruments = None
+
+    def init_app(self, app):
+        self.enabled = False
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        try:
+            import prometheus_client
+        except ImportError:
+            logger.warning("METRICS_ENABLED is set but the 'prometheus_client' package is not installed.")
+            return
+        if self._instruments is None:
+            self._instruments = self._create_instruments(prometheus_client)
+        self.enabled = True
+
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _create_instruments(prometheus_client):
+        # Created once per process: metrics are global to the default registry
+        labels = ("method", "endpoint")
+        return {
+            "latency": prometheus_client.Histogram(
+                "http_request_duration_seconds", "Request latency", labels, buckets=LATENCY_BUCKETS),
+            "requests": prometheus_client.Counter(
+                "http_requests", "Responses by status code", labels + ("status",)),
+            "sql_count": prometheus_client.Histogram(
+                "http_request_sql_statements", "SQL statements per request", labels, buckets=SQL_COUNT_BUCKETS),
+            "sql_time": prometheus_client.Histogram(
+                "http_request_sql_duration_seconds", "Time spent in SQL per request", labels,
+                buckets=LATENCY_BUCKETS),
+        }
+
+    def render(self) -> tuple[bytes, str]:
+        """Exposition of every metric, aggregated over all workers in multiprocess mode."""
+        import prometheus_client
+        from prometheus_client import multiprocess
+
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+    def _start_request(self):
+        g.request_metrics = {"start": time.perf_counter(), "sql_count": 0, "sql_time": 0.0, "done": False}
+
+    def _end_request(self, response):
+        self._observe(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        # Unhandled exceptions skip after_request
+        if exc is not None:
+            self._observe(500)
+
+    def _observe(self, status: int):
+        stats = g.get("request_metrics")
+        if stats is None or stats["done"]:
+            return
+        stats["done"] = True
+        labels = {
+            "method": request.method,
+            "endpoint": request.url_rule.rule if request.url_rule else "<unmatched>",
+        }
+        self._instruments["latency"].labels(**labels).observe(time.perf_counter() - stats["start"])
+        self._instruments["requests"].labels(status=str(status), **labels).inc()
+        self._instruments["sql_count"].labels(**labels).observe(stats["sql_count"])
+        self._instruments["sql_time"].labels(**labels).observe(stats["sql_time"])
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if metrics.enabled and context is not None and has_request_context() and "request_metrics" in g:
+        context.metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "metrics_start", None)
+    if start is None or not has_request_context():
+        return
+    stats = g.get("request_metrics")
+    if stats is not None:
+        stats["sql_count"] += 1
+        stats["sql_time"] += time.perf_counter() - start
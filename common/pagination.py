@@ -0,0 +1,118 @@
+import base64
+import datetime
+import json
+
+from flask import current_app
+from sqlalchemy import DateTime, Select, literal, tuple_
+
+from models import db
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+
+def get_page_limit(args) -> int:
+    """Read ``limit`` from the query string, clamped to ``PAGE_MAX_LIMIT``."""
+    default_limit = current_app.config.get("PAGE_DEFAULT_LIMIT", DEFAULT_PAGE_LIMIT)
+    max_limit = current_app.config.get("PAGE_MAX_LIMIT", MAX_PAGE_LIMIT)
+    try:
+        limit = int(args.get("limit", default_limit))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    return min(limit, max_limit)
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid ISO8601 timestamp: {value}")
+
+
+def encode_cursor(values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            if not isinstance(value, str):
+                raise ValueError("Invalid cursor")
+            try:
+                value = parse_timestamp(value)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def apply_filters(query, args, filters: dict):
+    """
+    Push equality filters down into SQL.
+    ``filters`` maps a query string parameter to the column it filters on.
+    """
+    for param, column in filters.items():
+        value = args.get(param)
+        if value is not None:
+            query = query.filter(column == value)
+    return query
+
+
+def apply_time_range(query, args, column):
+    """Filter ``column`` by the optional ``since`` (inclusive) and ``until`` (exclusive) parameters."""
+    since = args.get("since")
+    until = args.get("until")
+    if since:
+        query = query.filter(column >= parse_timestamp(since))
+    if until:
+        query = query.filter(column < parse_timestamp(until))
+    return query
+
+
+def keyset_paginate(query, order_columns, args, descending: bool = False):
+    """
+    Cursor based pagination over ``order_columns``, which must form a unique key
+    (e.g. ``(Log.timestamp, Log.id)``). Rows after the position encoded in the
+    ``cursor`` parameter are fetched with a range predicate on the key, so walking
+    a large table never pays for an OFFSET scan.
+
+    ``query`` is an ORM query, or a Core ``select()`` of plain rows (which
+    must include the ``order_columns``).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    limit = get_page_limit(args)
+    key_getter = [column.key for column in order_columns]
+
+    cursor = args.get("cursor")
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        if len(order_columns) > 1:
+            key = tuple_(*order_columns)
+            position = tuple_(*[literal(v, c.type) for c, v in zip(order_columns, values)])
+        else:
+            key, position = order_columns[0], values[0]
+        query = query.filter(key < position if descending else key > position)
+
+    ordering = [column.desc() if descending else column.asc() for column in order_columns]
+    query = query.order_by(*ordering).limit(limit + 1)
+    rows = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], attr) for attr in key_getter])
+    return rows, next_cursor
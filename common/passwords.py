@@ -0,0 +1,137 @@
+import concurrent.futures
+import hmac
+import os
+import secrets
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from common.exceptions import PasswordHashingBusyException
+
+HASH_METHODS = ("scrypt", "pbkdf2")
+
+
+def is_hashed(stored: str) -> bool:
+    """Whether a stored password is a hash, rather than a plaintext password from before hashing."""
+    return stored.split("$", 1)[0].split(":", 1)[0] in HASH_METHODS and stored.count("$") == 2
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords in a bounded pool of PASSWORD_HASH_WORKERS
+    threads (hashlib releases the GIL while hashing), so a login storm uses
+    at most that many cores and leaves request workers free for everything
+    else. At most PASSWORD_HASH_QUEUE hashes may be pending: beyond that, or
+    when a hash waits longer than PASSWORD_HASH_TIMEOUT seconds, callers get
+    a PasswordHashingBusyException (503) instead of piling up.
+
+    PASSWORD_HASH_METHOD is a werkzeug method including its cost, e.g.
+    "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Passwords hashed with
+    another method (or stored in plaintext) are rehashed on login.
+    """
+
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.workers = 4
+        self.queue_size = 64
+        self.timeout = 5.0
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._pid = None
+        self._dummy_hash = None
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.queue_size = app.config.get("PASSWORD_HASH_QUEUE", self.queue_size)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor, self._pid, self._dummy_hash = None, None, None
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hash ``passwords`` (e.g. for a bulk import), with at most
+        PASSWORD_HASH_WORKERS of them in the pool at a time so that logins
+        still get through.
+        """
+        hashes = []
+        for start in range(0, len(passwords), self.workers):
+            futures = [self._submit(generate_password_hash, password, self.method)
+                       for password in passwords[start:start + self.workers]]
+            hashes.extend(self._result(future) for future in futures)
+        return hashes
+
+    def verify(self, stored: str | None, password: str) -> tuple[bool, str | None]:
+        """
+        Check ``password`` against the ``stored`` password, in a single pool
+        job. Returns ``(valid, new_hash)``, where ``new_hash`` is set when the
+        password is valid but was stored with an outdated method (or in
+        plaintext) and should be replaced. Pass ``stored=None`` for unknown
+        users, so that they take as long to reject as wrong passwords.
+        """
+        return self._run(self._verify, stored, password)
+
+    def needs_rehash(self, stored: str) -> bool:
+        return not is_hashed(stored) or stored.split("$", 1)[0] != self._method_prefix()
+
+    def _verify(self, stored, password):
+        if stored is None:
+            check_password_hash(self._get_dummy_hash(), password)
+            return False, None
+        if is_hashed(stored):
+            valid = check_password_hash(stored, password)
+        else:
+            valid = hmac.compare_digest(stored.encode(), password.encode())
+        if valid and self.needs_rehash(stored):
+            return True, generate_password_hash(password, self.method)
+        return valid, None
+
+    def _get_dummy_hash(self) -> str:
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash(secrets.token_hex(16), self.method)
+        return self._dummy_hash
+
+    def _method_prefix(self) -> str:
+        # werkzeug fills in default costs ("scrypt" -> "scrypt:32768:8:1"), so
+        # compare against the prefix of an actual hash
+        return self._get_dummy_hash().split("$", 1)[0]
+
+    def _get_executor(self):
+        # Created per process, so that forked gunicorn workers get their own threads
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hasher"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        return self._result(self._submit(fn, *args))
+
+    def _submit(self, fn, *args) -> concurrent.futures.Future:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusyException()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future: concurrent.futures.Future):
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise PasswordHashingBusyException()
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,113 @@
+import uuid
+
+from sqlalchemy import insert, select, update
+
+from common.audit import audit_log
+from common.exceptions import PurchaseException
+from models import db, Item, User, Transaction
+
+
+def reserve_stock(item_id: str, quantity: int) -> int:
+    """
+    Atomically take ``quantity`` units of an item out of stock.
+    The stock check and the decrement are one guarded UPDATE, so concurrent
+    buyers can never drive the stock below zero. Returns the unit price.
+    """
+    price = db.session.execute(
+        update(Item)
+        .where(Item.id == item_id, Item.stock >= quantity)
+        .values(stock=Item.stock - quantity)
+        .returning(Item.price)
+    ).scalar_one_or_none()
+
+    if price is None:
+        # Slow path, only taken on failure: find out why the guard did not match
+        if db.session.execute(select(Item.id).where(Item.id == item_id)).first() is None:
+            raise PurchaseException("Item not found", http_response_code=404)
+        raise PurchaseException("Requested quantity exceeds available stock")
+    return price
+
+
+def debit_credit(user_id: str, amount) -> None:
+    """Atomically deduct ``amount`` from a user's credit, refusing to go negative."""
+    result = db.session.execute(
+        update(User)
+        .where(User.uid == user_id, User.credit >= amount)
+        .values(credit=User.credit - amount)
+    )
+    if result.rowcount == 0:
+        if db.session.execute(select(User.uid).where(User.uid == user_id)).first() is None:
+            raise PurchaseException("User not found", http_response_code=404)
+        raise PurchaseException("Insufficient credit")
+
+
+def debit_credit_for_item(user_id: str, item_id: str, quantity: int) -> None:
+    """
+    Deduct the price of ``quantity`` units of an item from a user's credit
+    without touching stock (used for preorders). The price is read by a
+    scalar subquery inside the same guarded UPDATE.
+    """
+    cost = select(Item.price).where(Item.id == item_id).scalar_subquery() * quantity
+    result = db.session.execute(
+        update(User)
+        .where(User.uid == user_id, User.credit >= cost)
+        .values(credit=User.credit - cost),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    if result.rowcount == 0:
+        if db.session.execute(select(Item.id).where(Item.id == item_id)).first() is None:
+            raise PurchaseException("Item not found", http_response_code=404)
+        if db.session.execute(select(User.uid).where(User.uid == user_id)).first() is None:
+            raise PurchaseException("User not found", http_response_code=404)
+        raise PurchaseException("Insufficient credit")
+
+
+def create_transaction(item_id: str, user_id: str, quantity: int, status: str) -> str:
+    transaction_id = uuid.uuid4().hex
+    db.session.add(Transaction(
+        id=transaction_id,
+        item=item_id,
+        uid=user_id,
+        quantity=quantity,
+        status=status,
+    ))
+    return transaction_id
+
+
+def checkout(user_id: str, lines: list[tuple[str, int]], actor_id: str) -> list[str]:
+    """
+    Buy several items in one database transaction. The caller commits on
+    success and rolls back on PurchaseException, so either every line is bought
+    or none is.
+
+    Item rows are updated in id order, so two overlapping carts always take
+    their row locks in the same order and cannot deadlock. Credit is debited
+    once for the whole cart, and Transaction rows are bulk inserted.
+    Returns the transaction ids, in the order of ``lines``.
+    """
+    quantities = {}
+    for item_id, quantity in lines:
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+
+    total_price = 0
+    for item_id in sorted(quantities):
+        total_price += reserve_stock(item_id, quantities[item_id]) * quantities[item_id]
+
+    debit_credit(user_id, total_price)
+
+    transactions = [
+        {"id": uuid.uuid4().hex, "item": item_id, "uid": user_id, "quantity": quantity, "status": "AWAITING_CONF"}
+        for item_id, quantity in lines
+    ]
+    db.session.execute(insert(Transaction), transactions)
+    for tx in transactions:
+        audit_log.record(
+            cat="TRANSACTION",
+            uid=actor_id,
+            description=f"Created transaction {tx['id']}. User {actor_id} bought {tx['quantity']} {tx['item']}",
+            action="buy",
+            entity_type="TRANSACTION",
+            entity_id=tx["id"],
+            sync=True,
+        )
+    return [tx["id"] for tx in transactions]
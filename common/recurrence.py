@@ -0,0 +1,98 @@
+import datetime
+import math
+import uuid
+
+from models import Task, UserTask
+
+# Upper bound on the occurrences computed for a single request
+MAX_OCCURRENCES = 366
+
+
+def as_utc(value: datetime.datetime):
+    """Treat naive datetimes (e.g. from SQLite) as UTC so they compare with aware ones."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _period(task: Task):
+    return datetime.timedelta(days=task.recurrence_interval)
+
+
+def _duration(task: Task):
+    if task.start_time is None or task.deadline is None:
+        return _period(task)
+    return as_utc(task.deadline) - as_utc(task.start_time)
+
+
+def is_recurring(task: Task) -> bool:
+    return bool(task.recurrence_interval) and task.start_time is not None
+
+
+def occurrence(task: Task, index: int) -> dict:
+    """The ``index``-th occurrence of a task (index 0 for one-off tasks)."""
+    if not is_recurring(task):
+        return {"task": task.id, "index": 0, "start_time": as_utc(task.start_time), "end_time": as_utc(task.deadline)}
+
+    start_time = as_utc(task.start_time) + index * _period(task)
+    return {"task": task.id, "index": index, "start_time": start_time, "end_time": start_time + _duration(task)}
+
+
+def task_occurrences(task: Task, window_start: datetime.datetime, window_end: datetime.datetime) -> list[dict]:
+    """
+    Occurrences of a task overlapping [window_start, window_end), computed from
+    start_time and recurrence_interval. Nothing is read from or written to the
+    usertasks table.
+    """
+    window_start, window_end = as_utc(window_start), as_utc(window_end)
+    if not is_recurring(task):
+        first = occurrence(task, 0)
+        if first["start_time"] is not None and first["start_time"] >= window_end:
+            return []
+        if first["end_time"] is not None and first["end_time"] <= window_start:
+            return []
+        return [first]
+
+    period, duration = _period(task), _duration(task)
+    elapsed = window_start - duration - as_utc(task.start_time)
+    index = max(0, math.floor(elapsed / period))
+
+    occurrences = []
+    while len(occurrences) < MAX_OCCURRENCES:
+        current = occurrence(task, index)
+        if current["start_time"] >= window_end:
+            break
+        if current["end_time"] > window_start:
+            occurrences.append(current)
+        index += 1
+    return occurrences
+
+
+def next_occurrence(task: Task, now: datetime.datetime = None):
+    """The first occurrence of a task that has not ended yet, or None."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if not is_recurring(task):
+        first = occurrence(task, 0)
+        if first["end_time"] is not None and first["end_time"] <= now:
+            return None
+        return first
+
+    window_end = max(now, as_utc(task.start_time)) + _period(task) + _duration(task)
+    upcoming = task_occurrences(task, now, window_end)
+    return upcoming[0] if upcoming else None
+
+
+def materialize_occurrence(task: Task, user_id: str, index: int, status: str) -> UserTask:
+    """
+    Build the UserTask row for one occurrence. Rows only exist for occurrences
+    whose state changed (applied, completed, reviewed, ...).
+    """
+    current = occurrence(task, index)
+    return UserTask(
+        id=uuid.uuid4().hex,
+        uid=user_id,
+        task=task.id,
+        status=status,
+        start_time=current["start_time"],
+        end_time=current["end_time"],
+    )
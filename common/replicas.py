@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from common.cache import LocalCacheBackend, create_cache_backend
+from models import db
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ("GET", "HEAD")
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything
+# it received, so that an idle primary does not look like lag
+POSTGRESQL_LAG_QUERY = sa.text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+def use_primary(f):
+    """Mark a read-only view that must still read from the primary."""
+    f.use_primary = True
+    return f
+
+
+class Replicas:
+    """
+    Routes read-only requests (GET and HEAD) to one of the read replicas in
+    SQLALCHEMY_REPLICA_URIS, and everything else to the primary. A request
+    still reads from the primary when:
+
+    - its view is marked with @use_primary;
+    - the same client (the JWT identity, or the address for anonymous
+      clients) made a write in the last REPLICA_READ_AFTER_WRITE_SECONDS,
+      so that it reads its own writes;
+    - no replica is within REPLICA_MAX_LAG_SECONDS of the primary. Lag is
+      checked at most every REPLICA_CHECK_INTERVAL seconds per worker, and
+      an unreachable replica counts as lagging.
+
+    Recent writers are remembered in a cache local to each worker; with
+    several workers, point REPLICA_CACHE_URL at a Redis instance.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.max_lag = 5.0
+        self.check_interval = 5.0
+        self.read_after_write = 10
+        self.recent_writers = LocalCacheBackend()
+
+        self._lock = threading.Lock()
+        self._healthy = []
+        self._checked_at = None
+
+    def init_app(self, app):
+        engine_options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        self.engines = [
+            sa.create_engine(uri, **engine_options) for uri in app.config.get("SQLALCHEMY_REPLICA_URIS", [])
+        ]
+        self.max_lag = app.config.get("REPLICA_MAX_LAG_SECONDS", 5.0)
+        self.check_interval = app.config.get("REPLICA_CHECK_INTERVAL", 5.0)
+        self.read_after_write = app.config.get("REPLICA_READ_AFTER_WRITE_SECONDS", 10)
+        self.recent_writers = create_cache_backend(
+            app.config.get("REPLICA_CACHE_URL"),
+            app.config.get("REPLICA_CACHE_MAX_SIZE", 10000),
+        )
+        self._healthy, self._checked_at = [], None
+
+        if self.engines:
+            app.before_request(self._route_request)
+            app.after_request(self._remember_writer)
+
+    def replication_lag(self, engine) -> float:
+        """Seconds ``engine`` is behind the primary. Raises if it cannot be reached."""
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                return float(conn.scalar(POSTGRESQL_LAG_QUERY) or 0)
+            # No replication status elsewhere (e.g. a SQLite stand-in in tests)
+            conn.execute(sa.text("SELECT 1"))
+            return 0.0
+
+    def healthy_replica(self):
+        """A replica within the lag limit, or None."""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                    self._healthy = [engine for engine in self.engines if self._within_lag(engine)]
+                    self._checked_at = now
+        return random.choice(self._healthy) if self._healthy else None
+
+    def _within_lag(self, engine) -> bool:
+        try:
+            lag = self.replication_lag(engine)
+        except Exception:
+            logger.warning("Replica %s is unreachable, reading from the primary", engine.url, exc_info=True)
+            return False
+        if lag > self.max_lag:
+            logger.warning("Replica %s is %.1fs behind, reading from the primary", engine.url, lag)
+            return False
+        return True
+
+    def _route_request(self):
+        if request.method not in READ_METHODS:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, "use_primary", False):
+            return
+        if self.recent_writers.get(self._client_key()):
+            return
+        replica = self.healthy_replica()
+        if replica is not None:
+            db.session.info["replica"] = replica
+
+    def _remember_writer(self, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            self.recent_writers.set(self._client_key(), True, self.read_after_write)
+        return response
+
+    @staticmethod
+    def _client_key() -> str:
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        return f"writer:user:{identity}" if identity else f"writer:addr:{request.remote_addr}"
+
+
+replicas = Replicas()
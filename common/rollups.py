@@ -0,0 +1,94 @@
+import datetime
+
+from sqlalchemy import case, delete, func, insert, select, update
+
+from common.utils import dialect_insert
+from models import db, Log, LogRollup
+
+# Action of logs written before actions were recorded, inferred from their description
+LEGACY_ACTIONS = (
+    ("% bought %", "buy"),
+    ("% preordered %", "preorder"),
+    ("% suspended %", "suspend"),
+    ("% deleted %", "delete"),
+    ("% made the following changes%", "update"),
+    ("% updated %", "update"),
+    ("% created %", "create"),
+    ("% added %", "create"),
+    ("% applied for %", "apply"),
+)
+
+
+def _day(timestamp) -> datetime.date:
+    """The UTC day of a log timestamp (naive timestamps, e.g. from SQLite, are UTC)."""
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.astimezone(datetime.timezone.utc).date() if timestamp.tzinfo else timestamp.date()
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def _utc_day(timestamp):
+    """``_day`` in SQL. date() of a timestamptz would use the session's TimeZone on PostgreSQL."""
+    if db.engine.dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", timestamp))
+    return func.date(timestamp)
+
+
+def update_rollups(rows: list[dict], session=None):
+    """
+    Add log rows (dicts with timestamp, cat, uid and action) to the rollup
+    counts, in the caller's transaction, with one upsert per batch.
+    """
+    session = session or db.session
+    counts = {}
+    for row in rows:
+        key = (_day(row.get("timestamp")), row["cat"], row.get("uid") or "", row.get("action") or "other")
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+
+    values = [
+        {"day": day, "cat": cat, "uid": uid, "action": action, "count": count}
+        for (day, cat, uid, action), count in counts.items()
+    ]
+    stmt = dialect_insert(LogRollup)
+    if stmt is not None:
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "cat", "uid", "action"],
+            set_={"count": LogRollup.count + stmt.excluded.count},
+        ), values)
+        return
+
+    for value in values:
+        result = session.execute(
+            update(LogRollup)
+            .where(LogRollup.day == value["day"], LogRollup.cat == value["cat"],
+                   LogRollup.uid == value["uid"], LogRollup.action == value["action"])
+            .values(count=LogRollup.count + value["count"])
+        )
+        if result.rowcount == 0:
+            session.execute(insert(LogRollup), [value])
+
+
+def backfill_rollups() -> int:
+    """
+    Rebuild every rollup from the logs table in one transaction. Run it once
+    when enabling rollups on an existing database, ideally while idle: logs
+    written concurrently may be counted twice or not at all.
+    """
+    legacy_action = case(
+        *[(Log.description.like(pattern), action) for pattern, action in LEGACY_ACTIONS],
+        else_="other",
+    )
+    action = func.coalesce(Log.action, legacy_action)
+    day = _utc_day(Log.timestamp)
+    uid = func.coalesce(Log.uid, "")
+    aggregated = (
+        select(day, Log.cat, uid, action, func.count())
+        .group_by(day, Log.cat, uid, action)
+    )
+    db.session.execute(delete(LogRollup))
+    db.session.execute(
+        insert(LogRollup).from_select(["day", "cat", "uid", "action", "count"], aggregated)
+    )
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(LogRollup))
@@ -0,0 +1,20 @@
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """
+    Session that runs reads on the replica engine chosen for the request
+    (``info["replica"]``, see common.replicas) and everything else on the
+    primary. The first write of a request (a flush or an INSERT, UPDATE or
+    DELETE statement) also moves its later reads to the primary, so a request
+    always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get("replica")
+        if replica is not None and bind is None:
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info.pop("replica")
+            else:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
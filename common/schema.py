@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import ScriptInfo
+
+from common.exceptions import SchemaVersionException
+from config import BASE_DIR
+from models import db, SchemaVersion
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "db", "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def available_migrations() -> list[tuple[int, str, str]]:
+    """``(version, name, path)`` of every migration script, in order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+def latest_version() -> int:
+    return available_migrations()[-1][0]
+
+
+def current_version(conn) -> int | None:
+    """The last migration applied to the database, or None if it has no schema_version table."""
+    if not sa.inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.scalar(sa.select(sa.func.max(SchemaVersion.version)))
+
+
+def check_schema_version():
+    """
+    Startup check: compare the database's schema version with the latest
+    migration, in a single query. Raises SchemaVersionException when the
+    database is behind (or was never migrated); a database ahead of the code,
+    as during a rolling deploy, is only logged.
+    """
+    latest = latest_version()
+    try:
+        with db.engine.connect() as conn:
+            version = conn.scalar(sa.select(sa.func.max(SchemaVersion.version)))
+    except sa.exc.DBAPIError:
+        version = None
+    if version is None:
+        raise SchemaVersionException(
+            "The database has no schema version. Run `flask db upgrade`, or `flask db stamp` "
+            "with the last migration applied by hand."
+        )
+    if version < latest:
+        raise SchemaVersionException(
+            f"The database is at schema version {version}, this code needs {latest}. Run `flask db upgrade`."
+        )
+    if version > latest:
+        logger.warning("The database is at schema version %s, ahead of this code (%s)", version, latest)
+
+
+def _check_schema_version_once(app):
+    if app.config.get("SCHEMA_VERSION_CHECK", True) and not app.extensions.get("schema_version_checked"):
+        with app.app_context():
+            check_schema_version()
+        app.extensions["schema_version_checked"] = True
+
+
+def _check_before_request():
+    _check_schema_version_once(current_app)
+
+
+def _check_before_command():
+    app = click.get_current_context().ensure_object(ScriptInfo).load_app()
+    try:
+        _check_schema_version_once(app)
+    except SchemaVersionException as e:
+        raise click.ClickException(str(e))
+
+
+def check_schema_version_on_use(app, exempt_groups=("db",)):
+    """
+    The startup check for an app loaded by the flask CLI, which imports it
+    before knowing the command: the schema version is checked before the first
+    request (`flask run`) and before the commands of every group but
+    ``exempt_groups`` (`flask db` has to run against an old schema).
+    """
+    app.before_request(_check_before_request)
+    for name, command in app.cli.commands.items():
+        if name not in exempt_groups and isinstance(command, click.Group):
+            command.callback = _check_before_command
+
+
+def upgrade(target: int = None) -> list[str]:
+    """
+    Apply the pending migrations up to ``target`` (default: the latest), each
+    in its own transaction with its schema_version row. Returns the names of
+    the applied migrations.
+
+    The scripts are PostgreSQL. Any other database (e.g. SQLite in local
+    development) gets its tables from the models and is stamped at the latest
+    version instead.
+    """
+    target = latest_version() if target is None else target
+    engine = db.engine
+
+    with engine.connect() as conn:
+        version = current_version(conn)
+        untracked = version is None and sa.inspect(conn).has_table("users")
+
+    if engine.dialect.name != "postgresql":
+        if version is not None and version >= target:
+            return []
+        db.create_all()
+        stamp(target)
+        return [f"create_all (stamped {target:04d})"]
+
+    if untracked:
+        raise SchemaVersionException(
+            "The database has tables but no schema version. Run `flask db stamp` "
+            "with the last migration applied by hand, then `flask db upgrade`."
+        )
+    with engine.begin() as conn:
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+
+    applied = []
+    for number, name, path in available_migrations():
+        if (version is not None and number <= version) or number > target:
+            continue
+        with open(path) as f:
+            script = f.read()
+        with engine.begin() as conn:
+            # Scripts contain literal % (e.g. format('%I', ...)): run them unparsed
+            conn.execution_options(no_parameters=True).exec_driver_sql(script)
+            conn.execute(sa.insert(SchemaVersion).values(version=number, name=name))
+        logger.info("Applied migration %04d_%s", number, name)
+        applied.append(f"{number:04d}_{name}")
+    return applied
+
+
+def stamp(version: int):
+    """Record that every migration up to ``version`` is applied, without running any."""
+    names = {number: name for number, name, _ in available_migrations()}
+    if version not in names:
+        raise SchemaVersionException(f"No migration {version:04d} in {MIGRATIONS_DIR}")
+    with db.engine.begin() as conn:
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+        known = set(conn.scalars(sa.select(SchemaVersion.version)))
+        rows = [{"version": number, "name": name} for number, name in names.items()
+                if number <= version and number not in known]
+        if rows:
+            conn.execute(sa.insert(SchemaVersion), rows)
+    logger.info("Stamped the database at schema version %s", version)
@@ -0,0 +1,68 @@
+"""
+JSON representations of the models, shared by the views and the async read
+tier. Each serializer is built once from its field list, and dates and
+decimals are left to the app's JSON provider (common/json_provider.py).
+"""
+from operator import attrgetter
+
+from sqlalchemy import select
+
+from common.images import thumbnail_url
+from models import Item, Task, Transaction, UserTask, ItemRequest, User
+
+
+class ModelSerializer:
+    """
+    Turns a ``model`` into a dict of its ``fields``, followed by ``computed``
+    fields (name -> function of the object; naming a field replaces it in
+    place). Computed fields may only read ``fields``.
+
+    Call it on an entity, or use ``select()`` and ``from_row`` to list rows
+    without the ORM: the statement fetches just these columns as plain rows,
+    which are zipped with the field names with no entity or identity map
+    bookkeeping in between.
+    """
+
+    def __init__(self, model, *fields, **computed):
+        self.fields = fields
+        self.columns = [getattr(model, field) for field in fields]
+        # attrgetter returns a tuple for two or more fields, a bare value for one
+        self._get = attrgetter(*fields) if len(fields) > 1 else attrgetter(*fields, *fields)
+        self._computed = tuple(computed.items())
+
+    def __call__(self, obj) -> dict:
+        return self._with_computed(dict(zip(self.fields, self._get(obj))), obj)
+
+    def select(self):
+        """A Core statement over ``fields``, for ``from_row``; filter and order it like a query."""
+        return select(*self.columns)
+
+    def from_row(self, row) -> dict:
+        return self._with_computed(dict(zip(self.fields, row)), row)
+
+    def _with_computed(self, data: dict, source) -> dict:
+        for name, compute in self._computed:
+            data[name] = compute(source)
+        return data
+
+
+item_to_dict = ModelSerializer(
+    Item, "id", "name", "stock", "price", "description", "image",
+    thumbnail=lambda item: thumbnail_url(item.image),
+)
+
+task_to_dict = ModelSerializer(
+    Task, "id", "name", "created_by", "reward", "start_time", "deadline",
+    "is_recurring", "recurrence_interval", "description",
+)
+
+transaction_to_dict = ModelSerializer(Transaction, "id", "item", "uid", "quantity", "status", "created_at")
+
+usertask_to_dict = ModelSerializer(UserTask, "id", "uid", "task", "start_time", "end_time", "status", "admin_comment")
+
+itemrequest_to_dict = ModelSerializer(ItemRequest, "id", "requested_by", "description")
+
+profile_user_to_dict = ModelSerializer(
+    User, "uid", "name", "email", "credit", "cat",
+    credit=lambda user: float(user.credit),
+)
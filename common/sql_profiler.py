@@ -0,0 +1,124 @@
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from common.exceptions import NPlusOneQueryException
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals and IN lists collapsed, so that lookups differing only by value compare equal."""
+    shape = _LITERALS.sub("?", statement)
+    shape = re.sub(r"%\(\w+\)s|%s|:\w+|\$\d+", "?", shape)
+    shape = _PLACEHOLDER_LISTS.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _caller() -> str:
+    # The innermost frame of application code that issued the statement
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if frame.filename.startswith(REPO_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, REPO_DIR)}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+class SQLProfiler:
+    """
+    Development and staging aid recording every SQL statement run by each
+    request. SQL_PROFILER selects what happens at the end of a request:
+
+    - "off": nothing is recorded (the default).
+    - "log": statements slower than SQL_SLOW_QUERY_MS, and statements of the
+      same shape run SQL_N_PLUS_ONE_THRESHOLD times or more (typically a
+      lookup in a loop), are logged with the route and the calling code.
+    - "raise": as "log", and repeated statements raise an
+      NPlusOneQueryException, failing the request (used by the tests).
+    """
+
+    def __init__(self):
+        self.mode = "off"
+        self.slow_query_seconds = 0.1
+        self.n_plus_one_threshold = 5
+
+    def init_app(self, app):
+        self.mode = app.config.get("SQL_PROFILER", "off")
+        if self.mode not in ("off", "log", "raise"):
+            raise ValueError(f"Invalid SQL_PROFILER mode: {self.mode}")
+        self.slow_query_seconds = app.config.get("SQL_SLOW_QUERY_MS", 100) / 1000
+        self.n_plus_one_threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+        if self.mode != "off":
+            app.before_request(self._start_request)
+            app.after_request(self._end_request)
+
+    def _start_request(self):
+        g.sql_profile = []
+
+    def _end_request(self, response):
+        statements = g.pop("sql_profile", None)
+        if not statements:
+            return response
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+
+        for statement, duration, caller in statements:
+            if duration >= self.slow_query_seconds:
+                logger.warning("Slow query (%.1f ms) in %s from %s: %s", duration * 1000, route, caller, statement)
+
+        if g.get("sql_profile_allow_repeated"):
+            return response
+
+        shapes = Counter(statement_shape(statement) for statement, _, _ in statements)
+        repeated = {shape: count for shape, count in shapes.items() if count >= self.n_plus_one_threshold}
+        if repeated:
+            callers = {}
+            for statement, _, caller in statements:
+                callers.setdefault(statement_shape(statement), caller)
+            report = "\n".join(
+                f"  {count} x {shape}\n    from {callers[shape]}" for shape, count in repeated.items()
+            )
+            message = f"Repeated queries in {route} ({len(statements)} statements in total):\n{report}"
+            if self.mode == "raise":
+                raise NPlusOneQueryException(message)
+            logger.warning(message)
+        return response
+
+
+sql_profiler = SQLProfiler()
+
+
+def allow_repeated_queries(f):
+    """Mark a view whose repeated statements are deliberate, so that they are not reported."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.sql_profile_allow_repeated = True
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if sql_profiler.mode != "off" and context is not None and has_request_context() and "sql_profile" in g:
+        context.profiler_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "profiler_start", None)
+    if start is None or not has_request_context() or "sql_profile" not in g:
+        return
+    g.sql_profile.append((statement, time.perf_counter() - start, _caller()))
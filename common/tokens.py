@@ -0,0 +1,70 @@
+import time
+
+from common.cache import create_cache_backend, local_cache_is_safe, LocalCacheBackend
+
+
+def token_claims(user) -> dict:
+    """
+    Claims embedded in every token, so authorization checks need no user
+    lookup. ``issued_at`` is the sub-second issue time compared with
+    revocations (``iat`` only has a resolution of one second).
+    """
+    return {"cat": user.cat, "active": user.is_active, "issued_at": time.time()}
+
+
+class TokenUser:
+    """
+    The ``current_user`` of requests authenticated with an access token,
+    built from its claims instead of loaded from the database.
+    """
+
+    def __init__(self, uid: str, cat: str, is_active: bool):
+        self.uid = uid
+        self.cat = cat
+        self.is_active = is_active
+
+    @classmethod
+    def from_claims(cls, jwt_data: dict):
+        return cls(jwt_data["sub"], jwt_data["cat"], jwt_data["active"])
+
+    def __repr__(self):
+        return f"<TokenUser {self.uid} cat={self.cat}>"
+
+
+class RevocationList:
+    """
+    Users whose tokens were issued before a change to their claims (e.g. a
+    suspension or demotion). Tokens of a user issued up to the time of the
+    revocation are rejected; entries only need to outlive the access tokens,
+    since refreshing re-reads the user from the database.
+
+    The default store is local to each worker; with several workers, point
+    REVOCATION_CACHE_URL at a Redis instance so revocations reach every worker.
+    Without one, ``sees_all_revocations`` is False and token claims must not
+    be trusted on their own.
+    """
+
+    def __init__(self):
+        self.backend = LocalCacheBackend()
+        self.ttl = 15 * 60
+        self.sees_all_revocations = True
+
+    def init_app(self, app):
+        url = app.config.get("REVOCATION_CACHE_URL")
+        self.ttl = int(app.config["JWT_ACCESS_TOKEN_EXPIRES"].total_seconds())
+        self.backend = create_cache_backend(url, app.config.get("REVOCATION_CACHE_MAX_SIZE", 10000))
+        self.sees_all_revocations = bool(url) or local_cache_is_safe(app)
+
+    def revoke(self, uid: str):
+        self.backend.set(f"revoked:{uid}", time.time(), self.ttl)
+
+    def is_revoked(self, jwt_data: dict) -> bool:
+        revoked_at = self.backend.get(f"revoked:{jwt_data['sub']}")
+        if revoked_at is None:
+            return False
+        # Tokens issued before issued_at existed only have iat, rounded down
+        # to the second: those of the second of the revocation are rejected
+        return jwt_data.get("issued_at", jwt_data["iat"]) < revoked_at
+
+
+revoked_tokens = RevocationList()
@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from common.cache import LocalCacheBackend, create_cache_backend, local_cache_is_safe
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+# Only what authentication and authorization need. Credit and password are
+# left unloaded and fetched lazily if a handler actually reads them.
+CACHED_COLUMNS = ("uid", "name", "cat", "email", "is_active")
+
+
+class UserCache:
+    """
+    Caches the users looked up for JWT protected routes, so most requests skip
+    the user SELECT. Entries expire after USER_CACHE_TTL seconds and must be
+    invalidated explicitly whenever a cached column changes. With several
+    workers, caching needs a shared backend (USER_CACHE_URL) and is off without.
+    """
+
+    def __init__(self):
+        self.backend = LocalCacheBackend()
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        url = app.config.get("USER_CACHE_URL")
+        self.ttl = app.config.get("USER_CACHE_TTL", 30)
+        self.backend = create_cache_backend(url, app.config.get("USER_CACHE_MAX_SIZE", 1024))
+        if not url and self.ttl and not local_cache_is_safe(app):
+            # Invalidations would only reach this worker: the others would keep
+            # serving e.g. a suspended user as active until the entry expires
+            logger.warning("USER_CACHE_URL is not set and several workers are running: user cache disabled")
+            self.ttl = 0
+
+    def load(self, uid: str):
+        snapshot = self.backend.get(f"user:{uid}") if self.ttl else None
+        if snapshot is not None:
+            self._count(hit=True)
+            # Attach a persistent User to the session without querying the database
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        self._count(hit=False)
+        user = db.session.get(User, uid)
+        if user is not None and self.ttl:
+            self.backend.set(f"user:{uid}", {column: getattr(user, column) for column in CACHED_COLUMNS}, self.ttl)
+        return user
+
+    def invalidate(self, uid: str):
+        self.backend.delete(f"user:{uid}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+user_cache = UserCache()
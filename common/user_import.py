@@ -0,0 +1,132 @@
+import csv
+import decimal
+import io
+import json
+import uuid
+
+from sqlalchemy import insert, select
+
+from common.audit import audit_log
+from common.passwords import password_hasher
+from common.utils import dialect_insert
+from models import db, User
+
+USER_CATEGORIES = ("USER", "ADMIN")
+
+
+def parse_users(data: str, fmt: str) -> list[dict]:
+    """
+    Rows of a user import: ``fmt`` is "csv" (a header row naming the columns
+    name, email, password and optionally cat and credit) or "json" (a list
+    of user objects, or ``{"users": [...]}``). Raises ValueError if the data
+    cannot be read at all.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or "email" not in reader.fieldnames:
+            raise ValueError("CSV needs a header row with at least name, email and password")
+        return [{k.strip(): v for k, v in row.items() if k} for row in reader]
+    if fmt == "json":
+        try:
+            users = json.loads(data)
+        except ValueError:
+            raise ValueError("Invalid JSON")
+        if isinstance(users, dict):
+            users = users.get("users")
+        if not isinstance(users, list) or not all(isinstance(u, dict) for u in users):
+            raise ValueError('JSON must be a list of users, or {"users": [...]}')
+        return users
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _validate(row: dict) -> dict:
+    """The User columns of an import row. Raises ValueError with the reason the row is rejected."""
+    values = {field: str(row.get(field) or "").strip() for field in ("name", "email", "password")}
+    for field, value in values.items():
+        if not value:
+            raise ValueError(f"{field} required")
+    if "@" not in values["email"]:
+        raise ValueError("invalid email")
+
+    cat = str(row.get("cat") or "USER").strip().upper()
+    if cat not in USER_CATEGORIES:
+        raise ValueError(f"cat must be one of {', '.join(USER_CATEGORIES)}")
+    try:
+        credit = decimal.Decimal(str(row.get("credit") or 0).strip())
+    except decimal.InvalidOperation:
+        raise ValueError("credit must be a number")
+    if not credit.is_finite() or credit < 0:
+        raise ValueError("credit must be a non-negative number")
+
+    return {**values, "cat": cat, "credit": credit}
+
+
+def import_users(rows: list[dict], by_uid: str = None) -> tuple[list[dict], list[dict]]:
+    """
+    Create the users of ``rows`` in one transaction. Rows that are invalid,
+    or whose email is taken (by an existing user or an earlier row), are
+    reported and skipped; the others are still imported. Existing emails are
+    found with one query, passwords hashed in the password pool and the users
+    inserted with one multi-row INSERT, followed by a single audit entry.
+
+    Returns ``(imported, errors)``: ``{"row", "uid", "email"}`` per created
+    user and ``{"row", "email", "message"}`` per skipped row, with ``row``
+    counting from 1. May raise PasswordHashingBusyException, before anything
+    is written.
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append((number, _validate(row)))
+        except ValueError as e:
+            errors.append({"row": number, "email": row.get("email"), "message": str(e)})
+
+    emails = {user["email"] for _, user in valid}
+    taken = set(db.session.scalars(select(User.email).where(User.email.in_(emails)))) if emails else set()
+    candidates = []
+    for number, user in valid:
+        if user["email"] in taken:
+            errors.append({"row": number, "email": user["email"], "message": "User already exists"})
+        else:
+            taken.add(user["email"])
+            candidates.append((number, user))
+
+    hashes = password_hasher.hash_many([user["password"] for _, user in candidates])
+    user_rows = [
+        {**user, "uid": uuid.uuid4().hex, "password": password_hash, "is_active": True}
+        for (_, user), password_hash in zip(candidates, hashes)
+    ]
+
+    inserted = set()
+    if user_rows:
+        stmt = dialect_insert(User)
+        if stmt is None:
+            db.session.execute(insert(User), user_rows)
+            inserted = {row["uid"] for row in user_rows}
+        else:
+            # An email taken since the lookup above is skipped, not a failed batch
+            inserted = set(db.session.scalars(
+                stmt.on_conflict_do_nothing(index_elements=["email"]).returning(User.uid),
+                user_rows,
+            ))
+
+    imported = []
+    for (number, user), row in zip(candidates, user_rows):
+        if row["uid"] in inserted:
+            imported.append({"row": number, "uid": row["uid"], "email": user["email"]})
+        else:
+            errors.append({"row": number, "email": user["email"], "message": "User already exists"})
+    errors.sort(key=lambda error: error["row"])
+
+    if imported:
+        actor = f"User {by_uid}" if by_uid else "A bulk import"
+        audit_log.record(
+            cat="USER",
+            uid=by_uid,
+            description=f"{actor} imported {len(imported)} users ({len(errors)} rows skipped)",
+            action="import",
+            entity_type="USER",
+            diff={"users": {"before": None, "after": [user["uid"] for user in imported]}},
+        )
+    db.session.commit()
+    return imported, errors
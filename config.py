@@ -10,10 +10,118 @@ class BaseConfig:
     database_url = os.getenv('DB_URI')
     SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI", database_url)
     SQLALCHEMY_TRACK_MODIFICATIONS = os.environ.get("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    # Check at startup that `flask db upgrade` brought the database up to the
+    # latest migration in db/migrations/
+    SCHEMA_VERSION_CHECK = os.environ.get("SCHEMA_VERSION_CHECK", "true").lower() == "true"
+
+    # Optional read replicas (comma separated URIs). GET requests read from a
+    # replica within REPLICA_MAX_LAG_SECONDS of the primary, unless the client
+    # wrote in the last REPLICA_READ_AFTER_WRITE_SECONDS. Set REPLICA_CACHE_URL
+    # to a Redis URL so recent writers are known to every worker.
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get("SQLALCHEMY_REPLICA_URIS", "").split(",") if uri]
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", 5))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL", 5))
+    REPLICA_READ_AFTER_WRITE_SECONDS = int(os.environ.get("REPLICA_READ_AFTER_WRITE_SECONDS", 10))
+    REPLICA_CACHE_URL = os.environ.get("REPLICA_CACHE_URL")
+    REPLICA_CACHE_MAX_SIZE = int(os.environ.get("REPLICA_CACHE_MAX_SIZE", 10000))
+
+    # ASGI serving (uvicorn asgi:app): Flask requests run in a pool of
+    # ASGI_THREADS threads, so keep the SQLAlchemy pool at least as large.
+    # With ASYNC_DATABASE_URI (e.g. postgresql+asyncpg://... on the primary,
+    # since these reads skip the replica routing above) the tasks list and
+    # user profiles are served on the event loop instead.
+    ASGI_THREADS = int(os.environ.get("ASGI_THREADS", 32))
+    ASYNC_DATABASE_URI = os.environ.get("ASYNC_DATABASE_URI")
+    ASYNC_DATABASE_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("ASYNC_DATABASE_POOL_SIZE", 10)),
+        "pool_pre_ping": True,
+    }
 
     # For session security, etc. — set your own secret key
     SECRET_KEY = os.environ.get("SECRET_KEY", "")
 
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "H4G_oh_so_safe")
     JWT_ALGORITHM = "HS256"
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
+    # Access tokens carry the user's role and active state, so they are short
+    # lived; clients renew them with the refresh token from /login/refresh
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get("JWT_ACCESS_TOKEN_MINUTES", 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.environ.get("JWT_REFRESH_TOKEN_DAYS", 30)))
+
+    # Users whose tokens were revoked (suspended, deleted, role changed). With
+    # several workers and no REVOCATION_CACHE_URL (a Redis URL), revocations
+    # only reach one worker, so every request reads the user instead of
+    # trusting its token's claims.
+    REVOCATION_CACHE_URL = os.environ.get("REVOCATION_CACHE_URL")
+    REVOCATION_CACHE_MAX_SIZE = int(os.environ.get("REVOCATION_CACHE_MAX_SIZE", 10000))
+
+    # Pagination for the /.../all list endpoints
+    PAGE_DEFAULT_LIMIT = int(os.environ.get("PAGE_DEFAULT_LIMIT", 100))
+    PAGE_MAX_LIMIT = int(os.environ.get("PAGE_MAX_LIMIT", 500))
+
+    # Worker processes serving the app (uvicorn and gunicorn both read
+    # WEB_CONCURRENCY, and gunicorn.conf.py exports gunicorn's -w as it).
+    # Caches that must see every change are only kept local to a worker when
+    # there is just one.
+    WORKERS = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+    # Cache of users looked up for JWT protected routes. The default cache is
+    # local to the worker, so with several workers it is disabled unless
+    # USER_CACHE_URL points at a Redis instance that every worker invalidates.
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))
+    USER_CACHE_MAX_SIZE = int(os.environ.get("USER_CACHE_MAX_SIZE", 1024))
+    USER_CACHE_URL = os.environ.get("USER_CACHE_URL")
+
+    # Cache of serialized /items responses, keyed by a catalog version that
+    # every worker reads from the catalog_version table, or from Redis when
+    # CATALOG_CACHE_URL is set. Cached bodies expire after CATALOG_CACHE_TTL.
+    # Without CATALOG_CACHE_URL every poll still queries that version.
+    CATALOG_CACHE_MAX_SIZE = int(os.environ.get("CATALOG_CACHE_MAX_SIZE", 256))
+    CATALOG_CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", 60))
+    CATALOG_CACHE_URL = os.environ.get("CATALOG_CACHE_URL")
+
+    # Content addressed store for uploaded item images
+    IMAGE_STORE_DIR = os.environ.get("IMAGE_STORE_DIR", os.path.join(BASE_DIR, "media", "images"))
+    IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", 5 * 1024 * 1024))
+    IMAGE_THUMBNAIL_SIZE = int(os.environ.get("IMAGE_THUMBNAIL_SIZE", 256))
+    # Larger images are refused before Pillow decodes them (decompression bombs)
+    IMAGE_MAX_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", 40_000_000))
+
+    # Bounds on the tasks and transactions returned by GET /users/<uid>
+    PROFILE_TASK_LIMIT = int(os.environ.get("PROFILE_TASK_LIMIT", 50))
+    PROFILE_TRANSACTION_LIMIT = int(os.environ.get("PROFILE_TRANSACTION_LIMIT", 20))
+
+    # Audit log writer: "async" batches records in a background thread, "sync"
+    # writes them in the request transaction
+    AUDIT_LOG_MODE = os.environ.get("AUDIT_LOG_MODE", "async")
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))
+    AUDIT_SPOOL_DIR = os.environ.get("AUDIT_SPOOL_DIR", os.path.join(BASE_DIR, "var", "audit"))
+    AUDIT_SPOOL_FSYNC = os.environ.get("AUDIT_SPOOL_FSYNC", "false").lower() == "true"
+
+    # Monthly partitions of the logs table, and archival of old ones
+    LOG_PARTITION_MONTHS_AHEAD = int(os.environ.get("LOG_PARTITION_MONTHS_AHEAD", 3))
+    LOG_RETENTION_MONTHS = int(os.environ.get("LOG_RETENTION_MONTHS", 12))
+    LOG_ARCHIVE_DIR = os.environ.get("LOG_ARCHIVE_DIR", os.path.join(BASE_DIR, "var", "log_archive"))
+
+    # Password hashing. PASSWORD_HASH_METHOD sets the algorithm and its cost
+    # (e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"); hashes run in a pool
+    # of PASSWORD_HASH_WORKERS threads per worker process, with at most
+    # PASSWORD_HASH_QUEUE pending before logins are answered with 503.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 64))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 5.0))
+
+    # Largest batch accepted by POST /users/import (`flask users import` has no limit)
+    USER_IMPORT_MAX_ROWS = int(os.environ.get("USER_IMPORT_MAX_ROWS", 1000))
+
+    # Prometheus metrics on /metrics (needs prometheus_client). Under gunicorn,
+    # also set PROMETHEUS_MULTIPROC_DIR, see gunicorn.conf.py.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+    # Development aid recording the SQL statements of each request: "log"
+    # reports slow statements and repeated (N+1) ones, "raise" also fails
+    # requests with repeated statements. Keep it "off" in production.
+    SQL_PROFILER = os.environ.get("SQL_PROFILER", "off")
+    SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", 100))
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", 5))
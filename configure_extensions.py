@@ -1,13 +1,29 @@
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 
+from common.audit import audit_log
+from common.catalog_cache import catalog_cache
 from common.exceptions import AuthenticationException
+from common.metrics import metrics
+from common.passwords import password_hasher
+from common.replicas import replicas
+from common.sql_profiler import sql_profiler
+from common.tokens import TokenUser, revoked_tokens, token_claims
+from common.user_cache import user_cache
 from models import db, User
 
 
 def configure_extensions(app):
     db.init_app(app)
+    replicas.init_app(app)
     CORS(app)
+    user_cache.init_app(app)
+    catalog_cache.init_app(app)
+    audit_log.init_app(app)
+    password_hasher.init_app(app)
+    revoked_tokens.init_app(app)
+    metrics.init_app(app)
+    sql_profiler.init_app(app)
 
     # JWT Initialization
     jwt = JWTManager(app)
@@ -18,15 +34,32 @@ def configure_extensions(app):
         # identity when creating JWTs and converts it to a JSON serializable format.
         return identity.uid
 
+    @jwt.additional_claims_loader
+    def add_claims_to_access_token(identity: User):
+        # Role and active state travel in the token, so protected routes can
+        # authorize without loading the user
+        return token_claims(identity)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_data):
+        return revoked_tokens.is_revoked(jwt_data)
+
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         # Register a callback function that loads a user from your database whenever
         # a protected route is accessed. This should return any python object on a
         # successful lookup, or None if the lookup failed for any reason (for example
         # if the user has been deleted from the database).
+        # Tokens carrying claims need no lookup at all, as long as every
+        # revocation reaches this worker. Otherwise, and for tokens issued
+        # before claims existed, the user is loaded through user_cache, which
+        # users.py invalidates on changes.
+        if "cat" in jwt_data and "active" in jwt_data and revoked_tokens.sees_all_revocations:
+            return TokenUser.from_claims(jwt_data)
+
         user_id = jwt_data["sub"]
 
-        user = User.query.filter_by(uid=user_id).first()
+        user = user_cache.load(user_id)
         if user is None:
             raise AuthenticationException("User ID provided is not valid.")
 
@@ -49,7 +49,8 @@ CREATE TABLE transactions (
     item     VARCHAR(36) NOT NULL REFERENCES items(id) ON DELETE CASCADE,
     uid     VARCHAR(36) NOT NULL REFERENCES users(uid) ON DELETE CASCADE,
     quantity INT NOT NULL,
-    status   VARCHAR(50) NOT NULL  -- e.g. 'PREORDER', 'AWAITING_CONF', 'CONFIRMED', 'CLAIMED', 'CANCELED'
+    status   VARCHAR(50) NOT NULL,  -- e.g. 'PREORDER', 'AWAITING_CONF', 'CONFIRMED', 'CLAIMED', 'CANCELED'
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 6) ITEMREQUEST
@@ -59,11 +60,70 @@ CREATE TABLE itemrequests (
     description   TEXT NOT NULL
 );
 
--- 7) LOGS
+-- 7) LOGS (partitioned by month, see migrations/0003_partition_logs.sql)
 CREATE TABLE logs (
-    id          VARCHAR(36) PRIMARY KEY,
+    id          VARCHAR(36) NOT NULL,
     cat         VARCHAR(50) NOT NULL,   -- e.g. 'USER', 'TRANSACTION', ...
     uid         VARCHAR(36),  -- quoting "user" if we keep that as column name
-    timestamp   TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    description TEXT
+    timestamp   TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    description TEXT,
+    entity_type VARCHAR(50),            -- e.g. 'ITEM', 'USER', ...
+    entity_id   VARCHAR(36),
+    action      VARCHAR(50),            -- e.g. 'create', 'update', 'buy', ...
+    diff        JSONB,                  -- {field: {"before": ..., "after": ...}}
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE logs_default PARTITION OF logs DEFAULT;
+
+-- This month and the next three; `flask logs partitions` creates later ones
+DO $$
+DECLARE
+    month DATE := date_trunc('month', now());
+BEGIN
+    WHILE month <= date_trunc('month', now()) + INTERVAL '3 months' LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF logs FOR VALUES FROM (%L) TO (%L)',
+            'logs_p' || to_char(month, 'YYYYMM'), month, month + INTERVAL '1 month'
+        );
+        month := month + INTERVAL '1 month';
+    END LOOP;
+END $$;
+
+-- 8) INDEXES (see migrations/)
+CREATE INDEX ix_tasks_created_by ON tasks (created_by);
+CREATE UNIQUE INDEX uq_usertasks_occurrence ON usertasks (uid, task, start_time);
+CREATE UNIQUE INDEX uq_usertasks_unscheduled ON usertasks (uid, task) WHERE start_time IS NULL;
+CREATE INDEX ix_usertasks_task ON usertasks (task);
+CREATE INDEX ix_transactions_uid_created_at ON transactions (uid, created_at);
+CREATE INDEX ix_transactions_item ON transactions (item);
+CREATE INDEX ix_itemrequests_requested_by ON itemrequests (requested_by);
+CREATE INDEX ix_logs_uid ON logs (uid);
+CREATE INDEX ix_logs_cat_timestamp ON logs (cat, timestamp);
+CREATE INDEX ix_logs_timestamp_id ON logs (timestamp, id);
+CREATE INDEX ix_logs_entity ON logs (entity_type, entity_id, timestamp);
+
+-- 9) LOG ROLLUPS (see migrations/0004_log_rollups.sql)
+CREATE TABLE log_rollups (
+    day     DATE NOT NULL,
+    cat     VARCHAR(50) NOT NULL,
+    uid     VARCHAR(36) NOT NULL DEFAULT '',
+    action  VARCHAR(50) NOT NULL,
+    count   INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, cat, uid, action)
+);
+
+-- 10) CATALOG VERSION (see migrations/0006_catalog_version.sql)
+CREATE TABLE catalog_version (
+    id          INT PRIMARY KEY CHECK (id = 1),
+    version     BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO catalog_version (id, version) VALUES (1, 0);
+
+-- 11) SCHEMA VERSION (migrations applied by `flask db upgrade`; after creating
+-- the schema from this file, run `flask db stamp` with the latest migration)
+CREATE TABLE schema_version (
+    version     INT PRIMARY KEY,
+    name        VARCHAR(255) NOT NULL,
+    applied_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -0,0 +1,14 @@
+-- Indexes for foreign key and time range lookups
+CREATE INDEX IF NOT EXISTS ix_tasks_created_by ON tasks (created_by);
+
+CREATE INDEX IF NOT EXISTS ix_usertasks_uid_task_start_time ON usertasks (uid, task, start_time);
+CREATE INDEX IF NOT EXISTS ix_usertasks_task ON usertasks (task);
+
+CREATE INDEX IF NOT EXISTS ix_transactions_uid ON transactions (uid);
+CREATE INDEX IF NOT EXISTS ix_transactions_item ON transactions (item);
+
+CREATE INDEX IF NOT EXISTS ix_itemrequests_requested_by ON itemrequests (requested_by);
+
+CREATE INDEX IF NOT EXISTS ix_logs_uid ON logs (uid);
+CREATE INDEX IF NOT EXISTS ix_logs_cat_timestamp ON logs (cat, timestamp);
+CREATE INDEX IF NOT EXISTS ix_logs_timestamp_id ON logs (timestamp, id);
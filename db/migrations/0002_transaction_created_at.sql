@@ -0,0 +1,5 @@
+-- Creation time of transactions, so a user's recent transactions can be listed
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_transactions_uid_created_at ON transactions (uid, created_at);
+DROP INDEX IF EXISTS ix_transactions_uid;
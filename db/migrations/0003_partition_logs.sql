@@ -0,0 +1,42 @@
+-- Partition logs by month of timestamp. Rows outside every monthly partition
+-- land in logs_default. Run `flask logs partitions` monthly (e.g. from cron)
+-- to create upcoming partitions and `flask logs archive` to archive old ones.
+ALTER TABLE logs RENAME TO logs_unpartitioned;
+ALTER INDEX IF EXISTS logs_pkey RENAME TO logs_unpartitioned_pkey;
+DROP INDEX IF EXISTS ix_logs_uid;
+DROP INDEX IF EXISTS ix_logs_cat_timestamp;
+DROP INDEX IF EXISTS ix_logs_timestamp_id;
+
+CREATE TABLE logs (
+    id          VARCHAR(36) NOT NULL,
+    cat         VARCHAR(50) NOT NULL,
+    uid         VARCHAR(36),
+    timestamp   TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    description TEXT,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE logs_default PARTITION OF logs DEFAULT;
+
+-- One partition per month, from the oldest existing log to three months ahead
+DO $$
+DECLARE
+    month DATE := date_trunc('month', COALESCE((SELECT min(timestamp) FROM logs_unpartitioned), now()));
+BEGIN
+    WHILE month <= date_trunc('month', now()) + INTERVAL '3 months' LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF logs FOR VALUES FROM (%L) TO (%L)',
+            'logs_p' || to_char(month, 'YYYYMM'), month, month + INTERVAL '1 month'
+        );
+        month := month + INTERVAL '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO logs (id, cat, uid, timestamp, description)
+SELECT id, cat, uid, COALESCE(timestamp, CURRENT_TIMESTAMP), description FROM logs_unpartitioned;
+
+DROP TABLE logs_unpartitioned;
+
+CREATE INDEX ix_logs_uid ON logs (uid);
+CREATE INDEX ix_logs_cat_timestamp ON logs (cat, timestamp);
+CREATE INDEX ix_logs_timestamp_id ON logs (timestamp, id);
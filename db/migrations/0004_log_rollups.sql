@@ -0,0 +1,10 @@
+-- Log counts per (day, cat, uid, action), maintained as logs are written.
+-- Populate it from existing logs with `flask reports backfill`.
+CREATE TABLE IF NOT EXISTS log_rollups (
+    day     DATE NOT NULL,
+    cat     VARCHAR(50) NOT NULL,
+    uid     VARCHAR(36) NOT NULL DEFAULT '',
+    action  VARCHAR(50) NOT NULL,
+    count   INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, cat, uid, action)
+);
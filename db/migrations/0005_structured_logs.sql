@@ -0,0 +1,10 @@
+-- Structured audit entries: what kind of entity a log is about, which one,
+-- the action taken and the changed fields. Logs written before this
+-- migration keep NULL in these columns.
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS entity_type VARCHAR(50);
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS entity_id VARCHAR(36);
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS action VARCHAR(50);
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS diff JSONB;
+
+-- History of one entity, newest first (/logs/entity/<type>/<id>)
+CREATE INDEX IF NOT EXISTS ix_logs_entity ON logs (entity_type, entity_id, timestamp);
@@ -0,0 +1,8 @@
+-- Version of the item catalog, shared by every worker: responses cached by
+-- common/catalog_cache.py are keyed (and ETagged) by it, and every change to
+-- items bumps it. One row.
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id          INT PRIMARY KEY CHECK (id = 1),
+    version     BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,18 @@
+-- One application per user and task occurrence. /tasks/apply checked for an
+-- existing row before inserting, so concurrent applications could both get
+-- in: duplicates are removed first, keeping the row furthest along (not
+-- APPLIED), then the first by id.
+DELETE FROM usertasks u
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY uid, task, start_time
+        ORDER BY (status = 'APPLIED'), id
+    ) AS n
+    FROM usertasks
+    WHERE start_time IS NOT NULL
+) duplicates
+WHERE u.id = duplicates.id AND duplicates.n > 1;
+
+-- Also serves the lookups of ix_usertasks_uid_task_start_time, which it replaces
+CREATE UNIQUE INDEX IF NOT EXISTS uq_usertasks_occurrence ON usertasks (uid, task, start_time);
+DROP INDEX IF EXISTS ix_usertasks_uid_task_start_time;
@@ -0,0 +1,15 @@
+-- NULLs are distinct in uq_usertasks_occurrence, so one-off tasks without a
+-- start_time could be applied for any number of times. Duplicates are
+-- removed as in 0007, then a partial unique index covers those rows.
+DELETE FROM usertasks u
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY uid, task
+        ORDER BY (status = 'APPLIED'), id
+    ) AS n
+    FROM usertasks
+    WHERE start_time IS NULL
+) duplicates
+WHERE u.id = duplicates.id AND duplicates.n > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_usertasks_unscheduled ON usertasks (uid, task) WHERE start_time IS NULL;
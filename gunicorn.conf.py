@@ -0,0 +1,46 @@
+# gunicorn.conf.py
+# Loaded automatically by `gunicorn main:app` when run from this directory.
+import glob
+import os
+import sys
+
+# Metrics of every worker are written to PROMETHEUS_MULTIPROC_DIR and
+# aggregated by /metrics. It must be set before the app is imported.
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/h4g-metrics")
+
+# The app reads the number of workers from WEB_CONCURRENCY (config.WORKERS) to
+# decide whether caches local to a worker are safe. on_starting exports the
+# count gunicorn actually runs, e.g. when set with -w.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+
+def export_worker_count(server):
+    """
+    Set WEB_CONCURRENCY to the number of workers before they import the app,
+    and refuse to start when the app may already have read a different one
+    (WEB_CONCURRENCY set to another value, or an app preloaded in the master).
+    """
+    count = str(server.cfg.workers)
+    configured = os.environ.get("WEB_CONCURRENCY")
+    if configured is None and not server.cfg.preload_app:
+        os.environ["WEB_CONCURRENCY"] = count
+    elif (configured or "1") != count:
+        server.log.error("Running %s workers but WEB_CONCURRENCY is %s: set WEB_CONCURRENCY=%s instead of -w",
+                         count, configured or "unset", count)
+        sys.exit(1)
+
+
+def on_starting(server):
+    export_worker_count(server)
+    # Samples left by a previous run would be counted again
+    os.makedirs(multiproc_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,103 @@
+# images.py
+import base64
+import os
+
+import click
+from flask import Blueprint, request, jsonify, send_file
+from sqlalchemy import select, update
+
+from models import db, Item
+from permissions.utils import user_logged_in
+from common.catalog_cache import catalog_cache
+from common.images import (
+    decode_inline_image, extract_inline_image, image_path, image_url, is_inline_image,
+    sniff_mimetype, store_image, thumbnail_url,
+)
+
+images_bp = Blueprint('images', __name__)
+
+# Images are content addressed, so a given URL never changes
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@images_bp.route("/images/upload", methods=["POST"])
+@user_logged_in(is_admin=True)
+def upload_image():
+    """
+    /images/upload - POST
+    Request: multipart form with a "file" field, or { "image": str (base64 or data URI) }
+    Response: { "success": bool, "id": str, "url": str, "thumbnail_url": str }
+    """
+    try:
+        if "file" in request.files:
+            data = request.files["file"].read()
+        else:
+            image = (request.get_json(silent=True) or {}).get("image")
+            if not image:
+                return jsonify({"success": False, "message": "No image provided"}), 400
+            data = decode_inline_image(image)
+        image_hash = store_image(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    url = image_url(image_hash)
+    return jsonify({"success": True, "id": image_hash, "url": url, "thumbnail_url": thumbnail_url(url)}), 201
+
+
+def _send_image(image_hash: str, thumbnail: bool):
+    try:
+        path = image_path(image_hash, thumbnail=thumbnail)
+    except ValueError:
+        return jsonify({"success": False, "message": "Image not found"}), 404
+
+    if thumbnail and not os.path.exists(path):
+        # No thumbnail was generated (Pillow is not installed): serve the original
+        path = image_path(image_hash)
+    if not os.path.exists(path):
+        return jsonify({"success": False, "message": "Image not found"}), 404
+
+    with open(path, "rb") as f:
+        mimetype = sniff_mimetype(f.read(16)) or "application/octet-stream"
+    response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE, conditional=True, etag=image_hash)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@images_bp.route("/images/<string:image_hash>", methods=["GET"])
+def get_image(image_hash):
+    """
+    /images/${id} - GET
+    """
+    return _send_image(image_hash, thumbnail=False)
+
+
+@images_bp.route("/images/<string:image_hash>/thumbnail", methods=["GET"])
+def get_thumbnail(image_hash):
+    """
+    /images/${id}/thumbnail - GET
+    """
+    return _send_image(image_hash, thumbnail=True)
+
+
+@images_bp.cli.command("migrate")
+@click.option("--batch-size", default=100, show_default=True)
+def migrate_inline_images(batch_size):
+    """Move inline (base64) item images into the image store."""
+    stmt = select(Item.id, Item.image).where(Item.image.isnot(None)).execution_options(yield_per=batch_size)
+    updates = []
+    failed = 0
+    for row in db.session.execute(stmt):
+        if not is_inline_image(row.image):
+            continue
+        try:
+            updates.append({"id": row.id, "image": extract_inline_image(row.image)})
+        except ValueError as e:
+            failed += 1
+            click.echo(f"Skipping item {row.id}: {e}", err=True)
+
+    for start in range(0, len(updates), batch_size):
+        db.session.execute(update(Item), updates[start:start + batch_size])
+        catalog_cache.bump()
+        db.session.commit()
+    click.echo(f"Moved {len(updates)} inline images into the image store ({failed} skipped).")
@@ -1,10 +1,13 @@
 # itemrequests.py
 from flask import Blueprint, request, jsonify
-from models import db, ItemRequest, Log
+from models import db, ItemRequest
 from permissions.utils import user_logged_in
 import uuid
 from flask_jwt_extended import current_user
+from common.audit import audit_log
 from common.utils import generate_update_diff
+from common.pagination import apply_filters, keyset_paginate
+from common.serializers import itemrequest_to_dict
 
 itemrequests_bp = Blueprint('itemrequests', __name__)
 
@@ -12,16 +15,15 @@ itemrequests_bp = Blueprint('itemrequests', __name__)
 def get_all_itemrequests():
     """
     /itemrequests/all - GET
+    Query: limit, cursor, uid (requested_by)
     """
-    requests = ItemRequest.query.all()
-    output = []
-    for ir in requests:
-        output.append({
-            "id": ir.id,
-            "requested_by": ir.requested_by,
-            "description": ir.description
-        })
-    return jsonify({"itemrequests": output}), 200
+    query = apply_filters(itemrequest_to_dict.select(), request.args, {"uid": ItemRequest.requested_by})
+    try:
+        requests, next_cursor = keyset_paginate(query, [ItemRequest.id], request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"itemrequests": [itemrequest_to_dict.from_row(ir) for ir in requests], "next_cursor": next_cursor}), 200
 
 
 @itemrequests_bp.route('/itemrequests/create', methods=['POST'])
@@ -45,14 +47,14 @@ def create_itemrequest():
     )
     db.session.add(new_ir)
 
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="ITEMREQUEST",
-        timestamp=db.func.current_timestamp(),
-        description=f"User {current_user.uid} created ItemRequest {ir_id}: {new_ir}",
+        uid=current_user.uid,
+        description=f"User {current_user.uid} created ItemRequest {ir_id}",
+        action="create",
+        entity_type="ITEMREQUEST",
+        entity_id=ir_id,
     )
-    db.session.add(log_item)
 
     db.session.commit()
     return jsonify({"success": True, "id": ir_id, "message": "ItemRequest created"}), 201
@@ -80,14 +82,15 @@ def update_itemrequest():
     ir.requested_by = ir_data.get("requested_by", ir.requested_by)
     ir.description = ir_data.get("description", ir.description)
 
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="ITEMREQUEST",
-        timestamp=db.func.current_timestamp(),
-        description=f"User {current_user.uid} updated ItemRequest {ir_id}: {diff}",
+        uid=current_user.uid,
+        description=f"User {current_user.uid} updated ItemRequest {ir_id}",
+        action="update",
+        entity_type="ITEMREQUEST",
+        entity_id=ir_id,
+        diff=diff,
     )
-    db.session.add(log_item)
 
     db.session.commit()
     return jsonify({"success": True, "message": "ItemRequest updated"}), 200
@@ -107,14 +110,14 @@ def delete_itemrequest(ir_id):
     # Delete the ItemRequest
     db.session.delete(item_request)
 
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="ITEMREQUEST",
-        timestamp=db.func.current_timestamp(),
+        uid=current_user.uid,
         description=f"User {current_user.uid} deleted ItemRequest {ir_id}",
+        action="delete",
+        entity_type="ITEMREQUEST",
+        entity_id=ir_id,
     )
-    db.session.add(log_item)
 
     db.session.commit()
 
@@ -4,33 +4,43 @@ import uuid
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import current_user
 
-from models import db, Item, User, Transaction, Log
+from models import db, Item
 from permissions.utils import user_logged_in, protected_update
+from common.audit import audit_log
+from common.catalog_cache import catalog_cache
+from common.exceptions import PurchaseException
+from common.images import extract_inline_image
+from common.serializers import item_to_dict
 from common.utils import generate_update_diff
+from common.pagination import keyset_paginate
+from common.sql_profiler import allow_repeated_queries
+from common.replicas import use_primary
+from common.purchases import reserve_stock, debit_credit, debit_credit_for_item, create_transaction, checkout
 
 items_bp = Blueprint('items', __name__)
 
 @items_bp.route('/items/all', methods=['GET'])
+# Cached under the current catalog version: a lagging replica could store a
+# stale catalog under the new version, so catalog reads stay on the primary
+@use_primary
+@catalog_cache.cached
 def get_all_items():
     """
     /items/all - GET
-    Returns all items.
+    Query: limit, cursor
+    Returns a page of items ordered by id, plus the cursor of the next page.
     """
-    items = Item.query.all()
-    items_list = []
-    for i in items:
-        items_list.append({
-            "id": i.id,
-            "name": i.name,
-            "stock": i.stock,
-            "price": i.price,
-            "description": i.description,
-            "image": i.image,
-        })
-    return jsonify({"items": items_list}), 200
+    try:
+        items, next_cursor = keyset_paginate(item_to_dict.select(), [Item.id], request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"items": [item_to_dict.from_row(i) for i in items], "next_cursor": next_cursor}), 200
 
 
 @items_bp.route('/items/<string:item_id>', methods=['GET'])
+@use_primary
+@catalog_cache.cached
 def get_item_by_id(item_id):
     """
     /items/${id} - GET
@@ -39,16 +49,16 @@ def get_item_by_id(item_id):
     if not item:
         return jsonify({"success": False, "message": "Item not found"}), 404
 
-    return jsonify({
-        "item": {
-            "id": item.id,
-            "name": item.name,
-            "stock": item.stock,
-            "price": item.price,
-            "description": item.description,
-            "image": item.image,
-        }
-    }), 200
+    return jsonify({"item": item_to_dict(item)}), 200
+
+
+async def get_items_cached(request, item_id=None):
+    """
+    Async read tier (see asgi.py) for /items/all and /items/<id>: answers from
+    the catalog cache on the event loop, and leaves misses to the views above.
+    """
+    version = await catalog_cache.version_async(request.session)
+    return catalog_cache.cached_response(version, request.full_path, request.if_none_match)
 
 
 @items_bp.route("/items/create", methods=["POST"])
@@ -63,25 +73,31 @@ def create_item():
     if not item_data:
         return jsonify({"success": False, "message": "No item data provided"}), 400
 
+    try:
+        image = extract_inline_image(item_data.get("image"))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
     item_id = uuid.uuid4().hex
 
     new_item = Item(
         id=item_id,
         name=item_data.get("name"),
-        image=item_data.get("image"),
+        image=image,
         stock=item_data.get("stock", 0),
         price=item_data.get("price", 0),
         description=item_data.get("description"),
     )
     db.session.add(new_item)
-    log_item = Log(
-        id=uuid.uuid4().hex,
+    audit_log.record(
         cat="ITEM",
         uid=current_user.uid,
-        timestamp=db.func.current_timestamp(),
         description=f"Item {item_id} created by {current_user.uid}",
+        action="create",
+        entity_type="ITEM",
+        entity_id=item_id,
     )
-    db.session.add(log_item)
+    catalog_cache.bump()
     db.session.commit()
     return jsonify({"success": True, "id": item_id, "message": "Item created"}), 201
 
@@ -102,6 +118,13 @@ def update_item(item_id):
     if not item:
         return jsonify({"success": False, "message": "Item not found"}), 404
 
+    if "image" in item_data:
+        # Inline images go to the image store; the item keeps only the URL
+        try:
+            item_data["image"] = extract_inline_image(item_data["image"])
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
     diff = generate_update_diff(item, item_data)
 
     protected_update(item, "name", item_data, admin_only=True)
@@ -109,14 +132,16 @@ def update_item(item_id):
     protected_update(item, "price", item_data, admin_only=True)
     protected_update(item, "description", item_data, admin_only=True)
     protected_update(item, "image", item_data, admin_only=True)
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="ITEM",
-        timestamp=db.func.current_timestamp(),
-        description=f"User {current_user.uid} made the following changes: {diff} on item {item_id}",
+        uid=current_user.uid,
+        description=f"User {current_user.uid} updated item {item_id}",
+        action="update",
+        entity_type="ITEM",
+        entity_id=item_id,
+        diff=diff,
     )
-    db.session.add(log_item)
+    catalog_cache.bump()
     db.session.commit()
     return jsonify({"success": True, "message": "Item updated"}), 200
 
@@ -133,14 +158,15 @@ def delete_item(item_id):
         return jsonify({"success": False, "message": "Item not found"}), 404
 
     db.session.delete(item)
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="ITEM",
-        timestamp=db.func.current_timestamp(),
+        uid=current_user.uid,
         description=f"User {current_user.uid} deleted item {item_id}",
+        action="delete",
+        entity_type="ITEM",
+        entity_id=item_id,
     )
-    db.session.add(log_item)
+    catalog_cache.bump()
     db.session.commit()
     return jsonify({"success": True, "message": "Item deleted"}), 200
 
@@ -160,58 +186,35 @@ def buy_item():
     if not item_id or not quantity or not user_id:
         return jsonify({"success": False, "message": "Missing item_id, quantity, or user_id"}), 400
 
-    # 1) Get the item
-    item = Item.query.filter_by(id=item_id).first()
-    if not item:
-        return jsonify({"success": False, "message": "Item not found"}), 404
-
-    # 2) Check quantity vs. stock
-    if quantity <= 0:
+    if not isinstance(quantity, int) or quantity <= 0:
         return jsonify({"success": False, "message": "Invalid quantity"}), 400
-    
-    if quantity > item.stock:
-        return jsonify({"success": False, "message": "Requested quantity exceeds available stock"}), 400
-
-    # 3) Get the user
-    user = User.query.filter_by(uid=user_id).first()
-    if not user:
-        return jsonify({"success": False, "message": "User not found"}), 404
 
-    # 4) Check user credit vs. cost
-    total_price = quantity * item.price
-    if user.credit < total_price:
-        return jsonify({"success": False, "message": "Insufficient credit"}), 400
-
-    # At this point, we assume purchase is allowed to proceed
     try:
-        # 5) Deduct stock
-        item.stock = item.stock - quantity
-
-        user.credit = user.credit - total_price
-
-        # 6) Insert transaction
-        transaction_id = uuid.uuid4().hex
-        new_transaction = Transaction(
-            id=transaction_id,
-            item=item_id,
-            uid=user_id,
-            quantity=quantity,
-            status='AWAITING_CONF'  
-        )
-        db.session.add(new_transaction)
+        # 1) Deduct stock and 2) deduct credit with guarded UPDATEs, so the checks
+        # and the writes cannot race with concurrent buyers
+        price = reserve_stock(item_id, quantity)
+        debit_credit(user_id, quantity * price)
 
-        log_item = Log(
-            id=uuid.uuid4().hex,
-            uid=current_user.uid,
+        # 3) Insert transaction
+        transaction_id = create_transaction(item_id, user_id, quantity, 'AWAITING_CONF')
+
+        audit_log.record(
             cat="TRANSACTION",
-            timestamp=db.func.current_timestamp(),
-            description=f"Created transaction {transaction_id}. User {current_user.uid} bought {quantity} {item_id} ({item})",
+            uid=current_user.uid,
+            description=f"Created transaction {transaction_id}. User {current_user.uid} bought {quantity} {item_id}",
+            action="buy",
+            entity_type="TRANSACTION",
+            entity_id=transaction_id,
+            sync=True,
         )
-        db.session.add(log_item)
 
+        catalog_cache.bump()
         db.session.commit()
 
         return jsonify({"success": True, "message": "Purchase successful", "transaction_id": transaction_id}), 200
+    except PurchaseException as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
@@ -221,7 +224,7 @@ def buy_item():
 @user_logged_in()
 def preorder_item():
     """
-    /items/buy - POST
+    /items/preorder - POST
     Request: { "id": str, "quantity": int, "uid": str }
     """
     data = request.get_json() or {}
@@ -232,52 +235,72 @@ def preorder_item():
     if not item_id or not quantity or not user_id:
         return jsonify({"success": False, "message": "Missing item_id, quantity, or user_id"}), 400
 
-    # 1) Get the item
-    item = Item.query.filter_by(id=item_id).first()
-    if not item:
-        return jsonify({"success": False, "message": "Item not found"}), 404
-
-    # 2) Check quantity
-    if quantity <= 0:
+    if not isinstance(quantity, int) or quantity <= 0:
         return jsonify({"success": False, "message": "Invalid quantity"}), 400
 
-    # 3) Get the user
-    user = User.query.filter_by(uid=user_id).first()
-    if not user:
-        return jsonify({"success": False, "message": "User not found"}), 404
-
-    # 4) Check user credit vs. cost
-    total_price = quantity * item.price
-    if user.credit < total_price:
-        return jsonify({"success": False, "message": "Insufficient credit"}), 400
-
-    # At this point, we assume purchase is allowed to proceed
     try:
-        user.credit = user.credit - total_price
-
-        # 5) Insert transaction
-        transaction_id = uuid.uuid4().hex
-        new_transaction = Transaction(
-            id=transaction_id,
-            item=item_id,
-            uid=user_id,
-            quantity=quantity,
-            status='PREORDER'  
-        )
-        db.session.add(new_transaction)
+        # 1) Deduct credit; the item price is read inside the same guarded UPDATE
+        debit_credit_for_item(user_id, item_id, quantity)
 
-        log_item = Log(
-            id=uuid.uuid4().hex,
-            uid=current_user.uid,
+        # 2) Insert transaction
+        transaction_id = create_transaction(item_id, user_id, quantity, 'PREORDER')
+
+        audit_log.record(
             cat="TRANSACTION",
-            timestamp=db.func.current_timestamp(),
-            description=f"Created transaction {transaction_id}. User {current_user.uid} preordered {quantity} {item_id} ({item})",
+            uid=current_user.uid,
+            description=f"Created transaction {transaction_id}. User {current_user.uid} preordered {quantity} {item_id}",
+            action="preorder",
+            entity_type="TRANSACTION",
+            entity_id=transaction_id,
+            sync=True,
         )
-        db.session.add(log_item)
 
+        catalog_cache.bump()
         db.session.commit()
 
         return jsonify({"success": True, "message": "Purchase successful", "transaction_id": transaction_id}), 200
+    except PurchaseException as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+
+@items_bp.route('/items/checkout', methods=['POST'])
+@user_logged_in()
+# One guarded UPDATE per item, in id order, so concurrent checkouts cannot deadlock
+@allow_repeated_queries
+def checkout_items():
+    """
+    /items/checkout - POST
+    Buy several items at once. Either every item is bought or none is.
+    Request: { "uid": str, "items": [{ "id": str, "quantity": int }, ...] }
+    """
+    data = request.get_json() or {}
+    user_id = data.get("uid")
+    cart = data.get("items")
+
+    if not user_id or not cart or not isinstance(cart, list):
+        return jsonify({"success": False, "message": "Missing uid or items"}), 400
+
+    lines = []
+    for line in cart:
+        item_id = line.get("id") if isinstance(line, dict) else None
+        quantity = line.get("quantity") if isinstance(line, dict) else None
+        if not item_id or not isinstance(quantity, int) or quantity <= 0:
+            return jsonify({"success": False, "message": f"Invalid cart line: {line}"}), 400
+        lines.append((item_id, quantity))
+
+    try:
+        transaction_ids = checkout(user_id, lines, current_user.uid)
+        catalog_cache.bump()
+        db.session.commit()
+
+        return jsonify({"success": True, "message": "Checkout successful", "transaction_ids": transaction_ids}), 200
+    except PurchaseException as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
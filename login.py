@@ -1,7 +1,9 @@
 # login.py
 from flask import Blueprint, request, jsonify
 from models import db, User
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, jwt_required
+from common.exceptions import PasswordHashingBusyException
+from common.passwords import password_hasher
 
 login_bp = Blueprint('login', __name__)
 
@@ -10,7 +12,7 @@ def login():
     """
     /login - POST
     Request: { "email": str, "password": str }
-    Response: { "success": bool, "message": str, "token": str }
+    Response: { "success": bool, "message": str, "token": str, "refresh_token": str }
     """
     data = request.get_json() or {}
     email = data.get('email')
@@ -19,14 +21,50 @@ def login():
     if not email or not password:
         return jsonify({"success": False, "token": "", "message": "Missing credentials"}), 400
 
-    user = User.query.filter_by(email=email, password=password).first()
-    if not user:
+    user = User.query.filter_by(email=email).first()
+    try:
+        valid, new_hash = password_hasher.verify(user.password if user else None, password)
+    except PasswordHashingBusyException as e:
+        return jsonify({"success": False, "token": "", "message": str(e)}), e.http_response_code, {"Retry-After": "1"}
+    if not user or not valid:
         return jsonify({"success": False, "token": "", "message": "Invalid credentials"}), 401
 
+    if new_hash:
+        # Stored in plaintext or with an outdated method: upgrade it
+        user.password = new_hash
+        db.session.commit()
+
     token = create_access_token(identity=user)
+    refresh_token = create_refresh_token(identity=user)
 
     # If login is successful, return uid
-    return jsonify({"success": True, "token": token, "message": "Login successful"}), 200
+    return jsonify({
+        "success": True,
+        "token": token,
+        "refresh_token": refresh_token,
+        "message": "Login successful",
+    }), 200
+
+
+@login_bp.route('/login/refresh', methods=['POST'])
+@jwt_required(refresh=True, skip_revocation_check=True)
+def refresh():
+    """
+    /login/refresh - POST
+    Header: Authorization: Bearer <refresh_token>
+    Response: { "success": bool, "message": str, "token": str }
+    Issues a new access token with the user's current role and active state.
+    This is the only place tokens are checked against the database, so
+    revocations need no check here.
+    """
+    user = db.session.get(User, get_jwt_identity())
+    if not user:
+        return jsonify({"success": False, "token": "", "message": "User not found"}), 401
+    if not user.is_active:
+        return jsonify({"success": False, "token": "", "message": "User is suspended"}), 403
+
+    token = create_access_token(identity=user)
+    return jsonify({"success": True, "token": token, "message": "Token refreshed"}), 200
 
 
 @login_bp.route('/login/resetpassword', methods=['POST'])
@@ -46,6 +84,9 @@ def reset_password():
     if not user:
         return jsonify({"success": False, "message": "User not found"}), 404
 
-    user.password = new_password
+    try:
+        user.password = password_hasher.hash(new_password)
+    except PasswordHashingBusyException as e:
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code, {"Retry-After": "1"}
     db.session.commit()
     return jsonify({"success": True, "message": "Password reset successful"}), 200
@@ -1,7 +1,14 @@
 # logs.py
+import json
 import uuid
-from flask import Blueprint, jsonify
+import click
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import select
 from models import db, Log
+from permissions.utils import user_logged_in
+from common.pagination import apply_filters, apply_time_range, keyset_paginate, parse_timestamp
+from common.log_partitions import archive_log_partitions, ensure_log_partitions, search_archived_logs
+from common.audit import PUBLIC_LOG_COLUMNS, log_to_dict
 
 logs_bp = Blueprint('logs', __name__)
 
@@ -9,20 +16,108 @@ logs_bp = Blueprint('logs', __name__)
 def get_all_logs():
     """
     /logs/all - GET
-    Returns all logs in the system.
-    """
-    logs = Log.query.all()
-
-    # Convert logs to simple dict
-    logs_data = [
-        {
-            "id": log.id,
-            "cat": log.cat,
-            "uid": log.uid,
-            "timestamp": log.timestamp,
-            "description": log.description,
-        }
-        for log in logs
-    ]
-
-    return jsonify({"success": True, "logs": logs_data}), 200
+    Query: limit, cursor, cat, uid, since, until
+    Returns a page of logs, newest first, plus the cursor of the next page.
+    Diffs are left out: they are served by the admin-only entity history.
+    """
+    query = select(*[getattr(Log, column) for column in PUBLIC_LOG_COLUMNS])
+    query = apply_filters(query, request.args, {"cat": Log.cat, "uid": Log.uid})
+    try:
+        query = apply_time_range(query, request.args, Log.timestamp)
+        logs, next_cursor = keyset_paginate(query, [Log.timestamp, Log.id], request.args, descending=True)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"success": True, "logs": [log_to_dict(log, PUBLIC_LOG_COLUMNS) for log in logs], "next_cursor": next_cursor}), 200
+
+
+@logs_bp.route("/logs/entity/<string:entity_type>/<string:entity_id>", methods=["GET"])
+# Diffs may hold any changed field of the entity: admins only
+@user_logged_in(is_admin=True)
+def get_entity_history(entity_type, entity_id):
+    """
+    /logs/entity/<entity_type>/<entity_id> - GET
+    Query: limit, cursor, action, since, until
+    Returns a page of the logs of one entity (e.g. /logs/entity/ITEM/<item id>),
+    newest first, plus the cursor of the next page. Served by ix_logs_entity.
+    """
+    query = Log.query.filter(Log.entity_type == entity_type.upper(), Log.entity_id == entity_id)
+    query = apply_filters(query, request.args, {"action": Log.action})
+    try:
+        query = apply_time_range(query, request.args, Log.timestamp)
+        logs, next_cursor = keyset_paginate(query, [Log.timestamp, Log.id], request.args, descending=True)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"success": True, "logs": [log_to_dict(log) for log in logs], "next_cursor": next_cursor}), 200
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+@logs_bp.route("/logs/export", methods=["GET"])
+def export_logs():
+    """
+    /logs/export - GET
+    Query: cat, uid, since, until
+    Streams matching logs, oldest first, as NDJSON (one log object per line).
+    Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE,
+    so memory use does not grow with the size of the logs table. Diffs are left out.
+    """
+    stmt = select(*[getattr(Log, column) for column in PUBLIC_LOG_COLUMNS])
+    stmt = apply_filters(stmt, request.args, {"cat": Log.cat, "uid": Log.uid})
+    try:
+        stmt = apply_time_range(stmt, request.args, Log.timestamp)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    stmt = stmt.order_by(Log.timestamp, Log.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    def generate():
+        result = db.session.execute(stmt)
+        try:
+            for batch in result.partitions():
+                yield "".join(json.dumps(log_to_dict(row, PUBLIC_LOG_COLUMNS)) + "\n" for row in batch)
+        finally:
+            result.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson"), 200
+
+
+@logs_bp.route("/logs/archive", methods=["GET"])
+def search_log_archive():
+    """
+    /logs/archive - GET
+    Query: cat, uid, since, until
+    Streams archived logs (moved out of the database by `flask logs archive`)
+    as NDJSON, without their diffs. Only the monthly archive files overlapping
+    since/until are read.
+    """
+    try:
+        since = parse_timestamp(request.args["since"]) if "since" in request.args else None
+        until = parse_timestamp(request.args["until"]) if "until" in request.args else None
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    logs = search_archived_logs(since, until, cat=request.args.get("cat"), uid=request.args.get("uid"))
+    return Response(
+        stream_with_context(
+            json.dumps({column: log.get(column) for column in PUBLIC_LOG_COLUMNS}) + "\n" for log in logs
+        ),
+        mimetype="application/x-ndjson",
+    ), 200
+
+
+@logs_bp.cli.command("partitions")
+@click.option("--months-ahead", type=int, default=None, help="Defaults to LOG_PARTITION_MONTHS_AHEAD.")
+def create_log_partitions(months_ahead):
+    """Create the monthly logs partitions for the coming months."""
+    created = ensure_log_partitions(months_ahead)
+    click.echo(f"Created partitions: {', '.join(created) or 'none'}")
+
+
+@logs_bp.cli.command("archive")
+@click.option("--retention-months", type=int, default=None, help="Defaults to LOG_RETENTION_MONTHS.")
+def archive_logs(retention_months):
+    """Archive logs partitions older than the retention period to compressed files."""
+    archived = archive_log_partitions(retention_months)
+    click.echo(f"Archived partitions: {', '.join(archived) or 'none'}")
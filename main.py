@@ -1,8 +1,11 @@
 # main.py
+import os
+
 from flask import Flask
 from config import BaseConfig
 from configure_extensions import configure_extensions
-from models import db
+from common.json_provider import JSONProvider
+from common.schema import check_schema_version, check_schema_version_on_use
 
 from login import login_bp
 from users import users_bp
@@ -12,11 +15,16 @@ from usertasks import usertasks_bp
 from transcations import transactions_bp
 from logs import logs_bp
 from itemrequests import itemrequests_bp
+from images import images_bp
+from reports import reports_bp
+from metrics import metrics_bp
+from migrations import migrations_bp
 
 
 def create_app(config_class=BaseConfig):
     # Create the Flask app
     flask_app = Flask(__name__)
+    flask_app.json = JSONProvider(flask_app)
     flask_app.config.from_object(config_class)
 
     # Initialize extensions (e.g., SQLAlchemy, etc.)
@@ -31,10 +39,21 @@ def create_app(config_class=BaseConfig):
     flask_app.register_blueprint(transactions_bp)
     flask_app.register_blueprint(itemrequests_bp)
     flask_app.register_blueprint(logs_bp)
+    flask_app.register_blueprint(images_bp)
+    flask_app.register_blueprint(reports_bp)
+    flask_app.register_blueprint(metrics_bp)
+    flask_app.register_blueprint(migrations_bp)
 
-    # Create database tables on every startup (optional)
-    with flask_app.app_context():
-        db.create_all()
+    # Refuse to serve a database older than the code; one query on the
+    # schema_version table. The flask CLI loads the app before the command is
+    # known, so there the check waits for the command (other than
+    # `flask db`, which upgrades the schema) or the first request.
+    if flask_app.config.get("SCHEMA_VERSION_CHECK", True):
+        if os.environ.get("FLASK_RUN_FROM_CLI"):
+            check_schema_version_on_use(flask_app)
+        else:
+            with flask_app.app_context():
+                check_schema_version()
 
     return flask_app
 
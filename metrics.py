@@ -0,0 +1,19 @@
+# metrics.py
+from flask import Blueprint, Response, jsonify
+
+from common.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    /metrics - GET
+    Prometheus text exposition of the request and SQL metrics of every worker.
+    """
+    if not metrics.enabled:
+        return jsonify({"success": False, "message": "Metrics are not enabled"}), 503
+
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type), 200
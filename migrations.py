@@ -0,0 +1,43 @@
+# migrations.py
+import click
+from flask import Blueprint
+
+from models import db
+from common.exceptions import SchemaVersionException
+from common.schema import available_migrations, current_version, stamp, upgrade
+
+# CLI only: flask db upgrade | current | stamp
+migrations_bp = Blueprint('db', __name__)
+
+
+@migrations_bp.cli.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Defaults to the latest migration.")
+def upgrade_schema(target):
+    """Apply the pending migrations in db/migrations/."""
+    try:
+        applied = upgrade(target)
+    except SchemaVersionException as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Applied migrations: {', '.join(applied) or 'none'}")
+
+
+@migrations_bp.cli.command("current")
+def show_schema_version():
+    """Show the database's schema version and the pending migrations."""
+    with db.engine.connect() as conn:
+        version = current_version(conn)
+    pending = [f"{number:04d}_{name}" for number, name, _ in available_migrations()
+               if version is None or number > version]
+    click.echo(f"Schema version: {'none' if version is None else f'{version:04d}'}")
+    click.echo(f"Pending migrations: {', '.join(pending) or 'none'}")
+
+
+@migrations_bp.cli.command("stamp")
+@click.argument("version", type=int)
+def stamp_schema_version(version):
+    """Mark the migrations up to VERSION as applied, for a database migrated by hand."""
+    try:
+        stamp(version)
+    except SchemaVersionException as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Stamped schema version {version:04d}")
@@ -1,7 +1,11 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 
-db = SQLAlchemy()
+from common.routing_session import RoutingSession
+
+# Reads of read-only requests may go to a replica, see common/replicas.py
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -33,7 +37,10 @@ class Item(db.Model):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
-    
+    __table_args__ = (
+        db.Index('ix_tasks_created_by', 'created_by'),
+    )
+
     id = db.Column(db.String(36), primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     created_by = db.Column(db.String(36), db.ForeignKey("users.uid"), nullable=False)
@@ -50,7 +57,15 @@ class Task(db.Model):
 
 class UserTask(db.Model):
     __tablename__ = 'usertasks'
-    
+    __table_args__ = (
+        # One row per user and task occurrence (see common/recurrence.py)
+        db.Index('uq_usertasks_occurrence', 'uid', 'task', 'start_time', unique=True),
+        # NULLs are distinct in the index above: one-off tasks without a start_time
+        db.Index('uq_usertasks_unscheduled', 'uid', 'task', unique=True,
+                 postgresql_where=db.text('start_time IS NULL'), sqlite_where=db.text('start_time IS NULL')),
+        db.Index('ix_usertasks_task', 'task'),
+    )
+
     id = db.Column(db.String(36), primary_key=True)
     uid = db.Column(db.String(36), db.ForeignKey('users.uid'), nullable=False)
     task = db.Column(db.String(36), db.ForeignKey('tasks.id'), nullable=False)
@@ -65,11 +80,16 @@ class UserTask(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_uid_created_at', 'uid', 'created_at'),
+        db.Index('ix_transactions_item', 'item'),
+    )
     id = db.Column(db.String(36), primary_key=True)
     item = db.Column(db.String(36), db.ForeignKey('items.id'), nullable=False)
     uid = db.Column(db.String(36), db.ForeignKey('users.uid'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=db.func.current_timestamp())
 
     def __repr__(self):
         return f"<Transaction {self.id} item={self.item} uid={self.uid}>"
@@ -77,6 +97,9 @@ class Transaction(db.Model):
 
 class ItemRequest(db.Model):
     __tablename__ = 'itemrequests'
+    __table_args__ = (
+        db.Index('ix_itemrequests_requested_by', 'requested_by'),
+    )
     id = db.Column(db.String(36), primary_key=True)
     requested_by = db.Column(db.String(36), db.ForeignKey('users.uid'), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -87,11 +110,56 @@ class ItemRequest(db.Model):
 
 class Log(db.Model):
     __tablename__ = 'logs'
+    __table_args__ = (
+        db.Index('ix_logs_uid', 'uid'),
+        db.Index('ix_logs_cat_timestamp', 'cat', 'timestamp'),
+        db.Index('ix_logs_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_logs_entity', 'entity_type', 'entity_id', 'timestamp'),
+    )
     id = db.Column(db.String(36), primary_key=True)
     cat = db.Column(db.String(50), nullable=False)  # e.g. 'USER', 'TRANSACTION', ...
     uid = db.Column(db.String(36))
-    timestamp = db.Column(db.DateTime(timezone=True), default=db.func.current_timestamp())
+    # Part of the primary key because logs is partitioned by timestamp
+    timestamp = db.Column(db.DateTime(timezone=True), primary_key=True, default=db.func.current_timestamp())
     description = db.Column(db.Text)
+    entity_type = db.Column(db.String(50))  # e.g. 'ITEM', 'USER', ...
+    entity_id = db.Column(db.String(36))
+    action = db.Column(db.String(50))  # e.g. 'create', 'update', 'buy', ...
+    diff = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))  # {field: {"before": ..., "after": ...}}
 
     def __repr__(self):
         return f"<Log {self.id} cat={self.cat}>"
+
+
+class LogRollup(db.Model):
+    """Number of logs per (day, cat, uid, action), maintained as logs are written."""
+    __tablename__ = 'log_rollups'
+    day = db.Column(db.Date, primary_key=True)
+    cat = db.Column(db.String(50), primary_key=True)
+    uid = db.Column(db.String(36), primary_key=True, default='')  # '' for logs without a user
+    action = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<LogRollup {self.day} {self.cat} {self.uid} {self.action}={self.count}>"
+
+
+class CatalogVersion(db.Model):
+    """Single row counting the changes to items, see common/catalog_cache.py."""
+    __tablename__ = 'catalog_version'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogVersion {self.version}>"
+
+
+class SchemaVersion(db.Model):
+    """Migrations (db/migrations/NNNN_*.sql) applied to the database, see common/schema.py."""
+    __tablename__ = 'schema_version'
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime(timezone=True), nullable=False, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f"<SchemaVersion {self.version} {self.name}>"
@@ -0,0 +1,117 @@
+# reports.py
+import datetime
+
+import click
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func, select
+
+from models import db, LogRollup, User
+from permissions.utils import user_logged_in
+from common.pagination import parse_timestamp
+from common.rollups import backfill_rollups
+
+reports_bp = Blueprint('reports', __name__)
+
+PURCHASE_ACTIONS = ("buy", "preorder")
+
+
+def _day_range():
+    """since/until query parameters as dates, defaulting to the last 30 days."""
+    today = datetime.date.today()
+    since = parse_timestamp(request.args["since"]).date() if "since" in request.args else today - datetime.timedelta(days=30)
+    until = parse_timestamp(request.args["until"]).date() if "until" in request.args else today + datetime.timedelta(days=1)
+    return since, until
+
+
+@reports_bp.route("/reports/users/<string:uid>/activity", methods=["GET"])
+@user_logged_in(is_admin=True)
+def get_user_activity(uid):
+    """
+    /reports/users/<uid>/activity - GET
+    Query: since, until (default: the last 30 days)
+    Number of actions per day, category and action for one user.
+    """
+    try:
+        since, until = _day_range()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    rows = db.session.execute(
+        select(LogRollup.day, LogRollup.cat, LogRollup.action, LogRollup.count)
+        .where(LogRollup.uid == uid, LogRollup.day >= since, LogRollup.day < until)
+        .order_by(LogRollup.day, LogRollup.cat, LogRollup.action)
+    ).all()
+    return jsonify({
+        "success": True,
+        "activity": [
+            {"day": r.day.isoformat(), "cat": r.cat, "action": r.action, "count": r.count}
+            for r in rows
+        ],
+        "total": sum(r.count for r in rows),
+    }), 200
+
+
+@reports_bp.route("/reports/purchases/daily", methods=["GET"])
+@user_logged_in(is_admin=True)
+def get_daily_purchases():
+    """
+    /reports/purchases/daily - GET
+    Query: since, until (default: the last 30 days)
+    Number of purchases and preorders per day.
+    """
+    try:
+        since, until = _day_range()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    rows = db.session.execute(
+        select(LogRollup.day, LogRollup.action, func.sum(LogRollup.count).label("count"))
+        .where(LogRollup.action.in_(PURCHASE_ACTIONS), LogRollup.day >= since, LogRollup.day < until)
+        .group_by(LogRollup.day, LogRollup.action)
+        .order_by(LogRollup.day)
+    ).all()
+
+    days = {}
+    for r in rows:
+        day = days.setdefault(r.day, {"day": r.day.isoformat(), "buy": 0, "preorder": 0})
+        day[r.action] = int(r.count)
+    return jsonify({"success": True, "purchases": list(days.values())}), 200
+
+
+@reports_bp.route("/reports/admin/weekly", methods=["GET"])
+@user_logged_in(is_admin=True)
+def get_weekly_admin_actions():
+    """
+    /reports/admin/weekly - GET
+    Query: since, until (default: the last 30 days)
+    Number of actions taken by admins per week (starting Monday), category and action.
+    """
+    try:
+        since, until = _day_range()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    admins = select(User.uid).where(User.cat == "ADMIN")
+    rows = db.session.execute(
+        select(LogRollup.day, LogRollup.uid, LogRollup.cat, LogRollup.action, LogRollup.count)
+        .where(LogRollup.uid.in_(admins), LogRollup.day >= since, LogRollup.day < until)
+    ).all()
+
+    weeks = {}
+    for r in rows:
+        week = r.day - datetime.timedelta(days=r.day.weekday())
+        key = (week, r.uid, r.cat, r.action)
+        weeks[key] = weeks.get(key, 0) + r.count
+    return jsonify({
+        "success": True,
+        "weeks": [
+            {"week": week.isoformat(), "uid": uid, "cat": cat, "action": action, "count": count}
+            for (week, uid, cat, action), count in sorted(weeks.items())
+        ],
+    }), 200
+
+
+@reports_bp.cli.command("backfill")
+def backfill():
+    """Rebuild the log rollups from the logs table."""
+    click.echo(f"Rebuilt {backfill_rollups()} rollup rows.")
@@ -4,10 +4,15 @@ import datetime
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import current_user
-from models import db, Task, Log, UserTask, User
+from sqlalchemy.exc import IntegrityError
+from models import db, Task, UserTask, User
 
 from permissions.utils import user_logged_in, protected_update
-from common.utils import create_user_tasks, generate_update_diff
+from common.audit import audit_log
+from common.serializers import task_to_dict
+from common.utils import generate_update_diff
+from common.pagination import parse_timestamp
+from common.recurrence import as_utc, is_recurring, materialize_occurrence, next_occurrence, occurrence, task_occurrences
 
 tasks_bp = Blueprint('tasks', __name__)
 
@@ -17,21 +22,60 @@ def get_all_tasks():
     /tasks/all - GET
     Retrieve all tasks.
     """
-    tasks = Task.query.all()
-    tasks_list = []
-    for t in tasks:
-        tasks_list.append({
-            "id": t.id,
-            "name": t.name,
-            "created_by": t.created_by,
-            "reward": str(t.reward),  # Convert Decimal to string or float if needed
-            "start_time": t.start_time.isoformat() if t.start_time else None,
-            "deadline": t.deadline.isoformat() if t.deadline else None,
-            "is_recurring": t.is_recurring,
-            "recurrence_interval": t.recurrence_interval,
-            "description": t.description,
+    tasks = db.session.execute(task_to_dict.select())
+    return jsonify({"tasks": [task_to_dict.from_row(t) for t in tasks]}), 200
+
+
+async def get_all_tasks_async(request):
+    """/tasks/all on the async read tier (see asgi.py)."""
+    tasks = await request.session.execute(task_to_dict.select())
+    return {"tasks": [task_to_dict.from_row(t) for t in tasks]}, 200
+
+
+@tasks_bp.route('/tasks/<string:task_id>/occurrences', methods=['GET'])
+def get_task_occurrences(task_id):
+    """
+    /tasks/<task_id>/occurrences - GET
+    Query: since, until (ISO8601, default: the next 30 days), uid (optional)
+    Occurrences of a task in the window, computed from its start_time and
+    recurrence_interval. With a uid, each occurrence carries that user's
+    UserTask status, or "OPEN" if they have not interacted with it.
+    """
+    task = Task.query.filter_by(id=task_id).first()
+    if not task:
+        return jsonify({"success": False, "message": "Task not found"}), 404
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        since = parse_timestamp(request.args["since"]) if "since" in request.args else now
+        until = parse_timestamp(request.args["until"]) if "until" in request.args else since + datetime.timedelta(days=30)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    occurrences = task_occurrences(task, since, until)
+
+    usertasks = {}
+    user_id = request.args.get("uid")
+    if user_id and occurrences:
+        rows = UserTask.query.filter(
+            UserTask.uid == user_id,
+            UserTask.task == task_id,
+            UserTask.start_time >= occurrences[0]["start_time"],
+            UserTask.start_time <= occurrences[-1]["start_time"],
+        ) if is_recurring(task) else UserTask.query.filter_by(uid=user_id, task=task_id)
+        usertasks = {as_utc(ut.start_time): ut for ut in rows}
+
+    output = []
+    for o in occurrences:
+        ut = usertasks.get(o["start_time"])
+        output.append({
+            "index": o["index"],
+            "start_time": o["start_time"],
+            "end_time": o["end_time"],
+            "status": ut.status if ut else "OPEN",
+            "usertask_id": ut.id if ut else None,
         })
-    return jsonify({"tasks": tasks_list}), 200
+    return jsonify({"occurrences": output}), 200
 
 
 @tasks_bp.route('/tasks/create', methods=['POST'])
@@ -149,7 +193,8 @@ def apply_task():
     Request JSON:
     {
         "uid": str,  # User ID of the applicant
-        "id": str    # Task ID of the task being applied for
+        "id": str,   # Task ID of the task being applied for
+        "occurrence": int (optional)  # Occurrence index of a recurring task, default: the next one
     }
     """
     data = request.get_json() or {}
@@ -169,31 +214,57 @@ def apply_task():
     if not task:
         return jsonify({"success": False, "message": "Task not found"}), 404
 
-    # Generate a new UserTask entry
-    usertask_id = uuid.uuid4().hex
-    new_usertask = UserTask(
-        id=usertask_id,
-        uid=user_id,
-        task=task_id,
-        start_time=task.start_time,  # Use the task's start time
-        end_time=task.deadline,      # Use the task's deadline
-        status="APPLIED",            # Default status
-        admin_comment=None           # No admin comment at creation
-    )
+    # Recurring tasks are applied for one occurrence at a time. Occurrences are
+    # virtual until a user interacts with them, so this materializes one row.
+    if is_recurring(task):
+        index = data.get("occurrence")
+        if index is None:
+            current = next_occurrence(task)
+        # bool is an int too: reject true/false
+        elif isinstance(index, int) and not isinstance(index, bool) and index >= 0:
+            current = occurrence(task, index)
+        else:
+            return jsonify({"success": False, "message": "Invalid occurrence"}), 400
+
+        if current is None:
+            return jsonify({"success": False, "message": "Task has no upcoming occurrence"}), 400
+    else:
+        current = occurrence(task, 0)
+
+    # A one-off task without a start_time matches start_time IS NULL
+    existing = UserTask.query.filter_by(uid=user_id, task=task_id, start_time=current["start_time"]).first()
+    if existing:
+        return jsonify({"success": False, "message": "Already applied for this occurrence"}), 400
+
+    # Generate a new UserTask entry, with no admin comment at creation
+    new_usertask = materialize_occurrence(task, user_id, current["index"], "APPLIED")
+    usertask_id = new_usertask.id
 
     # Save the new UserTask entry to the database
     db.session.add(new_usertask)
 
     # Optionally log the event
-    log_entry = Log(
-        id=uuid.uuid4().hex,
+    audit_log.record(
         cat="USERTASK",
         uid=user_id,
-        description=f"User {user_id} applied for task {task_id}"
+        description=f"User {user_id} applied for task {task_id}",
+        action="apply",
+        entity_type="USERTASK",
+        entity_id=usertask_id,
     )
-    db.session.add(log_entry)
 
-    # Commit all changes
-    db.session.commit()
+    # Commit all changes. A concurrent application for the same occurrence
+    # passes the check above too; uq_usertasks_occurrence (or, for tasks
+    # without a start_time, uq_usertasks_unscheduled) rejects one of them.
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Already applied for this occurrence"}), 400
 
-    return jsonify({"success": True, "message": "Task application successful", "usertask_id": usertask_id}), 201
+    return jsonify({
+        "success": True,
+        "message": "Task application successful",
+        "usertask_id": usertask_id,
+        "occurrence": current["index"],
+    }), 201
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+# main.py builds a module level app from BaseConfig on import, so it needs a
+# database URI before it is imported. Tests then build their own app.
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+# Tests create their tables from the models instead of running migrations
+os.environ.setdefault("SCHEMA_VERSION_CHECK", "false")
+
+from flask_jwt_extended import create_access_token
+
+from config import BaseConfig
+from main import create_app
+from models import db
+
+
+def create_test_app(**overrides):
+    """
+    Build an app against TEST_DATABASE_URI (e.g. a local PostgreSQL database),
+    or a fresh SQLite file when it is not set. Tables are recreated empty.
+    """
+    database_uri = os.environ.get("TEST_DATABASE_URI")
+    if not database_uri:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_uri = f"sqlite:///{path}"
+
+    engine_options = {}
+    if database_uri.startswith("sqlite"):
+        # Concurrent writers wait for the lock instead of failing immediately
+        engine_options = {"connect_args": {"timeout": 30, "check_same_thread": False}}
+
+    config = type("TestConfig", (BaseConfig,), {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options,
+        "AUDIT_SPOOL_DIR": tempfile.mkdtemp(),
+        # Logs are written in the request transaction, so no background writer
+        # outlives the test's tables
+        "AUDIT_LOG_MODE": "sync",
+        # Requests repeating a statement (e.g. a lookup in a loop) fail
+        "SQL_PROFILER": "raise",
+        **overrides,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def auth_headers(app, user):
+    with app.app_context():
+        token = create_access_token(identity=user)
+    return {"Authorization": f"Bearer {token}"}
@@ -12,7 +12,7 @@ class TestAPI(unittest.TestCase):
             "password": "password123"
         })
         self.assertEqual(response.status_code, 200)
-        return response.json().get("jwt")
+        return response.json().get("token")
 
     def test_login(self):
         response = requests.post(f"{BASE_URL}/login", json={
@@ -20,7 +20,7 @@ class TestAPI(unittest.TestCase):
             "password": "password123"
         })
         self.assertEqual(response.status_code, 200)
-        self.assertIn("jwt", response.json())
+        self.assertIn("token", response.json())
 
     def test_reset_password(self):
         response = requests.post(f"{BASE_URL}/login/resetpassword", json={
@@ -0,0 +1,110 @@
+import asyncio
+import datetime
+import importlib.util
+import threading
+import unittest
+
+from helpers import create_test_app
+from asgi import create_asgi_app
+from models import db, Item, Task, User
+
+
+def call(asgi_app, path, method="GET", headers=None):
+    """Run one request through an ASGI app. Returns (status, headers, body)."""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": b"", "root_path": "",
+        "http_version": "1.1", "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+class TestAsgi(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        database_uri = self.app.config["SQLALCHEMY_DATABASE_URI"]
+        if database_uri.startswith("sqlite:") and importlib.util.find_spec("aiosqlite"):
+            # The async tier reads the same database through aiosqlite
+            self.app.config["ASYNC_DATABASE_URI"] = database_uri.replace("sqlite:", "sqlite+aiosqlite:", 1)
+            self.app.config["ASYNC_DATABASE_ENGINE_OPTIONS"] = {}
+        with self.app.app_context():
+            db.session.add_all([
+                User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                     password="alicepass", credit=10, is_active=True),
+                Item(id="apple", name="Apple", stock=5, price=1),
+                Task(id="sweep", name="Sweep", created_by="alice", reward=3,
+                     start_time=datetime.datetime(2030, 1, 1), description="Sweep the floor"),
+            ])
+            db.session.commit()
+
+        self.wsgi_threads = []
+
+        @self.app.before_request
+        def record_thread():
+            self.wsgi_threads.append(threading.current_thread().name)
+
+        self.asgi_app = create_asgi_app(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.asgi_app.fallback.close()
+        if self.asgi_app.engine is not None:
+            asyncio.run(self.asgi_app.engine.dispose())
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_flask_requests_run_in_the_thread_pool(self):
+        status, _, body = call(self.asgi_app, "/items/apple")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.client.get("/items/apple").get_data())
+        self.assertTrue(self.wsgi_threads[0].startswith("asgi-wsgi"))
+
+    @unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "needs an async SQLite driver")
+    def test_cached_catalog_reads_skip_flask(self):
+        status, headers, body = call(self.asgi_app, "/items/all")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(self.wsgi_threads), 1)
+
+        self.assertEqual(call(self.asgi_app, "/items/all")[2], body)
+        self.assertEqual(call(self.asgi_app, "/items/all", headers={"If-None-Match": headers["etag"]})[0], 304)
+        self.assertEqual(len(self.wsgi_threads), 1)
+
+    @unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "needs an async SQLite driver")
+    def test_async_reads_match_the_flask_views(self):
+        for path in ("/tasks/all", "/users/alice", "/users/nobody"):
+            with self.subTest(path=path):
+                expected = self.client.get(path)
+                status, headers, body = call(self.asgi_app, path)
+                self.assertEqual((status, body), (expected.status_code, expected.get_data()))
+                self.assertEqual(headers["content-type"], "application/json")
+        self.assertFalse([name for name in self.wsgi_threads if name.startswith("asgi-wsgi")])
+
+    @unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "needs an async SQLite driver")
+    def test_async_reads_get_the_cors_headers_of_the_flask_views(self):
+        origin = {"Origin": "https://frontend.example.com"}
+        call(self.asgi_app, "/items/all", headers=origin)
+        for path in ("/items/all", "/tasks/all", "/users/alice"):
+            with self.subTest(path=path):
+                expected = self.client.get(path, headers=origin)
+                _, headers, _ = call(self.asgi_app, path, headers=origin)
+                self.assertEqual(headers.get("access-control-allow-origin"),
+                                 expected.headers["Access-Control-Allow-Origin"])
+        # Only the first, uncached /items/all went through Flask
+        self.assertEqual(len([name for name in self.wsgi_threads if name.startswith("asgi-wsgi")]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import datetime
+import json
+import os
+import unittest
+import uuid
+
+from helpers import create_test_app
+from common.audit import AuditLog
+from models import db, Log
+
+
+def spooled_row(description):
+    return {
+        "id": uuid.uuid4().hex, "cat": "ITEM", "uid": None, "description": description,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "entity_type": None, "entity_id": None, "action": "other", "diff": None,
+    }
+
+
+class TestAuditSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app(AUDIT_LOG_MODE="async", AUDIT_FLUSH_INTERVAL=3600)
+        self.spool_dir = self.app.config["AUDIT_SPOOL_DIR"]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def spool(self, name, *descriptions):
+        with open(os.path.join(self.spool_dir, name), "w") as f:
+            for description in descriptions:
+                f.write(json.dumps(spooled_row(description)) + "\n")
+
+    def logged(self):
+        with self.app.app_context():
+            return sorted(log.description for log in Log.query.all())
+
+    def test_files_of_a_dead_process_with_our_pid_are_replayed(self):
+        pid = os.getpid()
+        self.spool(f"audit-{pid}-0ld0b007.ndjson.1", "rotated")
+        self.spool(f"audit-{pid}-0ld0b007.ndjson", "current")
+        self.spool(f"audit-{pid}.ndjson", "before boot ids")
+        # A live process's files are left to it
+        self.spool(f"audit-{os.getppid()}-11fe.ndjson", "live")
+
+        writer = AuditLog()
+        writer.init_app(self.app)
+        self.assertEqual(writer.replay_spool(), 3)
+        self.assertEqual(self.logged(), ["before boot ids", "current", "rotated"])
+        self.assertEqual(os.listdir(self.spool_dir), [f"audit-{os.getppid()}-11fe.ndjson"])
+
+    def test_own_files_are_not_replayed(self):
+        writer = AuditLog()
+        writer.init_app(self.app)
+        writer.enqueue([spooled_row("mine")])
+        (name,) = os.listdir(self.spool_dir)
+        self.assertRegex(name, rf"^audit-{os.getpid()}-\w+\.ndjson$")
+
+        self.assertEqual(writer.replay_spool(), 0)
+        writer.flush()
+        self.assertEqual(self.logged(), ["mine"])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
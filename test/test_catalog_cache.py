@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+from helpers import auth_headers, create_test_app
+from common.catalog_cache import CatalogCache, catalog_cache
+from models import db, Item, User
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            alice = User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                         password="alicepass", credit=10, is_active=True)
+            db.session.add_all([alice, Item(id="apple", name="Apple", stock=5, price=1)])
+            db.session.commit()
+            self.alice = auth_headers(self.app, alice)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_a_change_made_by_another_worker_is_served(self):
+        first = self.client.get("/items/all")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertEqual(self.client.get("/items/all", headers={"If-None-Match": etag}).status_code, 304)
+
+        # Another worker has its own CatalogCache, sharing only the database
+        other_worker = CatalogCache()
+        other_worker.init_app(self.app)
+        with self.app.app_context():
+            db.session.get(Item, "apple").stock = 4
+            other_worker.bump()
+            db.session.commit()
+
+        second = self.client.get("/items/all", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers["ETag"], etag)
+        self.assertEqual(second.get_json()["items"][0]["stock"], 4)
+
+    def test_workers_agree_on_the_version(self):
+        workers = [CatalogCache(), CatalogCache()]
+        for worker in workers:
+            worker.init_app(self.app)
+        with self.app.app_context():
+            self.assertEqual({worker.version() for worker in workers}, {"0"})
+            workers[0].bump()
+            db.session.commit()
+            workers[0].bump()
+            db.session.commit()
+            self.assertEqual({worker.version() for worker in workers}, {"2"})
+
+    def test_the_bump_commits_and_rolls_back_with_the_change(self):
+        with self.app.app_context():
+            db.session.get(Item, "apple").stock = 4
+            catalog_cache.bump()
+            db.session.rollback()
+            self.assertEqual(catalog_cache.version(), "0")
+
+            response = self.client.post("/items/buy", headers=self.alice, json={"id": "apple", "quantity": 1, "uid": "alice"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(catalog_cache.version(), "1")
+
+    def test_a_failed_shared_cache_bump_does_not_fail_the_change(self):
+        worker = CatalogCache()
+        worker.init_app(self.app)
+        worker.versions = mock.Mock(**{"incr.side_effect": ConnectionError("Redis is down")})
+        with self.app.app_context(), self.assertLogs("common.catalog_cache", "ERROR"):
+            db.session.get(Item, "apple").stock = 4
+            worker.bump()
+            db.session.commit()
+            self.assertEqual(db.session.get(Item, "apple").stock, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import base64
+import importlib.util
+import io
+import tempfile
+import threading
+import unittest
+
+from helpers import auth_headers, create_test_app
+from common.images import image_path, is_inline_image, store_image
+from models import db, Item, User
+
+# A 1x1 grayscale PNG
+PNG_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAACklEQVR4nGNgAAAAAgABSK+kcQAAAABJRU5ErkJggg=="
+
+
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app(IMAGE_STORE_DIR=tempfile.mkdtemp())
+        with self.app.app_context():
+            admin = User(uid="admin", name="Admin", cat="ADMIN", email="admin@example.com",
+                         password="adminpass", credit=0, is_active=True)
+            db.session.add(admin)
+            db.session.commit()
+            self.headers = auth_headers(self.app, admin)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_only_data_uris_and_base64_images_are_inline(self):
+        for value in (PNG_BASE64, f"data:image/png;base64,{PNG_BASE64}", "data:image/png;base64,???"):
+            with self.subTest(value=value[:30]):
+                self.assertTrue(is_inline_image(value))
+        for value in (None, "", "https://example.com/apple.png", "/images/abc", "images/apple.png",
+                      "apple.png", "ftp://example.com/apple.png", "abcd", "c3VwZXJsb25ndGV4dG5vdGFuaW1hZ2U="):
+            with self.subTest(value=value):
+                self.assertFalse(is_inline_image(value))
+
+    def create_item(self, image):
+        return self.client.post("/items/create", headers=self.headers, json={
+            "item": {"name": "Apple", "stock": 1, "price": 1, "image": image},
+        })
+
+    def test_references_are_kept_and_inline_images_stored(self):
+        self.assertEqual(self.create_item("img/apple.png").status_code, 201)
+        self.assertEqual(self.create_item(PNG_BASE64).status_code, 201)
+        self.assertEqual(self.create_item("data:image/png;base64,???").status_code, 400)
+
+        with self.app.app_context():
+            images = sorted(item.image for item in Item.query.all())
+        self.assertEqual(len(images), 2)
+        self.assertTrue(images[0].startswith("/images/"))
+        self.assertEqual(images[1], "img/apple.png")
+
+    def test_concurrent_stores_of_the_same_image(self):
+        data = base64.b64decode(PNG_BASE64)
+        errors = []
+
+        def store():
+            with self.app.app_context():
+                try:
+                    store_image(data)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=store) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with self.app.app_context():
+            with open(image_path(store_image(data)), "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    @unittest.skipUnless(importlib.util.find_spec("PIL"), "needs Pillow")
+    def test_unreadable_images_are_refused(self):
+        from PIL import Image
+
+        truncated = base64.b64decode(PNG_BASE64)[:40]
+        garbage = bytes.fromhex("89504e470d0a1a0a") + b"\0" * 64
+        out = io.BytesIO()
+        Image.new("L", (200, 200)).save(out, format="PNG")
+        with self.app.app_context():
+            for data in (truncated, garbage):
+                with self.assertRaisesRegex(ValueError, "Unsupported image type"):
+                    store_image(data)
+            self.app.config["IMAGE_MAX_PIXELS"] = 100 * 100
+            with self.assertRaisesRegex(ValueError, "Image is too large"):
+                store_image(out.getvalue())
+
+        response = self.client.post("/images/upload", headers=self.headers,
+                                    data={"file": (io.BytesIO(garbage), "apple.png")})
+        self.assertEqual((response.status_code, response.get_json()["message"]), (400, "Unsupported image type"))
+        self.assertEqual(self.create_item(base64.b64encode(truncated).decode()).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
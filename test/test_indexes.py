@@ -0,0 +1,52 @@
+import unittest
+
+from sqlalchemy import text
+
+from helpers import create_test_app
+from models import db
+
+# Hot lookups and the index each one is expected to use
+HOT_QUERIES = [
+    ("SELECT * FROM transactions WHERE uid = :value", "ix_transactions_uid_created_at"),
+    ("SELECT * FROM transactions WHERE item = :value", "ix_transactions_item"),
+    ("SELECT * FROM usertasks WHERE uid = :value", "uq_usertasks_occurrence"),
+    ("SELECT * FROM usertasks WHERE task = :value", "ix_usertasks_task"),
+    ("SELECT * FROM tasks WHERE created_by = :value", "ix_tasks_created_by"),
+    ("SELECT * FROM itemrequests WHERE requested_by = :value", "ix_itemrequests_requested_by"),
+    ("SELECT * FROM logs WHERE uid = :value", "ix_logs_uid"),
+    ("SELECT * FROM logs WHERE cat = :value AND timestamp >= '2025-01-01'", "ix_logs_cat_timestamp"),
+    ("SELECT * FROM logs WHERE entity_type = 'ITEM' AND entity_id = :value ORDER BY timestamp DESC", "ix_logs_entity"),
+]
+
+
+class TestIndexUsage(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def explain(self, query):
+        dialect = db.engine.dialect.name
+        if dialect == "sqlite":
+            rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {query}"), {"value": "x"})
+            return "\n".join(row[-1] for row in rows)
+        if dialect == "postgresql":
+            # The test tables are nearly empty, so a sequential scan would always win
+            db.session.execute(text("SET LOCAL enable_seqscan = off"))
+            rows = db.session.execute(text(f"EXPLAIN {query}"), {"value": "x"})
+            return "\n".join(row[0] for row in rows)
+        self.skipTest(f"No EXPLAIN support for {dialect}")
+
+    def test_hot_queries_use_indexes(self):
+        with self.app.app_context():
+            for query, index in HOT_QUERIES:
+                with self.subTest(query=query):
+                    self.assertIn(index, self.explain(query))
+
+
+if __name__ == "__main__":
+    unittest.main()
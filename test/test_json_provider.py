@@ -0,0 +1,68 @@
+import datetime
+import decimal
+import unittest
+import uuid
+from unittest import mock
+
+from helpers import create_test_app
+from common import json_provider
+from models import db, Task, Transaction, User
+
+
+class TestJSONProvider(unittest.TestCase):
+
+    VALUE = {
+        "when": datetime.datetime(2030, 1, 2, 3, 4, 5, 600000, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2030, 1, 2),
+        "amount": decimal.Decimal("12.50"),
+        "id": uuid.UUID(int=1),
+        "names": ["a", "ü"],
+    }
+
+    def setUp(self):
+        self.app = create_test_app()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_orjson_and_the_fallback_write_the_same_json(self):
+        with self.app.app_context():
+            fast = self.app.json.response(self.VALUE).get_data()
+            with mock.patch.object(json_provider, "orjson", None):
+                fallback = self.app.json.response(self.VALUE).get_data()
+        self.assertEqual(fast, fallback)
+        self.assertEqual(self.app.json.loads(fast), {
+            "when": "2030-01-02T03:04:05.600000+00:00",
+            "day": "2030-01-02",
+            "amount": "12.50",
+            "id": "00000000-0000-0000-0000-000000000001",
+            "names": ["a", "ü"],
+        })
+
+    def test_profile_dates_and_decimals(self):
+        with self.app.app_context():
+            db.session.add_all([
+                User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                     password="alicepass", credit=decimal.Decimal("7.50"), is_active=True),
+                Task(id="sweep", name="Sweep", created_by="alice", reward=decimal.Decimal("3.00"),
+                     start_time=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)),
+                Transaction(id="tx", uid="alice", item="apple", quantity=1, status="CONFIRMED",
+                            created_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)),
+            ])
+            db.session.commit()
+
+        profile = self.app.test_client().get("/users/alice").get_json()
+        self.assertEqual(profile["user"]["credit"], 7.5)
+        self.assertEqual(profile["tasks"][0]["reward"], "3.00")
+        self.assertTrue(profile["tasks"][0]["start_time"].startswith("2030-01-01T00:00:00"))
+        self.assertTrue(profile["transactions"][0]["created_at"].startswith("2030-01-01T00:00:00"))
+
+    def test_invalid_request_json_is_a_bad_request(self):
+        response = self.app.test_client().post("/login", data=b"{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
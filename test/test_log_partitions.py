@@ -0,0 +1,53 @@
+import datetime
+import unittest
+
+from sqlalchemy import text
+
+from helpers import create_test_app
+from common.log_partitions import ensure_log_partitions, list_log_partitions
+from models import db, Log
+
+
+class TestLogPartitions(unittest.TestCase):
+    """Needs TEST_DATABASE_URI to point at PostgreSQL; skipped on other databases."""
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            if db.engine.dialect.name != "postgresql":
+                self.skipTest("Partitioning needs PostgreSQL")
+            # The logs table of a fresh ddl.sql install before its monthly
+            # partitions: only the default partition
+            columns = ", ".join(f"{column.name} {column.type.compile(db.engine.dialect)}"
+                                for column in Log.__table__.columns)
+            db.session.execute(text("DROP TABLE logs"))
+            db.session.execute(text(f"CREATE TABLE logs ({columns}, PRIMARY KEY (id, timestamp)) "
+                                    "PARTITION BY RANGE (timestamp)"))
+            db.session.execute(text("CREATE TABLE logs_default PARTITION OF logs DEFAULT"))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.session.execute(text("DROP TABLE IF EXISTS logs CASCADE"))
+            db.session.commit()
+            db.drop_all()
+
+    def test_rows_in_the_default_partition_move_to_the_new_one(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self.app.app_context():
+            db.session.add(Log(id="log1", cat="ITEM", timestamp=now, description="written before"))
+            db.session.commit()
+
+            created = ensure_log_partitions(months_ahead=1)
+            self.assertEqual(len(created), 2)
+            self.assertEqual([name for name, _ in list_log_partitions()], created)
+
+            this_month = f"logs_p{now:%Y%m}"
+            self.assertEqual(db.session.execute(text(f"SELECT id FROM {this_month}")).scalars().all(), ["log1"])
+            self.assertIsNone(db.session.execute(text("SELECT id FROM logs_default")).first())
+            self.assertEqual(db.session.get(Log, ("log1", now)).description, "written before")
+
+
+if __name__ == "__main__":
+    unittest.main()
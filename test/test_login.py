@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+from helpers import create_test_app
+from common.passwords import is_hashed, password_hasher
+from models import db, User
+
+
+class TestLogin(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app(PASSWORD_HASH_METHOD="pbkdf2:sha256:1000")
+        with self.app.app_context():
+            # Stored in plaintext, as before passwords were hashed
+            db.session.add(User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                                password="alicepass", credit=10, is_active=True))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, email="alice@example.com", password="alicepass"):
+        return self.client.post("/login", json={"email": email, "password": password})
+
+    def stored_password(self):
+        with self.app.app_context():
+            return db.session.get(User, "alice").password
+
+    def test_plaintext_password_is_rehashed_on_login(self):
+        self.assertEqual(self.login(password="wrong").status_code, 401)
+        self.assertEqual(self.stored_password(), "alicepass")
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertTrue(is_hashed(self.stored_password()))
+        self.assertNotIn("alicepass", self.stored_password())
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login(password="wrong").status_code, 401)
+        self.assertEqual(self.login(email="nobody@example.com").status_code, 401)
+
+    def test_reset_password_stores_a_hash(self):
+        response = self.client.post("/login/resetpassword",
+                                    json={"email": "alice@example.com", "password": "newpass"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_hashed(self.stored_password()))
+        self.assertEqual(self.login(password="newpass").status_code, 200)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_login_storm_is_shed_when_the_hash_queue_is_full(self):
+        self.app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=1,
+                               PASSWORD_HASH_METHOD="pbkdf2:sha256:200000")
+        password_hasher.init_app(self.app)
+
+        statuses = []
+
+        def login():
+            with self.app.test_client() as client:
+                response = client.post("/login", json={"email": "alice@example.com", "password": "alicepass"})
+                statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=login) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(200, statuses)
+        self.assertIn(503, statuses)
+        self.assertEqual(set(statuses), {200, 503})
+
+
+if __name__ == "__main__":
+    unittest.main()
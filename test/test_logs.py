@@ -0,0 +1,78 @@
+import base64
+import json
+import unittest
+
+from helpers import auth_headers, create_test_app
+from common.exceptions import AuthenticationException, AuthorizationException
+from models import db, User
+
+
+class TestEntityHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            admin = User(uid="admin", name="Admin", cat="ADMIN", email="admin@example.com",
+                         password="adminpass", credit=0, is_active=True)
+            alice = User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                         password="alicepass", credit=0, is_active=True)
+            db.session.add_all([admin, alice])
+            db.session.commit()
+            self.admin = auth_headers(self.app, admin)
+            self.alice = auth_headers(self.app, alice)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_item_history_newest_first_with_diffs(self):
+        response = self.client.post("/items/create", headers=self.admin,
+                                    json={"item": {"name": "Apple", "stock": 5, "price": 1}})
+        item_id = response.get_json()["id"]
+        self.client.patch(f"/items/{item_id}/update", headers=self.admin, json={"item": {"price": 2, "stock": 5}})
+        self.client.delete(f"/items/{item_id}/delete", headers=self.admin)
+
+        response = self.client.get(f"/logs/entity/item/{item_id}", headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        logs = response.get_json()["logs"]
+        self.assertEqual([log["action"] for log in logs], ["delete", "update", "create"])
+        self.assertEqual({log["entity_id"] for log in logs}, {item_id})
+        self.assertEqual(logs[1]["diff"], {"price": {"before": 1, "after": 2}})
+        self.assertIsNone(logs[2]["diff"])
+
+    def test_public_log_routes_leave_out_diffs(self):
+        response = self.client.post("/items/create", headers=self.admin,
+                                    json={"item": {"name": "Apple", "stock": 5, "price": 1}})
+        item_id = response.get_json()["id"]
+        self.client.patch(f"/items/{item_id}/update", headers=self.admin, json={"item": {"price": 2, "stock": 5}})
+
+        response = self.client.get("/logs/all")
+        self.assertEqual(response.status_code, 200)
+        logs = response.get_json()["logs"]
+        self.assertEqual(len(logs), 2)
+        self.assertFalse(any("diff" in log for log in logs))
+
+        response = self.client.get("/logs/export")
+        self.assertEqual(response.status_code, 200)
+        exported = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(exported), 2)
+        self.assertFalse(any("diff" in log for log in exported))
+
+    def test_malformed_cursors_are_refused(self):
+        for values in ([1, "x"], ["yesterday", "x"], {"timestamp": None}):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            with self.subTest(cursor=values):
+                response = self.client.get("/logs/all", query_string={"cursor": cursor})
+                self.assertEqual((response.status_code, response.get_json()["message"]), (400, "Invalid cursor"))
+
+    def test_history_is_for_admins(self):
+        with self.assertRaises(AuthorizationException):
+            self.client.get("/logs/entity/ITEM/apple", headers=self.alice)
+        with self.assertRaises(AuthenticationException):
+            self.client.get("/logs/entity/ITEM/apple")
+
+
+if __name__ == "__main__":
+    unittest.main()
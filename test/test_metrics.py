@@ -0,0 +1,47 @@
+import unittest
+
+from prometheus_client import REGISTRY
+
+from helpers import create_test_app
+from models import db, Item
+
+
+class TestMetrics(unittest.TestCase):
+
+    LABELS = {"method": "GET", "endpoint": "/items/<string:item_id>"}
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            db.session.add(Item(id="apple", name="Apple", stock=5, price=1))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, {**self.LABELS, **labels}) or 0.0
+
+    def test_requests_and_sql_statements_are_counted_per_endpoint(self):
+        requests_before = self.sample("http_requests_total", status="200")
+        not_found_before = self.sample("http_requests_total", status="404")
+        statements_before = self.sample("http_request_sql_statements_sum")
+
+        self.assertEqual(self.client.get("/items/apple").status_code, 200)
+        self.assertEqual(self.client.get("/items/pear").status_code, 404)
+
+        self.assertEqual(self.sample("http_requests_total", status="200") - requests_before, 1)
+        self.assertEqual(self.sample("http_requests_total", status="404") - not_found_before, 1)
+        self.assertGreaterEqual(self.sample("http_request_sql_statements_sum") - statements_before, 2)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_count{endpoint="/items/<string:item_id>",method="GET"}',
+                      response.get_data(as_text=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
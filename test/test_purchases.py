@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+
+from helpers import create_test_app, auth_headers
+from models import db, Item, User, Transaction
+
+
+class TestConcurrentPurchases(unittest.TestCase):
+
+    STOCK = 20
+    BUYERS = 8
+    ATTEMPTS_PER_BUYER = 10
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            self.buyers = [
+                User(uid=f"buyer{i}", name=f"Buyer {i}", cat="USER", email=f"buyer{i}@example.com",
+                     password="pw", credit=1000, is_active=True)
+                for i in range(self.BUYERS)
+            ]
+            db.session.add_all(self.buyers)
+            db.session.add(Item(id="hot", name="Hot item", stock=self.STOCK, price=3))
+            db.session.commit()
+            self.headers = [auth_headers(self.app, buyer) for buyer in self.buyers]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _hammer(self, payload_for, headers_for):
+        statuses = []
+        lock = threading.Lock()
+
+        def worker(i):
+            client = self.app.test_client()
+            for _ in range(self.ATTEMPTS_PER_BUYER):
+                response = client.post("/items/buy", json=payload_for(i), headers=headers_for(i))
+                with lock:
+                    statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.BUYERS)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        print(f"\n{len(statuses)} purchase attempts on one hot item in {elapsed:.2f}s "
+              f"({len(statuses) / elapsed:.0f} req/s, {statuses.count(200)} succeeded)")
+        return statuses
+
+    def test_no_oversell_under_contention(self):
+        statuses = self._hammer(
+            lambda i: {"id": "hot", "quantity": 1, "uid": f"buyer{i}"},
+            lambda i: self.headers[i],
+        )
+        self.assertNotIn(500, statuses)
+        self.assertEqual(statuses.count(200), self.STOCK)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Item, "hot").stock, 0)
+            sold = sum(tx.quantity for tx in Transaction.query.filter_by(item="hot"))
+            self.assertEqual(sold, self.STOCK)
+            spent = sum(1000 - user.credit for user in User.query.all())
+            self.assertEqual(spent, self.STOCK * 3)
+
+    def test_credit_never_negative_under_contention(self):
+        # Every buyer spends on behalf of buyer0, who can afford only 5 units
+        with self.app.app_context():
+            db.session.get(User, "buyer0").credit = 15
+            db.session.commit()
+
+        statuses = self._hammer(
+            lambda i: {"id": "hot", "quantity": 1, "uid": "buyer0"},
+            lambda i: self.headers[i],
+        )
+        self.assertNotIn(500, statuses)
+        self.assertEqual(statuses.count(200), 5)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(User, "buyer0").credit, 0)
+            self.assertEqual(db.session.get(Item, "hot").stock, self.STOCK - 5)
+
+
+    def test_checkout_is_all_or_nothing(self):
+        with self.app.app_context():
+            db.session.add(Item(id="rare", name="Rare item", stock=1, price=5))
+            db.session.commit()
+
+        client = self.app.test_client()
+        response = client.post("/items/checkout", json={
+            "uid": "buyer0",
+            "items": [{"id": "hot", "quantity": 2}, {"id": "rare", "quantity": 2}],
+        }, headers=self.headers[0])
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post("/items/checkout", json={
+            "uid": "buyer0",
+            "items": [{"id": "rare", "quantity": 1}, {"id": "hot", "quantity": 2}],
+        }, headers=self.headers[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["transaction_ids"]), 2)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Item, "hot").stock, self.STOCK - 2)
+            self.assertEqual(db.session.get(Item, "rare").stock, 0)
+            self.assertEqual(db.session.get(User, "buyer0").credit, 1000 - 11)
+            self.assertEqual(Transaction.query.count(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
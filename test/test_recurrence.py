@@ -0,0 +1,127 @@
+import datetime
+import unittest
+
+from sqlalchemy.exc import IntegrityError
+
+from helpers import auth_headers, create_test_app
+from common.recurrence import MAX_OCCURRENCES, materialize_occurrence, next_occurrence, task_occurrences
+from models import db, Task, User, UserTask
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+def weekly_task(**fields):
+    # Every 7 days from 2030-01-01, each occurrence lasting one day
+    return Task(**{"id": "weekly", "name": "Weekly", "created_by": "alice", "reward": 1,
+                   "start_time": utc(2030, 1, 1), "deadline": utc(2030, 1, 2),
+                   "is_recurring": True, "recurrence_interval": 7, **fields})
+
+
+class TestOccurrences(unittest.TestCase):
+
+    def starts(self, task, since, until):
+        return [o["start_time"].day for o in task_occurrences(task, since, until)]
+
+    def test_occurrences_step_by_the_interval(self):
+        occurrences = task_occurrences(weekly_task(), utc(2030, 1, 1), utc(2030, 1, 22))
+        self.assertEqual([o["index"] for o in occurrences], [0, 1, 2])
+        self.assertEqual([o["start_time"] for o in occurrences], [utc(2030, 1, 1), utc(2030, 1, 8), utc(2030, 1, 15)])
+        self.assertEqual(occurrences[1]["end_time"], utc(2030, 1, 9))
+
+    def test_window_bounds(self):
+        task = weekly_task()
+        # An occurrence still running at the window start is included
+        self.assertEqual(self.starts(task, utc(2030, 1, 8, 12), utc(2030, 1, 16)), [8, 15])
+        # One ending exactly at the window start, or starting at its end, is not
+        self.assertEqual(self.starts(task, utc(2030, 1, 9), utc(2030, 1, 15)), [])
+        # Nothing before the first occurrence
+        self.assertEqual(self.starts(task, utc(2029, 12, 1), utc(2030, 1, 2)), [1])
+
+    def test_occurrences_are_capped(self):
+        task = weekly_task(recurrence_interval=1)
+        self.assertEqual(len(task_occurrences(task, utc(2030, 1, 1), utc(2032, 1, 1))), MAX_OCCURRENCES)
+
+    def test_next_occurrence(self):
+        task = weekly_task()
+        self.assertEqual(next_occurrence(task, now=utc(2029, 6, 1))["index"], 0)
+        self.assertEqual(next_occurrence(task, now=utc(2030, 1, 8, 12))["index"], 1)
+        self.assertEqual(next_occurrence(task, now=utc(2030, 1, 9))["index"], 2)
+
+    def test_one_off_tasks_have_a_single_occurrence(self):
+        task = weekly_task(is_recurring=False, recurrence_interval=None)
+        self.assertEqual(self.starts(task, utc(2029, 1, 1), utc(2031, 1, 1)), [1])
+        self.assertEqual(self.starts(task, utc(2030, 1, 2), utc(2031, 1, 1)), [])
+        self.assertIsNone(next_occurrence(task, now=utc(2030, 1, 3)))
+
+
+class TestTaskApplications(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            alice = User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                         password="alicepass", credit=0, is_active=True)
+            db.session.add_all([
+                alice,
+                weekly_task(),
+                weekly_task(id="once", name="Once", is_recurring=False, recurrence_interval=None),
+                weekly_task(id="unscheduled", name="Unscheduled", is_recurring=False, recurrence_interval=None,
+                            start_time=None, deadline=None),
+            ])
+            db.session.commit()
+            self.headers = auth_headers(self.app, alice)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def apply(self, task_id, **fields):
+        return self.client.post("/tasks/apply", headers=self.headers, json={"uid": "alice", "id": task_id, **fields})
+
+    def usertasks(self, task_id):
+        with self.app.app_context():
+            return UserTask.query.filter_by(uid="alice", task=task_id).count()
+
+    def test_occurrences_carry_the_users_status(self):
+        self.assertEqual(self.apply("weekly", occurrence=1).status_code, 201)
+        response = self.client.get("/tasks/weekly/occurrences",
+                                   query_string={"since": "2030-01-01T00:00:00Z", "until": "2030-01-22T00:00:00Z", "uid": "alice"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(o["index"], o["status"]) for o in response.get_json()["occurrences"]],
+                         [(0, "OPEN"), (1, "APPLIED"), (2, "OPEN")])
+
+    def test_duplicate_applications_are_refused(self):
+        self.assertEqual(self.apply("weekly", occurrence=1).status_code, 201)
+        self.assertEqual(self.apply("weekly", occurrence=1).status_code, 400)
+        self.assertEqual(self.apply("weekly", occurrence=2).status_code, 201)
+        self.assertEqual(self.usertasks("weekly"), 2)
+
+    def test_one_off_tasks_are_applied_for_once(self):
+        for task_id in ("once", "unscheduled"):
+            with self.subTest(task=task_id):
+                self.assertEqual(self.apply(task_id).status_code, 201)
+                response = self.apply(task_id)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()["message"], "Already applied for this occurrence")
+                self.assertEqual(self.usertasks(task_id), 1)
+
+    def test_duplicates_missed_by_the_check_are_refused_by_the_index(self):
+        # As two concurrent applications would: both rows pass the lookup
+        with self.app.app_context():
+            task = db.session.get(Task, "unscheduled")
+            db.session.add_all([materialize_occurrence(task, "alice", 0, "APPLIED") for _ in range(2)])
+            with self.assertRaises(IntegrityError):
+                db.session.commit()
+
+    def test_occurrence_must_be_an_index(self):
+        for occurrence in (True, False, -1, "1"):
+            with self.subTest(occurrence=occurrence):
+                self.assertEqual(self.apply("weekly", occurrence=occurrence).status_code, 400)
+        self.assertEqual(self.usertasks("weekly"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from helpers import auth_headers, create_test_app
+from common.replicas import replicas
+from models import db, Item, User
+
+
+class TestReplicas(unittest.TestCase):
+    """A second SQLite file stands in for the replica, seeded with different names."""
+
+    def setUp(self):
+        fd, self.replica_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_test_app(SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{self.replica_path}"])
+        with self.app.app_context():
+            for bind, prefix in ((db.engine, "Primary"), (replicas.engines[0], "Replica")):
+                db.metadata.create_all(bind)
+                with db.Session(bind=bind) as session:
+                    session.add_all([
+                        User(uid="alice", name=f"{prefix} Alice", cat="USER", email="alice@example.com",
+                             password="alicepass", credit=10, is_active=True),
+                        Item(id="apple", name=f"{prefix} Apple", stock=5, price=1),
+                    ])
+                    session.commit()
+            self.alice = db.session.get(User, "alice")
+        self.client = self.app.test_client()
+        self.headers = auth_headers(self.app, self.alice)
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        for engine in replicas.engines:
+            engine.dispose()
+        os.remove(self.replica_path)
+
+    def profile_name(self, headers=None):
+        response = self.client.get("/users/alice", headers=headers or {})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()["user"]["name"]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.profile_name(self.headers), "Replica Alice")
+
+    def test_client_reads_its_own_writes_from_the_primary(self):
+        response = self.client.patch("/users/alice/update", headers=self.headers,
+                                     json={"user": {"name": "New Alice"}})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.profile_name(self.headers), "New Alice")
+        # Other clients may still read the lagging replica
+        self.assertEqual(self.profile_name(), "Replica Alice")
+
+    def test_lagging_replica_falls_back_to_the_primary(self):
+        replicas.replication_lag = lambda engine: replicas.max_lag + 60
+        replicas._checked_at = None
+        try:
+            self.assertEqual(self.profile_name(self.headers), "Primary Alice")
+        finally:
+            del replicas.replication_lag
+            replicas._checked_at = None
+
+    def test_catalog_reads_stay_on_the_primary(self):
+        response = self.client.get("/items/apple")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["item"]["name"], "Primary Apple")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import datetime
+import unittest
+
+from sqlalchemy import select, text
+
+from helpers import auth_headers, create_test_app
+from common.rollups import backfill_rollups, update_rollups
+from models import db, Log, LogRollup, User
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+# Logs on both sides of midnight UTC, which is mid-morning in Singapore
+LOGS = [
+    ("log1", utc(2030, 1, 1, 9), "admin", "ITEM", "create", "User admin created item apple"),
+    ("log2", utc(2030, 1, 1, 23, 30), "alice", "TRANSACTION", "buy", "User alice bought 1 apple"),
+    ("log3", utc(2030, 1, 2, 0, 30), "alice", "TRANSACTION", "buy", "User alice bought 1 apple"),
+    ("log4", utc(2030, 1, 2, 1), "alice", "TRANSACTION", "preorder", "User alice preordered 1 apple"),
+    ("log5", utc(2030, 1, 2, 1), None, "ITEM", None, "Item apple restocked"),
+]
+
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            admin = User(uid="admin", name="Admin", cat="ADMIN", email="admin@example.com",
+                         password="adminpass", credit=0, is_active=True)
+            db.session.add(admin)
+            rows = [
+                {"id": id, "timestamp": timestamp, "uid": uid, "cat": cat, "action": action, "description": description}
+                for id, timestamp, uid, cat, action, description in LOGS
+            ]
+            # As the audit writer does: insert the logs and count them incrementally
+            db.session.add_all([Log(**row) for row in rows])
+            update_rollups(rows)
+            db.session.commit()
+            self.headers = auth_headers(self.app, admin)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    @staticmethod
+    def rollups():
+        return sorted(db.session.execute(
+            select(LogRollup.day, LogRollup.cat, LogRollup.uid, LogRollup.action, LogRollup.count)
+        ).all())
+
+    def test_backfill_agrees_with_incremental_updates(self):
+        with self.app.app_context():
+            incremental = self.rollups()
+            self.assertEqual(len(incremental), 5)
+            if db.engine.dialect.name == "postgresql":
+                # Days are UTC whatever the session's time zone
+                db.session.execute(text("SET LOCAL TIME ZONE 'Asia/Singapore'"))
+            backfill_rollups()
+            self.assertEqual(self.rollups(), incremental)
+
+    def test_daily_purchases(self):
+        response = self.client.get("/reports/purchases/daily", headers=self.headers,
+                                   query_string={"since": "2030-01-01", "until": "2030-01-03"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["purchases"], [
+            {"day": "2030-01-01", "buy": 1, "preorder": 0},
+            {"day": "2030-01-02", "buy": 1, "preorder": 1},
+        ])
+
+    def test_user_activity(self):
+        response = self.client.get("/reports/users/alice/activity", headers=self.headers,
+                                   query_string={"since": "2030-01-01", "until": "2030-01-03"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["total"], 3)
+        self.assertEqual([(a["day"], a["action"]) for a in response.get_json()["activity"]],
+                         [("2030-01-01", "buy"), ("2030-01-02", "buy"), ("2030-01-02", "preorder")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from helpers import create_test_app
+from common.exceptions import SchemaVersionException
+from common.schema import available_migrations, check_schema_version, latest_version, stamp, upgrade
+from models import db, SchemaVersion
+
+
+class TestSchemaVersion(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            db.drop_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_migrations_are_numbered_in_sequence(self):
+        versions = [number for number, _, _ in available_migrations()]
+        self.assertEqual(versions, list(range(len(versions))))
+
+    def test_startup_check_needs_an_upgraded_database(self):
+        with self.app.app_context():
+            with self.assertRaises(SchemaVersionException):
+                check_schema_version()
+
+            upgrade()
+            check_schema_version()
+            self.assertIn("users", sa.inspect(db.engine).get_table_names())
+            self.assertEqual(db.session.scalar(sa.select(sa.func.max(SchemaVersion.version))), latest_version())
+            self.assertEqual(upgrade(), [])
+
+    def test_database_behind_the_code_is_refused(self):
+        with self.app.app_context():
+            stamp(latest_version() - 1)
+            with self.assertRaises(SchemaVersionException):
+                check_schema_version()
+
+
+class TestSchemaVersionUnderTheCli(unittest.TestCase):
+
+    def setUp(self):
+        # As loaded by the flask CLI, against a database with no schema version
+        with mock.patch.dict(os.environ, {"FLASK_RUN_FROM_CLI": "true"}):
+            self.app = create_test_app(SCHEMA_VERSION_CHECK=True)
+        self.runner = self.app.test_cli_runner()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_only_db_commands_run_on_an_old_schema(self):
+        result = self.runner.invoke(args=["reports", "backfill"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("flask db upgrade", result.output)
+        with self.assertRaises(SchemaVersionException):
+            self.app.test_client().get("/items/all")
+
+        result = self.runner.invoke(args=["db", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        result = self.runner.invoke(args=["reports", "backfill"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.app.test_client().get("/items/all").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from flask import jsonify
+
+from helpers import create_test_app
+from common.exceptions import NPlusOneQueryException
+from common.sql_profiler import statement_shape
+from models import db, Item
+
+
+class TestSQLProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        with self.app.app_context():
+            db.session.add_all([Item(id=f"item{i}", name=f"Item {i}", stock=1, price=1) for i in range(10)])
+            db.session.commit()
+
+        @self.app.route("/test/items/one-by-one")
+        def items_one_by_one():
+            # A lookup in a loop: the N+1 pattern the profiler reports
+            names = [db.session.get(Item, f"item{i}").name for i in range(10)]
+            return jsonify(names)
+
+        @self.app.route("/test/items/batched")
+        def items_batched():
+            items = Item.query.filter(Item.id.in_([f"item{i}" for i in range(10)])).all()
+            return jsonify([item.name for item in items])
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_statement_shape_ignores_values(self):
+        self.assertEqual(
+            statement_shape("SELECT * FROM items WHERE id = 'a' AND stock >= 3 LIMIT ?"),
+            statement_shape("SELECT * FROM items\n WHERE id = 'b' AND stock >= 10 LIMIT ?"),
+        )
+        self.assertEqual(
+            statement_shape("SELECT * FROM items WHERE id IN (?, ?)"),
+            statement_shape("SELECT * FROM items WHERE id IN (?, ?, ?, ?)"),
+        )
+
+    def test_repeated_statements_raise(self):
+        with self.assertRaises(NPlusOneQueryException) as raised:
+            self.client.get("/test/items/one-by-one")
+        self.assertIn("GET /test/items/one-by-one", str(raised.exception))
+        self.assertIn("10 x SELECT", str(raised.exception))
+        self.assertIn("from test/test_sql_profiler.py:", str(raised.exception))
+
+        self.assertEqual(self.client.get("/test/items/batched").status_code, 200)
+
+    def test_repeated_statements_are_logged_in_log_mode(self):
+        app = create_test_app(SQL_PROFILER="log", SQL_SLOW_QUERY_MS=0)
+        app.add_url_rule("/test/items/one-by-one", view_func=self.app.view_functions["items_one_by_one"])
+        with app.app_context():
+            db.session.add_all([Item(id=f"item{i}", name=f"Item {i}", stock=1, price=1) for i in range(10)])
+            db.session.commit()
+
+        with self.assertLogs("common.sql_profiler", level="WARNING") as logs:
+            self.assertEqual(app.test_client().get("/test/items/one-by-one").status_code, 200)
+        self.assertTrue(any("Slow query" in line for line in logs.output))
+        self.assertTrue(any("Repeated queries in GET /test/items/one-by-one" in line for line in logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
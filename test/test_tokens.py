@@ -0,0 +1,153 @@
+import importlib.util
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
+
+from helpers import create_test_app
+from common.exceptions import AuthenticationException, AuthorizationException
+from common.tokens import revoked_tokens
+from models import db, User
+
+
+class TokenTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.app = create_test_app(PASSWORD_HASH_METHOD="pbkdf2:sha256:1000", **self.config)
+        with self.app.app_context():
+            db.session.add_all([
+                User(uid="admin", name="Admin", cat="ADMIN", email="admin@example.com",
+                     password="adminpass", credit=0, is_active=True),
+                User(uid="staff", name="Staff", cat="ADMIN", email="staff@example.com",
+                     password="staffpass", credit=0, is_active=True),
+            ])
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.admin = self.login("admin@example.com", "adminpass")
+        self.staff = self.login("staff@example.com", "staffpass")
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, email, password):
+        response = self.client.post("/login", json={"email": email, "password": password})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    @staticmethod
+    def bearer(token):
+        return {"Authorization": f"Bearer {token}"}
+
+
+class TestTokenClaims(TokenTestCase):
+
+    def test_authorization_needs_no_queries(self):
+        statements = []
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        response = self.client.get("/users/cache/stats", headers=self.bearer(self.admin["token"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(statements, [])
+
+    def test_demotion_revokes_tokens_until_refresh(self):
+        response = self.client.patch("/users/staff/update", json={"user": {"cat": "USER"}},
+                                     headers=self.bearer(self.admin["token"]))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertRaises(AuthenticationException):
+            self.client.get("/users/cache/stats", headers=self.bearer(self.staff["token"]))
+
+        response = self.client.post("/login/refresh", headers=self.bearer(self.staff["refresh_token"]))
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            claims = decode_token(response.get_json()["token"], allow_expired=True)
+        self.assertEqual(claims["cat"], "USER")
+
+    def test_suspended_user_cannot_refresh(self):
+        response = self.client.patch("/users/staff/suspend", headers=self.bearer(self.admin["token"]))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post("/login/refresh", headers=self.bearer(self.staff["refresh_token"]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_issued_right_after_reactivation_is_accepted(self):
+        for is_active in (False, True):
+            response = self.client.patch("/users/staff/update", json={"user": {"is_active": is_active}},
+                                         headers=self.bearer(self.admin["token"]))
+            self.assertEqual(response.status_code, 200)
+
+        # Issued within the second of the reactivation's revocation
+        staff = self.login("staff@example.com", "staffpass")
+        response = self.client.get("/users/cache/stats", headers=self.bearer(staff["token"]))
+        self.assertEqual(response.status_code, 200)
+
+
+class TestTokensWithSeveralWorkers(TokenTestCase):
+    # No REVOCATION_CACHE_URL: each worker only sees its own revocations
+    config = {"WORKERS": 2}
+
+    def test_suspension_by_another_worker_is_enforced(self):
+        response = self.client.patch("/users/staff/suspend", headers=self.bearer(self.admin["token"]))
+        self.assertEqual(response.status_code, 200)
+        # As if the suspension had been handled by another worker
+        revoked_tokens.backend.clear()
+
+        with self.assertRaises(AuthorizationException):
+            self.client.get("/users/cache/stats", headers=self.bearer(self.staff["token"]))
+        response = self.client.get("/users/cache/stats", headers=self.bearer(self.admin["token"]))
+        self.assertEqual(response.status_code, 200)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestGunicornWorkerCount(unittest.TestCase):
+    """gunicorn.conf.py hands gunicorn's worker count to the app's WORKERS."""
+
+    def start_gunicorn(self, *args, environ=None):
+        """Run gunicorn's on_starting hook for a command line; return the WORKERS a worker would read."""
+        from gunicorn.app.wsgiapp import WSGIApplication
+
+        argv = ["gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), *args, "main:app"]
+        with mock.patch.dict(os.environ, environ or {}), mock.patch.object(sys, "argv", argv):
+            if environ is None:
+                os.environ.pop("WEB_CONCURRENCY", None)
+            server = SimpleNamespace(cfg=WSGIApplication().cfg, log=mock.Mock())
+            server.cfg.on_starting(server)
+            # Workers import config after the hook has run
+            spec = importlib.util.spec_from_file_location("worker_config", os.path.join(ROOT, "config.py"))
+            config = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(config)
+            return config.BaseConfig.WORKERS
+
+    def test_worker_count_from_the_command_line_reaches_the_app(self):
+        workers = self.start_gunicorn("-w", "4")
+        self.assertEqual(workers, 4)
+
+        app = create_test_app(WORKERS=workers)
+        self.addCleanup(self.drop, app)
+        self.assertFalse(revoked_tokens.sees_all_revocations)
+
+    def test_conflicting_worker_counts_refuse_to_start(self):
+        self.assertEqual(self.start_gunicorn(environ={"WEB_CONCURRENCY": "2"}), 2)
+        with self.assertRaises(SystemExit):
+            self.start_gunicorn("-w", "4", environ={"WEB_CONCURRENCY": "2"})
+        # A preloaded app has read WEB_CONCURRENCY before the hook runs
+        with self.assertRaises(SystemExit):
+            self.start_gunicorn("-w", "4", "--preload")
+
+    @staticmethod
+    def drop(app):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from helpers import create_test_app
+from common.user_cache import user_cache
+from models import db, User
+
+
+class TestUserCache(unittest.TestCase):
+
+    def create_app(self, **overrides):
+        app = create_test_app(**overrides)
+        with app.app_context():
+            db.session.add(User(uid="alice", name="Alice", cat="USER", email="alice@example.com",
+                                password="alicepass", credit=0, is_active=True))
+            db.session.commit()
+        self.addCleanup(self.drop, app)
+        return app
+
+    @staticmethod
+    def drop(app):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def load_twice(self, app):
+        with app.app_context():
+            misses = user_cache.stats()["misses"]
+            for _ in range(2):
+                self.assertEqual(user_cache.load("alice").uid, "alice")
+                db.session.remove()
+            return user_cache.stats()["misses"] - misses
+
+    def test_single_worker_caches_locally(self):
+        self.assertEqual(self.load_twice(self.create_app(WORKERS=1)), 1)
+
+    def test_several_workers_without_a_shared_backend_do_not_cache(self):
+        self.assertEqual(self.load_twice(self.create_app(WORKERS=4)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
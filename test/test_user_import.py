@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import select
+
+from helpers import auth_headers, create_test_app
+from models import db, Log, User
+
+
+class TestUserImport(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app(PASSWORD_HASH_METHOD="pbkdf2:sha256:1000")
+        with self.app.app_context():
+            admin = User(uid="admin", name="Admin", cat="ADMIN", email="admin@example.com",
+                         password="adminpass", credit=0, is_active=True)
+            db.session.add(admin)
+            db.session.commit()
+            self.headers = auth_headers(self.app, admin)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, email, password):
+        return self.client.post("/login", json={"email": email, "password": password}).status_code
+
+    def test_json_import_reports_bad_rows_and_keeps_the_rest(self):
+        response = self.client.post("/users/import", headers=self.headers, json={"users": [
+            {"name": "Alice", "email": "alice@example.com", "password": "alicepass", "credit": 5},
+            {"name": "Admin again", "email": "admin@example.com", "password": "x"},
+            {"name": "Bob", "email": "bob@example.com"},
+            {"name": "Alice again", "email": "alice@example.com", "password": "x"},
+            {"name": "Carol", "email": "carol@example.com", "password": "carolpass", "cat": "admin"},
+            {"name": "Dan", "email": "dan@example.com", "password": "danpass", "credit": "-1"},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([user["email"] for user in body["users"]], ["alice@example.com", "carol@example.com"])
+        self.assertEqual([(error["row"], error["message"]) for error in body["errors"]], [
+            (2, "User already exists"),
+            (3, "password required"),
+            (4, "User already exists"),
+            (6, "credit must be a non-negative number"),
+        ])
+
+        with self.app.app_context():
+            carol = db.session.scalars(select(User).filter_by(email="carol@example.com")).one()
+            self.assertEqual(carol.cat, "ADMIN")
+            self.assertNotEqual(carol.password, "carolpass")
+            logs = db.session.scalars(select(Log).filter_by(action="import")).all()
+            self.assertEqual(len(logs), 1)
+            self.assertEqual(len(logs[0].diff["users"]["after"]), 2)
+        self.assertEqual(self.login("alice@example.com", "alicepass"), 200)
+
+    def test_csv_import(self):
+        data = "name,email,password,credit\nAlice,alice@example.com,alicepass,2.50\nBob,,bobpass,\n"
+        response = self.client.post("/users/import", headers=self.headers, data=data, content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.get_json()["imported"], response.get_json()["failed"]), (1, 1))
+        self.assertEqual(self.login("alice@example.com", "alicepass"), 200)
+
+    def test_import_size_is_limited(self):
+        self.app.config["USER_IMPORT_MAX_ROWS"] = 1
+        users = [{"name": f"U{i}", "email": f"u{i}@example.com", "password": "pass"} for i in range(2)]
+        response = self.client.post("/users/import", headers=self.headers, json=users)
+        self.assertEqual(response.status_code, 413)
+
+    def test_cli_import(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("name,email,password\nAlice,alice@example.com,alicepass\n")
+        try:
+            result = self.app.test_cli_runner().invoke(args=["users", "import", path, "--by", "admin"])
+        finally:
+            os.remove(path)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Imported 1 users", result.output)
+        self.assertEqual(self.login("alice@example.com", "alicepass"), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,35 +1,38 @@
 # transactions.py
-import uuid
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import current_user
 from permissions.utils import user_logged_in, protected_update
-from models import db, Transaction, Log
+from models import db, Transaction
+from common.audit import audit_log
+from common.serializers import transaction_to_dict
 from common.utils import generate_update_diff
+from common.pagination import apply_filters, keyset_paginate
 
 transactions_bp = Blueprint("transactions", __name__)
 
-def transaction_to_dict(tx):
-    """Helper function to convert a Transaction object to a dict."""
-    return {
-        "id": tx.id,
-        "item": tx.item,
-        "uid": tx.uid,
-        "quantity": tx.quantity,
-        "status": tx.status
-    }
-
 @transactions_bp.route("/transactions/all", methods=["GET"])
 def get_all_transactions():
     """
     GET /transactions/all
+    Query: limit, cursor, status, uid, item
     Returns:
         {
-            "transactions": List[TransactionDict]
+            "transactions": List[TransactionDict],
+            "next_cursor": str | None
         }
     """
-    transactions = Transaction.query.all()
-    tx_list = [transaction_to_dict(tx) for tx in transactions]
-    return jsonify({"transactions": tx_list}), 200
+    query = apply_filters(transaction_to_dict.select(), request.args, {
+        "status": Transaction.status,
+        "uid": Transaction.uid,
+        "item": Transaction.item,
+    })
+    try:
+        transactions, next_cursor = keyset_paginate(query, [Transaction.id], request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    tx_list = [transaction_to_dict.from_row(tx) for tx in transactions]
+    return jsonify({"transactions": tx_list, "next_cursor": next_cursor}), 200
 
 @transactions_bp.route("/transactions/<string:id>", methods=["POST"])
 @user_logged_in()
@@ -61,8 +64,8 @@ def get_user_transactions(uid):
             "transactions": List[TransactionDict]
         }
     """
-    transactions = Transaction.query.filter_by(uid=uid).all()
-    tx_list = [transaction_to_dict(tx) for tx in transactions]
+    transactions = db.session.execute(transaction_to_dict.select().where(Transaction.uid == uid))
+    tx_list = [transaction_to_dict.from_row(tx) for tx in transactions]
     return jsonify({"transactions": tx_list}), 200
 
 
@@ -122,14 +125,16 @@ def update_transaction():
     if new_status is not None:
         transaction.status = new_status
 
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="TRANSACTION",
-        timestamp=db.func.current_timestamp(),
-        description=f"User {current_user.uid} updated transaction {tx_id}: {diff}",
+        uid=current_user.uid,
+        description=f"User {current_user.uid} updated transaction {tx_id}",
+        action="update",
+        entity_type="TRANSACTION",
+        entity_id=tx_id,
+        diff=diff,
+        sync=True,
     )
-    db.session.add(log_item)
 
     db.session.commit()
 
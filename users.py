@@ -1,12 +1,22 @@
 # users.py
+import datetime
 import uuid
 
-from flask import Blueprint, request, jsonify
+import click
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import current_user
-from models import db, User, Task, Transaction, Log
+from sqlalchemy import or_, select
+from models import db, User, Task, Transaction, UserTask
 
 from permissions.utils import user_logged_in, protected_update
+from common.audit import audit_log
+from common.exceptions import PasswordHashingBusyException
+from common.passwords import password_hasher
+from common.serializers import profile_user_to_dict, task_to_dict, transaction_to_dict
 from common.utils import generate_update_diff
+from common.tokens import revoked_tokens
+from common.user_import import import_users, parse_users
+from common.user_cache import user_cache
 
 users_bp = Blueprint('users', __name__)
 
@@ -15,9 +25,10 @@ users_bp = Blueprint('users', __name__)
 def get_user_by_uid(uid):
     """
     /users/${uid} - GET
-    Returns user details, tasks (empty if admin), transactions (empty if admin).
+    Returns user details, the open tasks with the user's latest status on each
+    (empty if admin), and the user's most recent transactions (empty if admin).
+    Costs at most three queries, each bounded by a limit.
     """
-    print(uid)
     user = User.query.filter_by(uid=uid).first()
     if not user:
         return jsonify({"success": False, "message": "User not found"}), 404
@@ -26,48 +37,71 @@ def get_user_by_uid(uid):
     tasks = []
     transactions = []
     if user.cat.lower() == 'user':
-        # For normal user: let's assume tasks and transactions are everything
-        tasks = Task.query.all()  # or tasks specifically assigned, etc.
-        transactions = Transaction.query.filter_by(uid=user.uid).all()
-
-    # Convert tasks to simple dict
-    tasks_data = []
-    for t in tasks:
-        tasks_data.append(
-            {
-                "id": t.id,
-                "name": t.name,
-                "created_by": t.created_by,
-                "reward": t.reward,
-                "start_time": t.start_time,
-                "deadline": t.deadline,
-                "recurrence_interval": t.recurrence_interval,
-                "description": t.description,
-            }
-        )
-
-    trans_data = []
-    for tr in transactions:
-        trans_data.append({
-            "id": tr.id,
-            "item": tr.item,
-            "uid": tr.uid,
-            "quantity": tr.quantity,
-            "status": tr.status
-        })
-
-    response = {
-        "user": {
-            "uid": user.uid,
-            "name": user.name,
-            "email": user.email,
-            "credit": float(user.credit),
-            "cat": user.cat
-        },
-        "tasks": tasks_data,
-        "transactions": trans_data
+        tasks_query, transactions_query = profile_queries(uid, current_app.config)
+        tasks = db.session.execute(tasks_query).all()
+        transactions = db.session.execute(transactions_query).scalars().all()
+
+    return jsonify(profile_to_dict(user, tasks, transactions)), 200
+
+
+async def get_user_by_uid_async(request, uid):
+    """/users/${uid} on the async read tier (see asgi.py), same queries as above."""
+    session = request.session
+    user = (await session.execute(select(User).filter_by(uid=uid).limit(1))).scalars().first()
+    if not user:
+        return {"success": False, "message": "User not found"}, 404
+
+    tasks = []
+    transactions = []
+    if user.cat.lower() == 'user':
+        tasks_query, transactions_query = profile_queries(uid, request.app.config)
+        tasks = (await session.execute(tasks_query)).all()
+        transactions = (await session.execute(transactions_query)).scalars().all()
+
+    return profile_to_dict(user, tasks, transactions), 200
+
+
+def profile_queries(uid, config):
+    """The open tasks (with the user's latest status on each) and recent transactions of a profile."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    latest_status = (
+        select(UserTask.status)
+        .where(UserTask.task == Task.id, UserTask.uid == uid)
+        .order_by(UserTask.start_time.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    tasks_query = (
+        select(Task, latest_status.label("status"))
+        .where(or_(Task.deadline.is_(None), Task.deadline >= now, Task.recurrence_interval.isnot(None)))
+        .order_by(Task.deadline.is_(None), Task.deadline, Task.id)
+        .limit(config.get("PROFILE_TASK_LIMIT", 50))
+    )
+    transactions_query = (
+        select(Transaction)
+        .where(Transaction.uid == uid)
+        .order_by(Transaction.created_at.desc(), Transaction.id)
+        .limit(config.get("PROFILE_TRANSACTION_LIMIT", 20))
+    )
+    return tasks_query, transactions_query
+
+
+def profile_to_dict(user, tasks, transactions):
+    return {
+        "user": profile_user_to_dict(user),
+        "tasks": [{**task_to_dict(t), "status": status} for t, status in tasks],
+        "transactions": [transaction_to_dict(tr) for tr in transactions],
     }
-    return jsonify(response), 200
+
+
+@users_bp.route("/users/cache/stats", methods=["GET"])
+@user_logged_in(is_admin=True)
+def get_user_cache_stats():
+    """
+    /users/cache/stats - GET
+    Returns the hit/miss counters of this worker's user lookup cache.
+    """
+    return jsonify({"success": True, "stats": user_cache.stats()}), 200
 
 
 @users_bp.route("/users/add", methods=["POST"])
@@ -87,32 +121,91 @@ def add_user():
     if existing_user:
         return jsonify({"success": False, "message": "User already exists"}), 400
 
+    if not user_data.get("password"):
+        return jsonify({"success": False, "message": "Password required"}), 400
+
     new_id = uuid.uuid4().hex
     user_cat = user_data.get("cat", "USER")
+    try:
+        password_hash = password_hasher.hash(user_data.get("password"))
+    except PasswordHashingBusyException as e:
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code, {"Retry-After": "1"}
 
     new_user = User(
         uid=new_id,
         name=user_data.get("name"),
         cat=user_cat,
         email=user_data.get("email"),
-        password=user_data.get("password"),
+        password=password_hash,
         credit=user_data.get("credit", 0.0),
         is_active=True,
     )
     db.session.add(new_user)
     db.session.commit()
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="USER",
-        timestamp=db.func.current_timestamp(),
+        uid=current_user.uid,
         description=f"User {current_user.uid} added new {user_cat} user {new_id}",
+        action="create",
+        entity_type="USER",
+        entity_id=new_id,
     )
-    db.session.add(log_item)
     db.session.commit()
 
     return jsonify({"success": True, "uid": new_id, "message": "User added successfully"}), 201
 
+@users_bp.route("/users/import", methods=["POST"])
+@user_logged_in(is_admin=True)
+def import_users_endpoint():
+    """
+    /users/import - POST
+    Request: a CSV body (Content-Type: text/csv) with a header row naming the
+    columns name, email, password and optionally cat and credit, or JSON
+    { "users": [{name, cat, email, password, credit}, ...] }
+    Creates every valid user whose email is not taken, and reports the others
+    per row (counting from 1) without failing the batch.
+    """
+    fmt = "csv" if request.mimetype in ("text/csv", "application/csv") else "json"
+    try:
+        rows = parse_users(request.get_data(as_text=True), fmt)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if not rows:
+        return jsonify({"success": False, "message": "No users in request"}), 400
+    max_rows = current_app.config.get("USER_IMPORT_MAX_ROWS", 1000)
+    if len(rows) > max_rows:
+        return jsonify({"success": False, "message": f"At most {max_rows} users per import"}), 413
+
+    try:
+        imported, errors = import_users(rows, current_user.uid)
+    except PasswordHashingBusyException as e:
+        return jsonify({"success": False, "message": str(e)}), e.http_response_code, {"Retry-After": "1"}
+
+    return jsonify({
+        "success": True,
+        "imported": len(imported),
+        "failed": len(errors),
+        "users": imported,
+        "errors": errors,
+    }), 200
+
+
+@users_bp.cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--by", "by_uid", default=None, help="uid of the admin recorded in the audit log.")
+def import_users_command(path, by_uid):
+    """Import users from a .csv or .json file (same format as POST /users/import)."""
+    with open(path, newline="") as f:
+        try:
+            rows = parse_users(f.read(), "csv" if path.lower().endswith(".csv") else "json")
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    imported, errors = import_users(rows, by_uid)
+    for error in errors:
+        click.echo(f"Row {error['row']} ({error['email']}): {error['message']}", err=True)
+    click.echo(f"Imported {len(imported)} users ({len(errors)} rows skipped).")
+
+
 @users_bp.route("/users/<string:uid>/update", methods=["PATCH"])
 @user_logged_in()
 def update_user(uid):
@@ -133,6 +226,14 @@ def update_user(uid):
         return jsonify({"success": False, "message": "You are not authorised to perform this action."}), 403
 
     diff = generate_update_diff(user, user_data)
+    if "password" in diff:
+        # Keep passwords out of the audit log
+        diff["password"] = {"before": "***", "after": "***"}
+    if user_data.get("password"):
+        try:
+            user_data["password"] = password_hasher.hash(user_data["password"])
+        except PasswordHashingBusyException as e:
+            return jsonify({"success": False, "message": str(e)}), e.http_response_code, {"Retry-After": "1"}
 
     # Update fields
     protected_update(user, "name", user_data)
@@ -142,14 +243,19 @@ def update_user(uid):
     protected_update(user, "credit", user_data, admin_only=True)
     protected_update(user, "is_active", user_data, admin_only=True)
     db.session.commit()
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    user_cache.invalidate(uid)
+    if "cat" in diff or "is_active" in diff:
+        # Their tokens carry the old role and active state
+        revoked_tokens.revoke(uid)
+    audit_log.record(
         cat="USER",
-        timestamp=db.func.current_timestamp(),
-        description=f"User {current_user.uid} made the following changes: {diff} on user {uid}",
+        uid=current_user.uid,
+        description=f"User {current_user.uid} updated user {uid}",
+        action="update",
+        entity_type="USER",
+        entity_id=uid,
+        diff=diff,
     )
-    db.session.add(log_item)
     db.session.commit()
     return jsonify({"success": True, "message": "User updated"}), 200
 
@@ -166,15 +272,17 @@ def suspend_user(uid):
         return jsonify({"success": False, "message": "User not found"}), 404
 
     user.is_active = False
-    db.session.commit()
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    audit_log.record(
         cat="USER",
-        timestamp=db.func.current_timestamp(),
+        uid=current_user.uid,
         description=f"User {current_user.uid} suspended user {uid}",
+        action="suspend",
+        entity_type="USER",
+        entity_id=uid,
     )
-    db.session.add(log_item)
+    db.session.commit()
+    user_cache.invalidate(uid)
+    revoked_tokens.revoke(uid)
 
     return jsonify({"success": True, "message": f"User {uid} suspended"}), 200
 
@@ -192,13 +300,15 @@ def delete_user(uid):
 
     db.session.delete(user)
     db.session.commit()
-    log_item = Log(
-        id=uuid.uuid4().hex,
-        uid=current_user.uid,
+    user_cache.invalidate(uid)
+    revoked_tokens.revoke(uid)
+    audit_log.record(
         cat="USER",
-        timestamp=db.func.current_timestamp(),
+        uid=current_user.uid,
         description=f"User {current_user.uid} deleted user {uid}",
+        action="delete",
+        entity_type="USER",
+        entity_id=uid,
     )
-    db.session.add(log_item)
     db.session.commit()
     return jsonify({"success": True, "message": f"User {uid} deleted"}), 200
@@ -2,6 +2,8 @@
 from flask import Blueprint, request, jsonify
 from permissions.utils import user_logged_in, protected_update
 from models import db, UserTask
+from common.pagination import apply_filters, apply_time_range, keyset_paginate
+from common.serializers import usertask_to_dict
 
 usertasks_bp = Blueprint('usertasks', __name__)
 
@@ -10,21 +12,21 @@ usertasks_bp = Blueprint('usertasks', __name__)
 def get_all_usertasks():
     """
     /usertasks/all - GET
-    Retrieve all usertasks.
+    Query: limit, cursor, status, uid, task, since, until (on start_time)
+    Retrieve a page of usertasks, plus the cursor of the next page.
     """
-    usertasks = UserTask.query.all()
-    output = []
-    for ut in usertasks:
-        output.append({
-            "id": ut.id,
-            "uid": ut.uid,
-            "task": ut.task,
-            "start_time": ut.start_time.isoformat() if ut.start_time else None,
-            "end_time": ut.end_time.isoformat() if ut.end_time else None,
-            "status": ut.status,
-            "admin_comment": ut.admin_comment,
-        })
-    return jsonify({"usertasks": output}), 200
+    query = apply_filters(usertask_to_dict.select(), request.args, {
+        "status": UserTask.status,
+        "uid": UserTask.uid,
+        "task": UserTask.task,
+    })
+    try:
+        query = apply_time_range(query, request.args, UserTask.start_time)
+        usertasks, next_cursor = keyset_paginate(query, [UserTask.id], request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"usertasks": [usertask_to_dict.from_row(ut) for ut in usertasks], "next_cursor": next_cursor}), 200
 
 
 @usertasks_bp.route('/usertasks/update', methods=['PATCH'])